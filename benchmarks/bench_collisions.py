@@ -0,0 +1,47 @@
+"""
+Particle-particle collisions through the spatial-hash grid: step cost per particle and
+overlapping pairs per step from 150 to 5k particles with the chamber at BDC, mid-stroke and
+TDC (highest density); tests/test_particles.py checks the pairs against a brute-force search.
+Every pair is resolved, so cost per particle follows the density: flat while the gas is
+sparse, growing with the pairs per particle once the piston packs it tighter.
+
+Run from the project root:  python -m benchmarks.bench_collisions [steps]
+"""
+import sys
+import time
+
+from engine_model import CYLINDER_CENTER_X, CYLINDER_TOP_Y, CYLINDER_WIDTH, TDC_Y, BDC_Y
+from particles import ParticleSystem, COLLISION_CELL_SIZE
+
+COUNTS = (150, 1000, 2000, 5000)
+LEFT = CYLINDER_CENTER_X - CYLINDER_WIDTH // 2; RIGHT = LEFT + CYLINDER_WIDTH
+CHAMBERS = {"BDC": BDC_Y, "mid": (TDC_Y + BDC_Y) / 2, "TDC": TDC_Y} # Piston top -> chamber bottom
+
+
+def chamber(piston_y):
+    return (LEFT, CYLINDER_TOP_Y, RIGHT, max(CYLINDER_TOP_Y + 1, piston_y))
+
+
+def time_steps(count, piston_y, collisions, num_steps):
+    bounds = chamber(piston_y)
+    system = ParticleSystem(count, chamber(CHAMBERS["BDC"]), seed=1, collisions=collisions)
+    for _ in range(10): system.step(bounds, "Compression", 0) # Let the gas settle into the chamber
+    start = time.perf_counter()
+    for _ in range(num_steps): system.step(bounds, "Compression", 0)
+    elapsed = (time.perf_counter() - start) / num_steps
+    return elapsed, len(system.collision_pairs(LEFT, CYLINDER_TOP_Y)[0])
+
+
+def main():
+    num_steps = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    print(f"cell {COLLISION_CELL_SIZE:g} px, every member of a cell collides")
+    print(f"{'particles':>9} {'chamber':>7} {'no coll. ms':>11} {'coll. ms':>9} {'us/particle':>11} {'pairs':>8}")
+    for count in COUNTS:
+        for name, piston_y in CHAMBERS.items():
+            plain, _ = time_steps(count, piston_y, False, num_steps)
+            colliding, pairs = time_steps(count, piston_y, True, num_steps)
+            print(f"{count:>9} {name:>7} {plain * 1000:11.3f} {colliding * 1000:9.3f} {colliding / count * 1e6:11.2f} {pairs:>8}")
+
+
+if __name__ == '__main__':
+    main()
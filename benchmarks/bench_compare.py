@@ -0,0 +1,102 @@
+"""
+Comparison mode cost (compare.py): frame work time against the number of engines side by side.
+
+For each engine count the headless frame loop updates every engine and renders the tiled window
+(ComparisonView: one LayeredRenderer per engine drawing at tile scale into its tile, one display
+update). "separate" is what the same engines cost as standalone windows: the frame time of one
+engine at full size (LayeredRenderer + display update) times the count. Half of the engines
+share the default geometry and half use a shorter crank, as in a typical comparison. All of
+them run at MAX_RPM, each with its own particle motion, so every tile is busy. "fits" tells
+whether the p99 frame stays within the 60 FPS budget.
+
+Exits non-zero when the 4-up p99 is over BUDGET_MARGIN of the budget, or when the cost per
+engine does not fall as engines are added: it must drop whenever the tiles get smaller, and
+counts that share a tile scale (2 and 4 are both drawn at 1/2) may differ only by noise.
+
+Run from the project root:  python -m benchmarks.bench_compare [engines ...]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from compare import ComparisonView, create_engines, parse_spec
+from engine_sim import LayeredRenderer, Engine, WIDTH, HEIGHT, FPS, MAX_RPM
+
+FRAMES = 300
+WARMUP_FRAMES = 30
+SPECS = ("", "crank_radius=60,conrod_length=200")
+BUDGET_MARGIN = 0.8 # Share of the 60 FPS budget the 4-up p99 may use
+SAME_SCALE_TOLERANCE = 0.25 # Timing noise allowed in the cost per engine between counts drawn at the same tile scale
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+
+
+def frame_times(step):
+    """ Milliseconds per call of step() after a warm-up. """
+    times = []
+    for frame in range(WARMUP_FRAMES + FRAMES):
+        start = time.perf_counter(); step()
+        if frame >= WARMUP_FRAMES: times.append((time.perf_counter() - start) * 1000)
+    return np.array(times)
+
+
+def single(screen):
+    engine = Engine(particle_seed=1); engine.set_rpm(MAX_RPM); engine.toggle_pause()
+    renderer = LayeredRenderer()
+    def step():
+        engine.update(1.0 / FPS)
+        pygame.display.update(renderer.render(screen, engine, UI_STATE))
+    return frame_times(step)
+
+
+def comparison(count):
+    specs = [(text,) + parse_spec(text) for text in (SPECS * count)[:count]]
+    engines, _, captions = create_engines(specs)
+    for index, engine in enumerate(engines):
+        engine.set_rpm(MAX_RPM); engine.toggle_pause()
+        engine.update(index * 0.37 / count) # Out of phase, like engines started at different times
+    view = ComparisonView(engines, captions)
+    screen = pygame.display.set_mode(view.size)
+    def step():
+        for engine in engines: engine.update(1.0 / FPS)
+        pygame.display.update(view.render(screen, (0, 0), False, "Quality: full"))
+    times = frame_times(step)
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    return times, view.factor, len(view.backgrounds)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 9]
+    pygame.init()
+    display = pygame.display.set_mode((WIDTH, HEIGHT))
+    base = single(display).mean()
+    budget = 1000.0 / FPS
+    print(f"{FRAMES} frames at {MAX_RPM} RPM; one engine at full size: {base:.2f} ms/frame")
+    print(f"{'engines':>7} {'scale':>5} {'backgrounds':>11} {'mean':>6} {'p99':>6} {'separate':>8} {'per engine':>10} {'fits 60 FPS':>11}")
+    per_engine = []; factors = []; failures = []
+    for count in counts:
+        times, factor, backgrounds = comparison(count)
+        p99 = np.percentile(times, 99); per_engine.append(times.mean() / count); factors.append(factor)
+        print(f"{count:7d} {'1/' + str(factor):>5} {backgrounds:11d} {times.mean():6.2f} {p99:6.2f} {base * count:8.2f}"
+              f" {per_engine[-1]:10.2f} {'yes' if p99 <= budget else 'no':>11}")
+        if count == 4 and p99 > budget * BUDGET_MARGIN:
+            failures.append(f"4 engines: p99 {p99:.2f} ms over {BUDGET_MARGIN:.0%} of the {budget:.1f} ms budget")
+    pygame.quit()
+    rows = list(zip(counts, factors, per_engine))
+    for (count, factor, cost), (next_count, next_factor, next_cost) in zip(rows, rows[1:]):
+        if next_count <= count: continue
+        if next_factor > factor and next_cost >= cost:
+            failures.append(f"{next_count} engines: {next_cost:.2f} ms per engine at 1/{next_factor}, not below {cost:.2f} ms at {count}")
+        elif next_cost > cost * (1 + SAME_SCALE_TOLERANCE):
+            failures.append(f"{next_count} engines: {next_cost:.2f} ms per engine, more than {cost:.2f} ms at {count} and the same scale")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == '__main__':
+    main()
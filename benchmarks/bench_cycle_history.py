@@ -0,0 +1,103 @@
+"""
+Cycle history over long runs: memory, frame time and PV trace cost against the number of cycles.
+
+The engine runs at MAX_RPM, fast-forwarded by calling perform_update_calculations directly, up
+to each checkpoint (tens of thousands of cycles). At every checkpoint the table shows the
+memory held by the history (the sample ring plus the cycle-summary ring) and the growth of the
+traced Python heap since the first checkpoint, which should both stay flat. It also shows the
+frame work time of the headless frame loop (update, LayeredRenderer with the panel statistics,
+display update), which should stay flat too, and the cost of the rolling statistics. The second table compares drawing the whole history
+as one polyline (what a from-scratch PV trace used to cost) with draw_pv_diagram, which draws
+the recent cycles thinned by lttb_indices to at most PV_DISPLAY_POINTS vertices.
+
+Run from the project root:  python -m benchmarks.bench_cycle_history [cycles ...]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+from engine_model import SIM_STEP_SECONDS
+from engine_sim import (Engine, LayeredRenderer, draw_pv_diagram, pv_transform, WIDTH, HEIGHT, FPS, MAX_RPM, MIN_RPM,
+                        PV_RECT, PV_PLOT_COLOR, PV_POINT_HISTORY, PV_DISPLAY_POINTS)
+from pv_history import PVHistory
+
+FRAMES = 120
+STEPS_PER_CYCLE = round(720 / (MAX_RPM * 6 * SIM_STEP_SECONDS)) # Simulation steps of one cycle at MAX_RPM
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+DRAW_REPEATS = 50
+WARMUP_RUNS = 5
+
+
+def frame_times(screen, engine, renderer):
+    times = []
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        engine.update(1.0 / FPS)
+        pygame.display.update(renderer.render(screen, engine, UI_STATE))
+        times.append((time.perf_counter() - start) * 1000)
+    return np.array(times)
+
+
+def long_run(screen, checkpoints):
+    print(f"{'cycles':>8} {'history KB':>10} {'heap KB':>8} {'frame mean':>10} {'p99':>6} {'summary us':>10}  rolling work / CoV / peak")
+    engine = Engine(particle_seed=1); engine.set_rpm(MAX_RPM); engine.toggle_pause()
+    renderer = LayeredRenderer()
+    for _ in range(WARMUP_RUNS): frame_times(screen, engine, renderer) # Fills the text cache to its bound and creates the PV plot
+    tracemalloc.start()
+    base = None
+    history = engine.pv_data
+    for checkpoint in checkpoints:
+        while history.cycle_count < checkpoint:
+            engine.perform_update_calculations(SIM_STEP_SECONDS)
+        start = time.perf_counter()
+        for _ in range(DRAW_REPEATS): history.cycles.cached = None; history.cycles.summary()
+        summary_time = (time.perf_counter() - start) / DRAW_REPEATS * 1e6
+        times = frame_times(screen, engine, renderer); p99 = np.percentile(times, 99) # Before reading the heap: the first call imports more of NumPy
+        if base is None: base = tracemalloc.get_traced_memory()[0]
+        heap = (tracemalloc.get_traced_memory()[0] - base) / 1024
+        summary = engine.cycle_summary()
+        print(f"{history.cycle_count:8d} {history.nbytes / 1024:10.0f} {heap:8.0f} {times.mean():10.2f} {p99:6.2f} {summary_time:10.0f}"
+              f"  {summary.mean_work[0]:.1f} / {summary.cov_work[0]:.2f}% / {summary.mean_peak_pressure[0]:.1f}")
+    tracemalloc.stop()
+
+
+def trace_cost(screen):
+    print(f"\n{'samples':>8} {'RPM':>5} {'full vertices':>13} {'full ms':>8} {'thinned vertices':>16} {'draw_pv_diagram ms':>18}")
+    engine = Engine(particle_seed=1)
+    rect = PV_RECT; v_min, v_max = engine.min_volume, engine.max_volume; p_min, p_max = engine.params.min_pressure * 0.8, engine.params.max_pressure_power * 1.1
+    for samples, rpm in ((1024, MAX_RPM), (4096, MAX_RPM), (PV_POINT_HISTORY, MAX_RPM), (PV_POINT_HISTORY, MIN_RPM)):
+        engine = Engine(particle_seed=1); engine.set_rpm(rpm); engine.toggle_pause()
+        engine.pv_data = history = PVHistory(samples)
+        while history.total < 2 * samples: engine.perform_update_calculations(SIM_STEP_SECONDS)
+        transform = pv_transform(rect, v_min, v_max, p_min, p_max)
+        start = time.perf_counter()
+        for _ in range(DRAW_REPEATS):
+            pygame.draw.lines(screen, PV_PLOT_COLOR, False, transform.points(*history.latest(len(history))), 2)
+        full = (time.perf_counter() - start) / DRAW_REPEATS * 1000
+        start = time.perf_counter()
+        for _ in range(DRAW_REPEATS):
+            draw_pv_diagram(screen, rect, history, engine.cylinder_volume, engine.pressure, v_min, v_max, p_min, p_max)
+        thinned = (time.perf_counter() - start) / DRAW_REPEATS * 1000
+        count, _ = history.recent_cycles(4)
+        print(f"{samples:8d} {rpm:5d} {len(history):13d} {full:8.2f} {min(count, PV_DISPLAY_POINTS):16d} {thinned:18.2f}")
+
+
+def main():
+    checkpoints = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000, 20000, 50000]
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"{MAX_RPM} RPM, {STEPS_PER_CYCLE} samples per cycle; frame work time in ms over {FRAMES} frames")
+    long_run(screen, checkpoints)
+    trace_cost(screen)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Frame time vs cylinder count (single, inline-3/4/6, V6, V8), headless under the SDL dummy
+driver, with the LayeredRenderer the GUI uses (tests/test_engine.py checks the firing order).
+
+Run from the project root:  python -m benchmarks.bench_cylinders [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import engine_sim
+from engine_model import LAYOUTS
+
+FRAME_BUDGET_MS = 1000.0 / engine_sim.FPS
+
+
+def run(layout_name, num_frames):
+    screen = pygame.display.set_mode((engine_sim.WIDTH, engine_sim.HEIGHT))
+    engine = engine_sim.create_engine(layout_name); engine.set_rpm(600); engine.toggle_pause()
+    renderer = engine_sim.LayeredRenderer()
+    ui_state = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+    frame_times = []
+    for _ in range(num_frames):
+        start = time.perf_counter()
+        engine.update(1.0 / engine_sim.FPS)
+        pygame.display.update(renderer.render(screen, engine, ui_state))
+        frame_times.append(time.perf_counter() - start)
+    return engine, np.array(frame_times[1:]) * 1000 # First frame builds the static layer
+
+
+def main():
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    pygame.init()
+    print(f"{'layout':<10} {'cyl':>3} {'particles':>9} {'mean ms':>8} {'p95 ms':>8} {'budget use':>10}")
+    for layout_name in ("single", "inline-3", "inline-4", "inline-6", "V6", "V8"):
+        engine, frame_ms = run(layout_name, num_frames)
+        count = len(LAYOUTS[layout_name].firing_order)
+        print(f"{layout_name:<10} {count:>3} {len(engine.particles):>9} {frame_ms.mean():8.3f} "
+              f"{np.percentile(frame_ms, 95):8.3f} {np.percentile(frame_ms, 95) / FRAME_BUDGET_MS:10.1%}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Offscreen export throughput: frames/s and real-time factor of frame_export for the raw and
+PNG writers, with the background writer thread vs writing each frame inline on the render
+thread. A null writer gives the render-only ceiling.
+
+Run from the project root:  python -m benchmarks.bench_export [frames]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import engine_sim
+import frame_export
+
+SIZE = (engine_sim.WIDTH, engine_sim.HEIGHT)
+
+
+class NullWriter:
+    def write(self, index, frame): pass
+    def close(self): pass
+
+
+class InlineExporter(frame_export.FrameExporter):
+    """ Same copy into a pooled buffer, but the write happens in submit() (no overlap). """
+    def __init__(self, writer, size):
+        super().__init__(writer, size, pool_size=1)
+
+    def submit(self, surface):
+        super().submit(surface)
+        index, frame = self.pending.get()
+        self.writer.write(index, frame); self.free.put(frame)
+
+
+def run(make_writer, exporter_class, num_frames):
+    engine = engine_sim.create_engine(); engine.set_rpm(300)
+    with tempfile.TemporaryDirectory() as directory:
+        exporter = exporter_class(make_writer(directory), SIZE)
+        start = time.perf_counter()
+        frame_export.export(engine, exporter, num_frames)
+        exporter.close()
+        return time.perf_counter() - start
+
+
+def main():
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pygame.init()
+    print(f"{os.cpu_count()} CPUs; {num_frames} frames at {frame_export.DEFAULT_EXPORT_FPS} FPS "
+          f"({num_frames / frame_export.DEFAULT_EXPORT_FPS:.1f} s of video)")
+    writers = (("render only", lambda directory: NullWriter()),
+               ("raw", lambda directory: frame_export.RawRGBWriter(os.path.join(directory, "frames.rgb"), SIZE)),
+               ("png", lambda directory: frame_export.PNGSequenceWriter(directory, SIZE)))
+    for name, make_writer in writers:
+        for mode, exporter_class in (("inline", InlineExporter), ("threaded", frame_export.FrameExporter)):
+            elapsed = run(make_writer, exporter_class, num_frames)
+            print(f"{name:<12} {mode:<9} {elapsed / num_frames * 1000:7.2f} ms/frame  "
+                  f"{num_frames / frame_export.DEFAULT_EXPORT_FPS / elapsed:5.2f}x real time")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
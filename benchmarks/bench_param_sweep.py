@@ -0,0 +1,41 @@
+"""
+Parameter-sweep throughput vs worker count (tests/test_param_sweep.py checks that pooled
+results match the in-process run). Scaling is limited by the cores of the machine it runs on.
+
+Run from the project root:  python -m benchmarks.bench_param_sweep [points]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+import param_sweep
+
+
+def sweep(num_points, workers):
+    """ num_points distinct parameter sets (no RPM sharing, so every point integrates a cycle). """
+    field_values = {"power_exponent": np.linspace(1.2, 1.4, num_points // 10).tolist(),
+                    "max_pressure_power": np.linspace(30, 70, 10).tolist()}
+    rows = []
+    start = time.perf_counter()
+    param_sweep.run_sweep(param_sweep.grid_points([1200.0], field_values), rows.extend, workers)
+    return time.perf_counter() - start, sorted(rows)
+
+
+def main():
+    num_points = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    cores = os.cpu_count()
+    serial_time, reference = sweep(num_points, 1)
+    print(f"{cores} cores, {len(reference)} points")
+    print(f"  in-process          {len(reference) / serial_time:10.0f} points/s")
+    workers = 1
+    while workers <= cores:
+        elapsed, rows = sweep(num_points, workers)
+        speedup = serial_time / elapsed
+        print(f"  pool, {workers:>3} workers   {len(rows) / elapsed:10.0f} points/s  speedup {speedup:5.2f}x  efficiency {speedup / workers:6.1%}")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
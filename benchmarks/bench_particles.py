@@ -0,0 +1,84 @@
+"""
+Per-object Particle vs batched ParticleSystem: frame cost.
+
+Both are driven through the same engine cycle (bounds from the piston position, stroke
+and combustion timer from Engine). Step times are reported at several counts, followed by
+draw times of one draw.circle call per particle against the batched draw_particles path.
+tests/test_particles.py checks that both give the same per-stroke statistics.
+
+Run from the project root:  python -m benchmarks.bench_particles
+"""
+import time
+
+import pygame
+
+from engine_sim import Engine, Particle, PALETTE_COLORS, draw_particles, WIDTH, HEIGHT, CYLINDER_CENTER_X, CYLINDER_WIDTH, CYLINDER_TOP_Y
+from particles import ParticleSystem, PARTICLE_RADIUS
+
+
+def engine_frames(num_frames, rpm=120, fps=60):
+    """ Yields (bounds, stroke, combustion_timer) for consecutive frames of a running engine. """
+    engine = Engine(); engine.set_rpm(rpm); engine.toggle_pause()
+    for _ in range(num_frames):
+        engine.update(1.0 / fps)
+        bounds = (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y,
+                  CYLINDER_CENTER_X + CYLINDER_WIDTH // 2, CYLINDER_TOP_Y + max(1, int(engine.piston_y - CYLINDER_TOP_Y)))
+        yield bounds, engine.stroke, engine.combustion_timer
+
+
+def time_legacy(surface, count, frames):
+    rect = pygame.Rect(frames[0][0][0], frames[0][0][1], CYLINDER_WIDTH, frames[0][0][3] - frames[0][0][1])
+    particles = [Particle(rect) for _ in range(count)]
+    start = time.perf_counter()
+    for bounds, stroke, combustion_timer in frames:
+        rect = pygame.Rect(bounds[0], bounds[1], bounds[2] - bounds[0], bounds[3] - bounds[1])
+        engine_state = {'stroke': stroke, 'combustion_timer': combustion_timer}
+        for particle in particles: particle.move_and_draw(surface, rect, engine_state)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def time_system(count, frames):
+    system = ParticleSystem(count, frames[0][0], seed=2)
+    start = time.perf_counter()
+    for bounds, stroke, combustion_timer in frames:
+        system.step(bounds, stroke, combustion_timer)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def time_draw(surface, count, frames):
+    """ (per-circle, batched) seconds per frame drawing count particles at states recorded along frames. """
+    system = ParticleSystem(count, frames[0][0], seed=3)
+    states = []
+    for bounds, stroke, combustion_timer in frames[::8]:
+        system.step(bounds, stroke, combustion_timer)
+        states.append((system.x.copy(), system.y.copy(), system.color_index.copy(), bounds))
+    def per_circle(rect):
+        visible = system.visible()
+        for color, x, y in zip(system.color_index[visible].tolist(), system.x[visible].astype(int).tolist(), system.y[visible].astype(int).tolist()):
+            pygame.draw.circle(surface, PALETTE_COLORS[color], (x, y), PARTICLE_RADIUS)
+    timings = []
+    for draw in (per_circle, lambda rect: draw_particles(surface, system, rect)):
+        elapsed = 0.0
+        for system.x, system.y, system.color_index, bounds in states:
+            system.top, system.bottom = bounds[1], bounds[3]
+            rect = pygame.Rect(bounds[0], bounds[1], bounds[2] - bounds[0], bounds[3] - bounds[1])
+            start = time.perf_counter(); draw(rect); elapsed += time.perf_counter() - start
+        timings.append(elapsed / len(states))
+    return timings
+
+
+def main():
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    frames = list(engine_frames(240))
+    for count in (150, 2000):
+        print(f"Particle.move_and_draw   {count:>7d} particles: {time_legacy(surface, count, frames) * 1000:8.3f} ms/frame (incl. draw)")
+    for count in (150, 2000, 10_000, 50_000, 100_000):
+        print(f"ParticleSystem.step      {count:>7d} particles: {time_system(count, frames) * 1000:8.3f} ms/frame")
+    print()
+    for count in (150, 2000, 10_000, 50_000):
+        per_circle, batched = time_draw(surface, count, frames)
+        print(f"draw {count:>7d} particles: draw.circle each {per_circle * 1000:8.3f} ms, batched {batched * 1000:7.3f} ms ({per_circle / batched:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Frame profiler overhead: frame time with the profiler off, timing, and timing with the HUD,
+headless under the SDL dummy driver; then prints the per-phase percentiles the profiler
+measured and writes its JSON dump.
+
+Run from the project root:  python -m benchmarks.bench_profiler [frames] [json path]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import engine_sim
+from profiler import FrameProfiler
+
+PROFILER = engine_sim.PROFILER
+
+
+def run(num_frames, enabled, hud):
+    screen = pygame.display.set_mode((engine_sim.WIDTH, engine_sim.HEIGHT))
+    engine = engine_sim.Engine(); engine.set_rpm(300); engine.toggle_pause()
+    renderer = engine_sim.LayeredRenderer()
+    ui_state = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+    PROFILER.enabled = enabled; PROFILER.hud_visible = hud; PROFILER.reset()
+    clock = pygame.time.Clock()
+    frame_times = []
+    for _ in range(num_frames):
+        PROFILER.end_frame()
+        PROFILER.tick(clock, 0) # Unthrottled: records work time without sleeping
+        start = time.perf_counter()
+        with PROFILER.phase("update"):
+            engine.update(1.0 / engine_sim.FPS)
+        with PROFILER.phase("render"):
+            rects = renderer.render(screen, engine, ui_state)
+        with PROFILER.phase("display"):
+            pygame.display.update(rects)
+        frame_times.append(time.perf_counter() - start)
+    return np.array(frame_times[1:]) * 1000
+
+
+def null_phase_cost(calls=1_000_000):
+    """ Seconds per `with profiler.phase(...)` when the profiler is disabled. """
+    profiler = FrameProfiler(enabled=False)
+    start = time.perf_counter()
+    for _ in range(calls):
+        with profiler.phase("text"):
+            pass
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    pygame.init()
+    print(f"disabled phase(): {null_phase_cost() * 1e9:.0f} ns per call")
+    for name, enabled, hud in (("off", False, False), ("timing", True, False), ("timing + HUD", True, True)):
+        frame_ms = run(num_frames, enabled, hud)
+        print(f"{name:<13} mean {frame_ms.mean():6.3f} ms  p95 {np.percentile(frame_ms, 95):6.3f} ms")
+    print(f"\n{'phase':<12}{'p50':>6}{'p95':>6}{'p99':>6}  (ms, last run)")
+    for line in PROFILER.hud_lines(): print(line)
+    if path:
+        PROFILER.dump(path); print(f"wrote {path}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
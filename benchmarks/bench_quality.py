@@ -0,0 +1,81 @@
+"""
+Adaptive quality: frame cost of every QUALITY_LEVELS entry, then the governor on slower machines.
+
+First the real work time per frame (update + LayeredRenderer + display update, headless) is
+measured at each level with a heavy gas (HEAVY_PARTICLES per cylinder). Then QualityGovernor is
+driven with those costs scaled by a slowdown factor (a kiosk ARM box is roughly 5-10x slower
+than a workstation) plus random jitter and occasional spikes, and reports where it settles,
+how often it changed level and the share of frames over budget, against fixed full quality.
+Few changes at a steady load show the hysteresis at work.
+
+Run from the project root:  python -m benchmarks.bench_quality [slowdown ...]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import sys
+import time
+
+import numpy as np
+import pygame
+
+import engine_sim
+import multi_cylinder
+from engine_sim import LayeredRenderer, create_engine, WIDTH, HEIGHT, FPS
+from quality import QualityGovernor, QUALITY_LEVELS
+
+HEAVY_PARTICLES = 20000
+MEASURE_FRAMES = 240
+GOVERNOR_FRAMES = 60 * 120 # Two minutes at 60 FPS
+JITTER = 0.15 # Relative standard deviation of the simulated frame time
+SPIKE_CHANCE = 0.01; SPIKE_FACTOR = 3.0 # Occasional long frames (GC, other processes)
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+
+
+def measure(screen, layout):
+    """ Mean work milliseconds per frame at each quality level. """
+    engine = create_engine(layout, particle_seed=1); engine.set_rpm(600); engine.toggle_pause()
+    renderer = LayeredRenderer()
+    costs = []
+    for level in QUALITY_LEVELS:
+        engine.set_quality(level)
+        for _ in range(30): engine.update(1.0 / FPS); pygame.display.update(renderer.render(screen, engine, UI_STATE))
+        start = time.perf_counter()
+        for _ in range(MEASURE_FRAMES):
+            engine.update(1.0 / FPS); pygame.display.update(renderer.render(screen, engine, UI_STATE))
+        costs.append((time.perf_counter() - start) / MEASURE_FRAMES * 1000)
+    return costs
+
+
+def simulate(costs, slowdown, budget_ms, seed=1):
+    """ (final level name, level changes, share of frames over budget, same share at fixed full quality). """
+    rng = np.random.default_rng(seed)
+    governor = QualityGovernor(budget_ms, log=None)
+    over = 0; full_over = 0
+    for _ in range(GOVERNOR_FRAMES):
+        noise = max(0.1, rng.normal(1.0, JITTER)) * (SPIKE_FACTOR if rng.random() < SPIKE_CHANCE else 1.0)
+        frame_ms = costs[governor.index] * slowdown * noise
+        over += frame_ms > budget_ms; full_over += costs[-1] * slowdown * noise > budget_ms
+        governor.observe(frame_ms)
+    return governor.level.name, len(governor.changes), over / GOVERNOR_FRAMES, full_over / GOVERNOR_FRAMES
+
+
+def main():
+    slowdowns = [float(arg) for arg in sys.argv[1:]] or [1.0, 3.0, 6.0, 10.0, 20.0]
+    engine_sim.NUM_PARTICLES = multi_cylinder.NUM_PARTICLES = HEAVY_PARTICLES
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    budget_ms = 1000.0 / FPS
+    for layout in ("single", "V8"):
+        costs = measure(screen, layout)
+        print(f"{layout} with {HEAVY_PARTICLES} particles per cylinder: " + ", ".join(f"{level.name} {ms:.2f} ms" for level, ms in zip(QUALITY_LEVELS, costs)))
+        print(f"  {'slowdown':>8} {'settles at':>10} {'changes':>8} {'over budget':>12} {'fixed full':>11}")
+        for slowdown in slowdowns:
+            name, changes, over, full_over = simulate(costs, slowdown, budget_ms)
+            print(f"  {slowdown:8.1f} {name:>10} {changes:8d} {over:12.1%} {full_over:11.1%}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Record/replay: records a long run (600 RPM, every simulation step) with and without the gas and
+reports recording cost per step, bytes per record and per simulated hour, then reopens the
+file and times random seeks (cycle + crank angle) and loads into an engine. Python heap peaks
+(tracemalloc) are reported for both halves to show that memory does not grow with the length
+of the recording. The recording cost includes the engine update itself and runs under tracemalloc,
+so it is an upper bound.
+
+Run from the project root:  python -m benchmarks.bench_recording [simulated minutes]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+from engine_sim import Engine
+from recording import Recorder, Recording
+
+SEEKS = 2000
+FRAME_SECONDS = 1.0 / 60
+
+
+def record(path, minutes, particles):
+    engine = Engine(particle_seed=1); engine.set_rpm(600); engine.toggle_pause()
+    engine.recorder = recorder = Recorder(path, engine, particles)
+    frames = int(minutes * 60 / FRAME_SECONDS)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(frames):
+        engine.update(FRAME_SECONDS); engine.step_particles()
+    elapsed = time.perf_counter() - start
+    recorder.close()
+    peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    return recorder.count, elapsed, peak
+
+
+def replay(path):
+    recording = Recording(path)
+    engine = Engine()
+    rng = np.random.default_rng(1)
+    cycles = rng.integers(0, recording.cycle_count, SEEKS); angles = rng.uniform(0, 720, SEEKS)
+    tracemalloc.start()
+    start = time.perf_counter()
+    indices = [recording.seek(int(cycle), float(angle)) for cycle, angle in zip(cycles, angles)]
+    seek_seconds = (time.perf_counter() - start) / SEEKS
+    start = time.perf_counter()
+    for index in indices: recording.load_into(engine, index)
+    load_seconds = (time.perf_counter() - start) / SEEKS
+    peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    return recording, seek_seconds, load_seconds, peak
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"{minutes:g} simulated minutes at 600 RPM, one record per simulation step")
+    print(f"{'gas':<5} {'records':>8} {'us/step':>8} {'bytes/rec':>9} {'MB/hour':>8} {'rec heap':>9} {'seek us':>8} {'load us':>8} {'replay heap':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for particles in (False, True):
+            path = os.path.join(directory, f"run_{particles}.rec")
+            count, elapsed, record_peak = record(path, minutes, particles)
+            recording, seek_seconds, load_seconds, replay_peak = replay(path)
+            per_hour = recording.dtype.itemsize * count / (minutes / 60) / 1e6
+            print(f"{'yes' if particles else 'no':<5} {count:8d} {elapsed / count * 1e6:8.1f} {recording.dtype.itemsize:9d} {per_hour:8.0f} "
+                  f"{record_peak / 1e6:7.2f}MB {seek_seconds * 1e6:8.1f} {load_seconds * 1e6:8.1f} {replay_peak / 1e6:9.2f}MB")
+            del recording
+
+
+if __name__ == '__main__':
+    main()
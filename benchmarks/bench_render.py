@@ -0,0 +1,50 @@
+"""
+Full redraw (fill + Engine.draw + display.flip) vs LayeredRenderer (static background,
+dynamic layer, display.update of dirty rects only), headless under the SDL dummy driver.
+
+Run from the project root:  python -m benchmarks.bench_render [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import engine_sim
+
+
+def run(num_frames, layered):
+    screen = pygame.display.set_mode((engine_sim.WIDTH, engine_sim.HEIGHT))
+    engine = engine_sim.Engine(); engine.set_rpm(300); engine.toggle_pause()
+    renderer = engine_sim.LayeredRenderer()
+    ui_state = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+    updated_pixels = 0
+    start = time.perf_counter()
+    for _ in range(num_frames):
+        engine.update(1.0 / engine_sim.FPS)
+        if layered:
+            rects = renderer.render(screen, engine, ui_state)
+            pygame.display.update(rects)
+            updated_pixels += sum(rect.width * rect.height for rect in rects)
+        else:
+            screen.fill(engine_sim.LIGHT_GRAY)
+            engine.draw(screen, ui_state)
+            pygame.display.flip()
+            updated_pixels += engine_sim.WIDTH * engine_sim.HEIGHT
+    elapsed = time.perf_counter() - start
+    return elapsed / num_frames, updated_pixels / num_frames / (engine_sim.WIDTH * engine_sim.HEIGHT)
+
+
+def main():
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    pygame.init()
+    for name, layered in (("full redraw + flip", False), ("layered + dirty rects", True)):
+        frame_time, coverage = run(num_frames, layered)
+        print(f"{name:<22} {frame_time * 1000:7.3f} ms/frame  pushed {coverage:6.1%} of the window per frame")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Simulation thread vs single-threaded loop under slow rendering, headless under the SDL dummy driver.
+
+Each run renders for a fixed wall time with an artificial per-frame delay (standing in for a slow
+renderer) and reports, for both loops: frames drawn, simulated seconds per wall second, gas steps
+per simulated second (60 is the nominal rate) and worker ticks per second. With the simulation
+thread the last two stay put however slow the frames get; single-threaded, the gas only moves
+once per drawn frame.
+
+Run from the project root:  python -m benchmarks.bench_sim_thread [seconds per run]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import engine_sim
+from sim_thread import SimulationThread
+
+RENDER_DELAYS_MS = (0, 20, 50)
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+
+
+class CountingParticles:
+    """ Wraps a ParticleSystem and counts step() calls. """
+    def __init__(self, particles):
+        self.particles = particles; self.steps = 0
+
+    def step(self, *args):
+        self.steps += 1
+        self.particles.step(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.particles, name)
+
+
+def run(seconds, delay_ms, threaded):
+    screen = pygame.display.set_mode((engine_sim.WIDTH, engine_sim.HEIGHT))
+    renderer = engine_sim.LayeredRenderer()
+    engine = engine_sim.Engine()
+    simulated = engine_sim.Engine() if threaded else engine
+    simulated.set_rpm(300); simulated.toggle_pause()
+    counter = simulated.particles = CountingParticles(simulated.particles)
+    simulation = None
+    if threaded:
+        simulation = SimulationThread(simulated).start(); engine.particle_stepping = "none"
+    frames = 0
+    start = last = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        now = time.perf_counter(); dt = now - last; last = now
+        if simulation:
+            snapshot, is_new = simulation.latest()
+            if is_new: engine.read_snapshot(snapshot)
+        else:
+            engine.update(dt)
+        pygame.display.update(renderer.render(screen, engine, UI_STATE))
+        time.sleep(delay_ms / 1000)
+        frames += 1
+    elapsed = time.perf_counter() - start
+    if simulation: simulation.stop()
+    ticks = simulation.ticks / elapsed if simulation else frames / elapsed
+    return frames, simulated.sim_time / elapsed, counter.steps / max(simulated.sim_time, 1e-9), ticks
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    pygame.init()
+    print(f"{'loop':<15} {'delay ms':>8} {'frames':>7} {'sim s / wall s':>14} {'gas steps / sim s':>17} {'sim ticks / s':>13}")
+    for delay_ms in RENDER_DELAYS_MS:
+        for name, threaded in (("single-thread", False), ("sim thread", True)):
+            frames, sim_rate, gas_rate, tick_rate = run(seconds, delay_ms, threaded)
+            print(f"{name:<15} {delay_ms:>8} {frames:>7} {sim_rate:14.3f} {gas_rate:17.1f} {tick_rate:13.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
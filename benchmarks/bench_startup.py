@@ -0,0 +1,91 @@
+"""
+Start-up time, cold against warm on-disk cache (disk_cache.py).
+
+Every run is a fresh interpreter (a subprocess, so nothing is memoized in memory) that imports
+engine_sim, opens the headless display, creates the engine, sets the RPM and renders the first
+frame, timing each step. "cold" starts from an empty cache directory, "warm" reuses the one the
+cold run filled. The thermo scenarios solve the cylinder model per operating point, which is
+what the cache saves most; "thermo sweep" also drags the RPM over every bucket up to MAX_RPM,
+as the slider does. Finally it checks that the pygame-free model modules import without pygame.
+
+Run from the project root:  python -m benchmarks.bench_startup [repeats]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = { # name -> (layout, thermo model, RPM sweep)
+    "single": ("single", False, False),
+    "V8": ("V8", False, False),
+    "single thermo": ("single", True, False),
+    "V8 thermo": ("V8", True, False),
+    "thermo sweep": ("single", True, True),
+}
+START_RPM = 600
+PHASES = ("import", "display", "engine", "first frame", "sweep")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter(); marks = {}
+def mark(name):
+    global start
+    now = time.perf_counter(); marks[name] = (now - start) * 1000; start = now
+import pygame, engine_sim
+from engine_sim import LayeredRenderer, create_engine, WIDTH, HEIGHT, FPS, MIN_RPM, MAX_RPM
+from thermo_model import DEFAULT_THERMO, RPM_BUCKET
+import disk_cache
+mark("import")
+pygame.init(); screen = pygame.display.set_mode((WIDTH, HEIGHT))
+mark("display")
+layout, thermo, sweep, rpm = json.loads(sys.argv[1])
+engine = create_engine(layout, particle_seed=1, thermo=DEFAULT_THERMO if thermo else None); engine.set_rpm(rpm)
+mark("engine")
+engine.update(1.0 / FPS); pygame.display.update(LayeredRenderer().render(screen, engine, {'mouse_pos': (0, 0), 'is_dragging_slider': False}))
+mark("first frame")
+if sweep:
+    for value in range(MIN_RPM, MAX_RPM + 1, RPM_BUCKET): engine.set_rpm(value)
+mark("sweep")
+cache = disk_cache.disk_cache()
+marks['hits'] = cache.hits if cache else 0; marks['misses'] = cache.misses if cache else 0
+print(json.dumps(marks))
+"""
+
+MODEL_IMPORT_CHECK = "import sys, engine_model, cycle_tables, thermo_model, particles, disk_cache; print('pygame' in sys.modules)"
+
+
+def run(scenario, cache_dir):
+    """ Phase milliseconds of one fresh process, plus its wall time (interpreter start-up included). """
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", ENGINE_SIM_CACHE=cache_dir, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", PROBE, json.dumps(scenario + (START_RPM,))], env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['wall'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"median of {repeats} fresh processes, milliseconds")
+    print(f"{'scenario':<14} {'cache':<5} " + " ".join(f"{phase:>11}" for phase in PHASES) + f" {'wall':>7} {'hits/misses':>11}")
+    for name, scenario in SCENARIOS.items():
+        runs = {"cold": [], "warm": []}
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                runs["cold"].append(run(scenario, cache_dir))
+                runs["warm"].append(run(scenario, cache_dir))
+        for state, results in runs.items():
+            median = {key: statistics.median(result[key] for result in results) for key in PHASES + ('wall',)}
+            print(f"{name:<14} {state:<5} " + " ".join(f"{median[phase]:11.1f}" for phase in PHASES)
+                  + f" {median['wall']:7.0f} {results[-1]['hits']:>5}/{results[-1]['misses']:<5}")
+    imports_pygame = subprocess.run([sys.executable, "-c", MODEL_IMPORT_CHECK], capture_output=True, text=True, check=True).stdout.strip()
+    print(f"model modules import pygame: {imports_pygame}")
+    return 1 if imports_pygame != "False" else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Scalar vs vectorized crank-angle sweep (tests/test_engine.py checks that they agree).
+
+Run from the project root:  python -m benchmarks.bench_sweep [num_angles]
+"""
+import sys
+import time
+
+import numpy as np
+
+import engine_model
+from engine_sim import Engine
+
+
+def scalar_sweep(engine, angles):
+    """ Steps Engine.perform_update_calculations one angle at a time (paused, so the angle is not advanced). """
+    volumes = np.empty(len(angles)); pressures = np.empty(len(angles))
+    engine.spark_firing = True # Keep the one-frame ignition pressure spike out of the comparison
+    for i, angle in enumerate(angles):
+        engine.crank_angle = angle
+        engine.perform_update_calculations(0.0)
+        volumes[i] = engine.cylinder_volume; pressures[i] = engine.pressure
+    return volumes, pressures
+
+
+def main():
+    num_angles = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    angles = np.random.default_rng(0).uniform(0, 720, num_angles)
+    scalar_count = min(num_angles, 100_000) # The scalar path is too slow for the full set
+
+    engine = Engine()
+    start = time.perf_counter()
+    volumes, pressures = scalar_sweep(engine, angles[:scalar_count].tolist())
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    state = engine_model.sweep(angles)
+    vector_time = time.perf_counter() - start
+
+    scalar_rate = scalar_count / scalar_time; vector_rate = num_angles / vector_time
+    print(f"scalar:     {scalar_count:>10d} angles in {scalar_time:8.3f} s  ({scalar_rate / 1e6:8.3f} M angles/s)")
+    print(f"vectorized: {num_angles:>10d} angles in {vector_time:8.3f} s  ({vector_rate / 1e6:8.3f} M angles/s)")
+    print(f"speedup: {vector_rate / scalar_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
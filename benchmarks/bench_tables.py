@@ -0,0 +1,69 @@
+"""
+Cycle lookup tables: throughput.
+
+Times table lookups against evaluating the formulas, for arrays and for the scalar per-step
+path. tests/test_cycle_tables.py checks their accuracy against the analytic model.
+
+Run from the project root:  python -m benchmarks.bench_tables
+"""
+import math
+import time
+
+import numpy as np
+
+import engine_model
+from cycle_tables import CycleTable
+
+NUM_ANGLES = 1_000_000
+NUM_SCALAR = 200_000
+
+
+def analytic_at(crank_angle):
+    """ Scalar formulas as Engine.perform_update_calculations evaluated them before the tables. """
+    angle_rad = math.radians(crank_angle % 360)
+    r = engine_model.CRANK_RADIUS; l = engine_model.CONROD_LENGTH
+    crank_pin_x = engine_model.CRANKSHAFT_CENTER_X + r * math.sin(angle_rad)
+    crank_pin_y = engine_model.CRANKSHAFT_CENTER_Y + r * math.cos(angle_rad)
+    piston_pin_y = crank_pin_y - math.sqrt(max(0, l**2 - (r * math.sin(angle_rad))**2))
+    piston_y = piston_pin_y - engine_model.PISTON_HEIGHT / 2
+    stroke_fraction = max(0, min(1, (piston_y - engine_model.TDC_Y) / max(0.1, engine_model.ACTUAL_STROKE_PIXELS)))
+    volume = engine_model.CLEARANCE_VOLUME + engine_model.SWEPT_VOLUME * stroke_fraction
+    if crank_angle < 180:
+        pressure = min(engine_model.MIN_PRESSURE * 1.1 * (engine_model.MAX_VOLUME / max(0.1, volume)) ** engine_model.COMPRESSION_EXPONENT,
+                       engine_model.MAX_PRESSURE_COMPRESSION)
+    elif crank_angle < 360:
+        pressure = max(engine_model.MIN_PRESSURE,
+                       engine_model.MAX_PRESSURE_POWER * (engine_model.MIN_VOLUME / max(0.1, volume)) ** engine_model.POWER_EXPONENT)
+    elif crank_angle < 540:
+        pressure = engine_model.MIN_PRESSURE * 1.05
+    else:
+        pressure = engine_model.MIN_PRESSURE
+    return crank_pin_x, crank_pin_y, piston_pin_y, piston_y, volume, pressure
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    angles = np.random.default_rng(0).uniform(0, 720, NUM_ANGLES)
+
+    print("throughput")
+    analytic_time = timed(engine_model.sweep, angles)
+    print(f"  sweep (formulas)   {NUM_ANGLES / analytic_time / 1e6:8.2f} M angles/s")
+    for interpolation in ("linear", "cubic"):
+        table = CycleTable(interpolation=interpolation)
+        print(f"  lookup ({interpolation:<6})    {NUM_ANGLES / timed(table.lookup, angles) / 1e6:8.2f} M angles/s")
+
+    scalar_angles = angles[:NUM_SCALAR].tolist()
+    scalar_time = timed(lambda: [analytic_at(a) for a in scalar_angles])
+    print(f"  scalar formulas    {NUM_SCALAR / scalar_time / 1e6:8.2f} M angles/s")
+    for interpolation in ("linear", "cubic"):
+        table = CycleTable(interpolation=interpolation)
+        print(f"  scalar at() {interpolation:<6} {NUM_SCALAR / timed(lambda: [table.at(a) for a in scalar_angles]) / 1e6:8.2f} M angles/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Telemetry load test: frame work time of the paced frame loop (update + LayeredRenderer +
+display update at FPS, headless) with the TelemetryServer streaming to hundreds of local clients.
+
+The clients run in a separate process on one asyncio loop. Most of them read everything:
+half take JSON Lines at the default rate and half take binary frames of every step. A
+SLOW_SHARE of them use a tiny receive buffer and read only SLOW_READ_BYTES every
+SLOW_READ_SECONDS, so their queues overflow. The table shows the mean, p99 and worst frame
+work time against the loop without a server. It also shows the frames sent and dropped in
+total and for the slow clients alone: drops should come only from the slow clients, and the
+frame time should not follow them. On a machine with few cores the client process competes
+with the frame loop for CPU, so the figures are an upper bound. The last rows repeat the largest
+client count with a MULTI_LAYOUT engine, whose steps publish the selected cylinder.
+
+Run from the project root:  python -m benchmarks.bench_telemetry [clients ...]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import asyncio
+import multiprocessing
+import socket
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from engine_sim import LayeredRenderer, create_engine, WIDTH, HEIGHT, FPS, MAX_RPM
+from telemetry import TelemetryServer
+
+FRAMES = 600 # Ten seconds at 60 FPS
+WARMUP_FRAMES = 60
+SLOW_SHARE = 0.1
+SLOW_RECEIVE_BUFFER = 4096
+SLOW_READ_BYTES = 512; SLOW_READ_SECONDS = 0.5
+CONNECT_TIMEOUT = 30.0
+MULTI_LAYOUT = "V8"
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+
+
+def subscription(index, count):
+    """ (subscription line, slow) of client index out of count. """
+    slow = index < int(count * SLOW_SHARE)
+    if slow: return b'{"format": "json", "every": 1}\n', True # The only subscription of this kind, which tells them apart
+    return (b'{"format": "binary", "every": 1}\n' if index % 2 else b'{"format": "json"}\n'), False
+
+
+async def client(address, line, slow):
+    host, port = address.rsplit(":", 1)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if slow: sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_RECEIVE_BUFFER)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (host, int(port)))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    writer.write(line)
+    try:
+        while True:
+            if slow:
+                if not await reader.read(SLOW_READ_BYTES): break
+                await asyncio.sleep(SLOW_READ_SECONDS)
+            elif not await reader.read(65536):
+                break
+    except ConnectionError:
+        pass
+
+
+def run_clients(address, count):
+    async def main():
+        await asyncio.gather(*(client(address, *subscription(index, count)) for index in range(count)))
+    asyncio.run(main())
+
+
+def frame_loop(screen, engine):
+    """ Work milliseconds of FRAMES paced frames. """
+    renderer = LayeredRenderer(); clock = pygame.time.Clock()
+    times = []
+    for frame in range(WARMUP_FRAMES + FRAMES):
+        start = time.perf_counter()
+        engine.update(1.0 / FPS)
+        pygame.display.update(renderer.render(screen, engine, UI_STATE))
+        if frame >= WARMUP_FRAMES: times.append((time.perf_counter() - start) * 1000.0)
+        clock.tick(FPS)
+    return np.array(times, dtype=float)
+
+
+def scenario(screen, count, layout="single"):
+    """ (frame work times, [(sent, dropped, slow)] per subscriber or None) for count clients (None: no server at all). """
+    engine = create_engine(layout, particle_seed=1); engine.set_rpm(MAX_RPM); engine.toggle_pause()
+    if count is None:
+        return frame_loop(screen, engine), None
+    server = engine.telemetry = TelemetryServer("127.0.0.1:0", log=None).start()
+    clients = None
+    try:
+        if count:
+            clients = multiprocessing.get_context("spawn").Process(target=run_clients, args=(server.address, count), daemon=True)
+            clients.start()
+            deadline = time.perf_counter() + CONNECT_TIMEOUT
+            while len(server.subscribers) < count and time.perf_counter() < deadline: time.sleep(0.05)
+        times = frame_loop(screen, engine)
+        return times, [(s.sent, s.dropped, s.format == "json" and s.every == 1) for s in server.subscribers]
+    finally:
+        if clients is not None: clients.terminate(); clients.join()
+        server.stop()
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [0, 100, 300, 500]
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"{FRAMES} frames at {FPS} FPS, {MAX_RPM} RPM; frame work time in ms")
+    print(f"{'layout':>6} {'clients':>8} {'mean':>6} {'p99':>6} {'max':>6} {'sent':>9} {'dropped':>8} {'slow sent':>10} {'slow dropped':>12}")
+    runs = [("single", count) for count in [None] + counts] + [(MULTI_LAYOUT, None), (MULTI_LAYOUT, max(counts))]
+    for layout, count in runs:
+        times, subscribers = scenario(screen, count, layout)
+        line = f"{layout:>6} {'off' if count is None else count:>8} {times.mean():6.2f} {np.percentile(times, 99):6.2f} {times.max():6.2f}"
+        if subscribers is not None:
+            slow = [entry for entry in subscribers if entry[2]]
+            line += (f" {sum(e[0] for e in subscribers):9d} {sum(e[1] for e in subscribers):8d}"
+                     f" {sum(e[0] for e in slow):10d} {sum(e[1] for e in slow):12d}")
+        print(line)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
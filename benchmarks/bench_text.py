@@ -0,0 +1,50 @@
+"""
+Text cache effectiveness: runs Engine.draw frames headless and reports the cache
+hit/miss counters plus the time spent in draw_text per frame.
+
+Run from the project root:  python -m benchmarks.bench_text [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import engine_sim
+
+
+def main():
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    pygame.init()
+    screen = pygame.display.set_mode((engine_sim.WIDTH, engine_sim.HEIGHT))
+    engine = engine_sim.Engine(); engine.toggle_pause()
+    ui_state = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+
+    text_time = 0.0
+    original_draw_text = engine_sim.draw_text
+    def timed_draw_text(*args, **kwargs):
+        nonlocal text_time
+        start = time.perf_counter()
+        original_draw_text(*args, **kwargs)
+        text_time += time.perf_counter() - start
+    engine_sim.draw_text = timed_draw_text
+    try:
+        for _ in range(num_frames):
+            engine.update(1.0 / engine_sim.FPS)
+            screen.fill(engine_sim.LIGHT_GRAY)
+            engine.draw(screen, ui_state)
+    finally:
+        engine_sim.draw_text = original_draw_text
+
+    print(f"draw_text: {text_time / num_frames * 1000:.3f} ms/frame over {num_frames} frames")
+    for layer, counters in engine_sim.TEXT_CACHE.stats().items():
+        total = max(1, counters['hits'] + counters['misses'])
+        print(f"{layer:<9} hits {counters['hits']:>7d}  misses {counters['misses']:>6d}  "
+              f"hit rate {counters['hits'] / total:6.1%}  entries {counters['size']}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
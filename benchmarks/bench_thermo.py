@@ -0,0 +1,88 @@
+"""
+Crank-angle-resolved thermodynamic model: cost of solving an operating point (cold) against
+reading it back from the cache, the per-step engine update with and without the model, and the
+solved cycle itself for a sweep of spark advances (peak pressure, where it occurs, indicated
+work and IMEP as the closed integral of p dV), which shows the usual optimum spark timing.
+Last, a cold drag of the RPM slider over every bucket at 60 FPS: the longest frame with each
+point solved inline, against solve_ahead's worker thread with the nearest bucket standing in.
+
+Run from the project root:  python -m benchmarks.bench_thermo [rpm]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ["ENGINE_SIM_CACHE"] = "off" # "cold" means solved here; bench_startup measures the disk cache
+
+import numpy as np
+
+from engine_model import DEFAULT_PARAMS, engine_geometry
+from engine_sim import Engine, FPS, MIN_RPM, MAX_RPM
+from thermo_model import DEFAULT_THERMO, RPM_BUCKET, solve_cycle, get_thermo_table, clear_thermo_tables, solve_ahead
+
+SPARK_ADVANCES = (0.0, 10.0, 20.0, 30.0, 40.0)
+UPDATE_STEPS = 6000
+
+
+def time_solve(rpm):
+    clear_thermo_tables()
+    start = time.perf_counter(); table = get_thermo_table(DEFAULT_PARAMS, DEFAULT_THERMO, rpm); cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000): get_thermo_table(DEFAULT_PARAMS, DEFAULT_THERMO, rpm)
+    cached = (time.perf_counter() - start) / 1000
+    print(f"solve at {rpm:g} RPM: {cold * 1000:.1f} ms cold ({table.cycle.cycles} cycles to periodic), {cached * 1e6:.2f} us cached")
+
+
+def time_update(rpm):
+    for name, thermo in (("conceptual", None), ("thermo", DEFAULT_THERMO)):
+        engine = Engine(particle_seed=1, thermo=thermo); engine.set_rpm(rpm); engine.toggle_pause()
+        dt = engine.sim_clock.step_seconds
+        start = time.perf_counter()
+        for _ in range(UPDATE_STEPS): engine.perform_update_calculations(dt)
+        print(f"  {name:<11} update {(time.perf_counter() - start) / UPDATE_STEPS * 1e6:6.2f} us/step")
+
+
+def spark_sweep(rpm):
+    swept_volume = engine_geometry(DEFAULT_PARAMS).swept_volume
+    print(f"{'advance':>7} {'peak p':>7} {'at deg':>7} {'work':>8} {'imep':>6} {'trapped':>8}")
+    for advance in SPARK_ADVANCES:
+        cycle = solve_cycle(DEFAULT_PARAMS, DEFAULT_THERMO._replace(spark_advance=advance), rpm)
+        work = float(np.sum(0.5 * (cycle.pressure[1:] + cycle.pressure[:-1]) * np.diff(cycle.volume)))
+        peak = int(np.argmax(cycle.pressure))
+        print(f"{advance:7g} {cycle.pressure[peak]:7.2f} {cycle.crank_angle[peak]:7.1f} {work:8.1f} {work / swept_volume:6.2f} {cycle.mass[0]:8.2f}")
+
+
+def drag_frames(engine):
+    """ Milliseconds of each paced frame (set_rpm + update) while the slider moves one bucket per frame up to MAX_RPM. """
+    times = []
+    for rpm in range(MIN_RPM, MAX_RPM + 1, RPM_BUCKET):
+        start = time.perf_counter(); engine.set_rpm(rpm); engine.update(1.0 / FPS); elapsed = time.perf_counter() - start
+        times.append(elapsed * 1000); time.sleep(max(0.0, 1.0 / FPS - elapsed))
+    return np.array(times)
+
+
+def time_drag():
+    engine = Engine(particle_seed=1, thermo=DEFAULT_THERMO)
+    clear_thermo_tables(); engine.set_rpm(MIN_RPM)
+    inline = drag_frames(engine)
+    print(f"cold drag, solved inline:  longest frame {inline.max():7.1f} ms, total {inline.sum():7.0f} ms")
+    clear_thermo_tables(); engine.set_rpm(MIN_RPM) # The starting bucket is solved before the worker starts, as in main()
+    solve_ahead(engine.cycle_table.params, DEFAULT_THERMO, MAX_RPM, engine.rpm)
+    ahead = drag_frames(engine)
+    start = time.perf_counter()
+    while engine.thermo_pending: time.sleep(0.001); engine.update(0.0)
+    print(f"cold drag, solve_ahead:    longest frame {ahead.max():7.1f} ms, total {ahead.sum():7.0f} ms, "
+          f"exact table {(time.perf_counter() - start) * 1000:.0f} ms after the drag")
+
+
+def main():
+    rpm = float(sys.argv[1]) if len(sys.argv) > 1 else 600.0
+    time_solve(rpm)
+    time_update(rpm)
+    spark_sweep(rpm)
+    time_drag()
+
+
+if __name__ == '__main__':
+    main()
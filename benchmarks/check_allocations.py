@@ -0,0 +1,86 @@
+"""
+Steady-state allocation check for the frame loop (update + LayeredRenderer + display update),
+headless under the SDL dummy driver.
+
+After WARMUP_FRAMES (tables built, caches and pooled buffers filled) and SETTLE_FRAMES after
+the start-up collection, every scenario runs FRAMES frames and reports:
+  - retained bytes per frame (heap growth over the run / frames): must stay near zero,
+  - transient peak per frame (highest Python heap above the frame's starting point),
+  - garbage collections by generation (gc.callbacks): a full (generation 2) pass is the
+    multi-millisecond hitch, and none may happen in steady state.
+Tracing starts before the engine is created, so replacing an object made during warm-up counts
+its free as well as the new allocation, and the per-frame heap sizes go into a preallocated
+array: the figures are the engine's alone and do not depend on the frame count.
+The limits are enforced by tests/test_allocations.py; this script only reports the figures.
+
+Run from the project root:  python -m benchmarks.check_allocations [frames]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import gc
+import statistics
+import sys
+import tracemalloc
+from array import array
+
+import pygame
+
+from engine_sim import LayeredRenderer, create_engine, WIDTH, HEIGHT, FPS
+
+WARMUP_FRAMES = 300
+SETTLE_FRAMES = 120 # After gc.collect(), which empties the interpreter's free lists: they refill over the next frames
+DEFAULT_FRAMES = 600
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+SCENARIOS = { # name -> (layout, engine options, running)
+    "single": ("single", {}, True),
+    "single/paused": ("single", {}, False),
+    "single/collisions": ("single", {'particle_collisions': True}, True),
+    "V8": ("V8", {}, True),
+}
+
+
+def run(screen, layout, options, running, frames):
+    tracemalloc.start() # Before the engine exists: objects it replaces later were traced too, so their frees count
+    engine = create_engine(layout, particle_seed=1, **options); engine.set_rpm(300)
+    if running: engine.toggle_pause()
+    renderer = LayeredRenderer()
+    def frame():
+        engine.update(1.0 / FPS)
+        pygame.display.update(renderer.render(screen, engine, UI_STATE))
+    for _ in range(WARMUP_FRAMES): frame()
+
+    collections = [0, 0, 0]
+    def count_collections(phase, info):
+        if phase == "start": collections[info["generation"]] += 1
+    gc.collect(); gc.freeze() # As main() does after start-up
+    for _ in range(SETTLE_FRAMES): frame()
+    gc.callbacks.append(count_collections)
+    ends = array("q", bytes(8 * frames)); transient_peak = 0 # Heap size after every frame (preallocated, so the check adds nothing); highest rise within a frame
+    for i in range(frames):
+        before = tracemalloc.get_traced_memory()[0]; tracemalloc.reset_peak()
+        frame()
+        current, peak = tracemalloc.get_traced_memory()
+        ends[i] = current; transient_peak = max(transient_peak, peak - before)
+    # Growth between the medians of the first and last tenth, so one short-lived array at a frame's end is not a "leak"
+    window = max(1, frames // 10)
+    retained = (statistics.median(ends[-window:]) - statistics.median(ends[:window])) / max(1, frames - window)
+    tracemalloc.stop()
+    gc.callbacks.remove(count_collections); gc.unfreeze()
+    return retained, transient_peak / 1024, collections
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FRAMES
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"{'scenario':<18} {'retained B/frame':>16} {'transient KB':>12} {'gc gen0/1/2':>12}")
+    for name, (layout, options, running) in SCENARIOS.items():
+        retained, transient_kb, collections = run(screen, layout, options, running, frames)
+        print(f"{name:<18} {retained:16.1f} {transient_kb:12.1f} {'/'.join(map(str, collections)):>12}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmark suite with JSON baselines and regression thresholds, headless under the SDL dummy driver.
+
+Every hot path gets a case: the per-step engine update over a full 720 deg cycle (conceptual and
+thermodynamic pressure), the reference Particle.move_and_draw and the batched ParticleSystem at
+several counts, draw_text plain and wrapped, the stateless draw_pv_diagram and the incremental
+PVPlot at several history lengths, and a whole frame (Engine.draw full redraw and the LayeredRenderer). Python's and NumPy's RNGs
+are seeded before every case, so runs draw the same particles and sparks.
+
+Each case is timed in `repeat` rounds of at least MIN_ROUND_SECONDS each (the call count per
+round is calibrated once per run). The fastest round's per-call time is the figure compared
+with the baseline, since it is the least disturbed by other load; the run fails (exit status 1)
+when any case is slower by more than --threshold percent. Baselines are machine-specific:
+record one per machine with --save.
+
+Run from the project root:
+    python -m benchmarks.suite --save              # record benchmarks/baseline.json
+    python -m benchmarks.suite                     # compare against it
+    python -m benchmarks.suite --threshold 10 -k particles
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+import pygame
+
+import engine_sim
+from engine_sim import (Engine, Particle, LayeredRenderer, PVPlot, draw_text, draw_pv_diagram, draw_particles,
+                        STROKE_DESCRIPTIONS, WIDTH, HEIGHT, LIGHT_GRAY, CYLINDER_CENTER_X, CYLINDER_WIDTH, CYLINDER_TOP_Y,
+                        MIN_PRESSURE, MAX_PRESSURE_POWER)
+from particles import ParticleSystem
+from pv_history import PVHistory
+from thermo_model import DEFAULT_THERMO
+
+SEED = 12345
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD_PERCENT = 25.0
+DEFAULT_REPEAT = 7
+MIN_ROUND_SECONDS = 0.05
+UI_STATE = {'mouse_pos': (0, 0), 'is_dragging_slider': False}
+LEGACY_PARTICLE_COUNTS = (150, 1000, 5000)
+SYSTEM_PARTICLE_COUNTS = (150, 5000, 50000)
+PV_HISTORY_LENGTHS = (150, 2000, 16384)
+CASES = {} # name -> (setup, number); setup(screen) returns the callable that is timed, number is the minimum calls per round
+
+
+def case(name, number):
+    def register(setup):
+        CASES[name] = (setup, number)
+        return setup
+    return register
+
+
+def seed_everything():
+    random.seed(SEED); np.random.seed(SEED)
+
+
+def running_engine(rpm=600):
+    engine = Engine(particle_seed=SEED); engine.set_rpm(rpm); engine.toggle_pause()
+    return engine
+
+
+def cycle_frames(num_frames=120, rpm=600):
+    """ (pygame.Rect bounds, engine_state dict) for consecutive frames covering a full cycle at 600 RPM. """
+    engine = running_engine(rpm); frames = []
+    for _ in range(num_frames):
+        engine.update(1.0 / engine_sim.FPS)
+        rect = pygame.Rect(CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y, CYLINDER_WIDTH, max(1, int(engine.piston_y - CYLINDER_TOP_Y)))
+        frames.append((rect, {'stroke': engine.stroke, 'combustion_timer': engine.combustion_timer}))
+    return frames
+
+
+def cycling(frames, step):
+    """ Callable that applies step(frame) to the next frame of the list on every call. """
+    index = 0
+    def run():
+        nonlocal index
+        step(frames[index]); index = (index + 1) % len(frames)
+    return run
+
+
+# --- Cases ---
+@case("update/full_cycle", number=5)
+def update_full_cycle(screen):
+    engine = running_engine(600)
+    dt = engine.sim_clock.step_seconds
+    steps = int(round(720 / (engine.rpm * 6 * dt))) # 6 deg per step at 600 RPM -> 120 steps per cycle
+    def run():
+        for _ in range(steps): engine.perform_update_calculations(dt)
+    return run
+
+@case("update/full_cycle_thermo", number=5)
+def update_full_cycle_thermo(screen):
+    engine = Engine(particle_seed=SEED, thermo=DEFAULT_THERMO); engine.set_rpm(600); engine.toggle_pause() # Solves the cycle once, outside the timing
+    dt = engine.sim_clock.step_seconds
+    steps = int(round(720 / (engine.rpm * 6 * dt)))
+    def run():
+        for _ in range(steps): engine.perform_update_calculations(dt)
+    return run
+
+for count in LEGACY_PARTICLE_COUNTS:
+    @case(f"particles/legacy_{count}", number=max(2, 3000 // count))
+    def legacy_particles(screen, count=count):
+        frames = cycle_frames()
+        particles = [Particle(frames[0][0]) for _ in range(count)]
+        def step(frame):
+            for particle in particles: particle.move_and_draw(screen, *frame)
+        return cycling(frames, step)
+
+for count in SYSTEM_PARTICLE_COUNTS:
+    @case(f"particles/system_{count}", number=max(2, 20000 // count))
+    def system_particles(screen, count=count):
+        frames = cycle_frames()
+        system = ParticleSystem(count, (frames[0][0].left, frames[0][0].top, frames[0][0].right, frames[0][0].bottom), seed=SEED)
+        def step(frame):
+            rect, state = frame
+            system.step((rect.left, rect.top, rect.right, rect.bottom), state['stroke'], state['combustion_timer'])
+            draw_particles(screen, system, rect)
+        return cycling(frames, step)
+
+@case("text/plain", number=2000)
+def text_plain(screen):
+    labels = [f"Cycle Angle: {angle / 2:.1f}°" for angle in range(240)] # Mix of cached and changing readouts
+    return cycling(labels, lambda label: draw_text(screen, label, 20, 700, 200, align="topleft"))
+
+@case("text/wrapped", number=1000)
+def text_wrapped(screen):
+    descriptions = list(STROKE_DESCRIPTIONS.values())
+    return cycling(descriptions, lambda text: draw_text(screen, text, 18, 650, 220, align="topleft", wrap_width=310))
+
+def pv_history(length):
+    engine = running_engine(600)
+    history = PVHistory(length)
+    for volume, pressure in zip(*engine.cycle_table.lookup(np.arange(length) * 6.0)[5:7]):
+        history.append(volume, pressure)
+    return engine, history
+
+for length in PV_HISTORY_LENGTHS:
+    @case(f"pv/stateless_{length}", number=max(2, 20000 // length))
+    def pv_stateless(screen, length=length):
+        engine, history = pv_history(length)
+        rect = engine_sim.panel_layout()['pv']
+        return lambda: draw_pv_diagram(screen, rect, history, engine.cylinder_volume, engine.pressure,
+                                       engine.min_volume, engine.max_volume, MIN_PRESSURE * 0.8, MAX_PRESSURE_POWER * 1.1)
+
+    @case(f"pv/incremental_{length}", number=200)
+    def pv_incremental(screen, length=length):
+        engine, history = pv_history(length)
+        rect = engine_sim.panel_layout()['pv']
+        plot = PVPlot(rect.size, engine.min_volume, engine.max_volume, MIN_PRESSURE * 0.8, MAX_PRESSURE_POWER * 1.1)
+        plot.update(history)
+        def run():
+            engine.perform_update_calculations(engine.sim_clock.step_seconds * 10) # About one frame of samples
+            history.append(engine.cylinder_volume, engine.pressure)
+            plot.update(history)
+            plot.draw(screen, rect.topleft, engine.cylinder_volume, engine.pressure)
+        return run
+
+@case("frame/engine_draw", number=50)
+def frame_engine_draw(screen):
+    engine = running_engine(300)
+    def run():
+        engine.update(1.0 / engine_sim.FPS)
+        screen.fill(LIGHT_GRAY)
+        engine.draw(screen, UI_STATE)
+    return run
+
+@case("frame/layered", number=100)
+def frame_layered(screen):
+    engine = running_engine(300); renderer = LayeredRenderer()
+    renderer.render(screen, engine, UI_STATE) # Builds the static layer
+    def run():
+        engine.update(1.0 / engine_sim.FPS)
+        renderer.render(screen, engine, UI_STATE)
+    return run
+
+
+# --- Runner ---
+def measure(run, number, repeat):
+    """ (minimum, median) seconds per call over repeat rounds. The warm-up doubles number until a round lasts MIN_ROUND_SECONDS. """
+    while True:
+        start = time.perf_counter()
+        for _ in range(number): run()
+        if time.perf_counter() - start >= MIN_ROUND_SECONDS: break
+        number *= 2
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number): run()
+        rounds.append((time.perf_counter() - start) / number)
+    return min(rounds), statistics.median(rounds), number
+
+
+def run_suite(names, repeat):
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    results = {}
+    for name in names:
+        setup, number = CASES[name]
+        seed_everything()
+        screen.fill(LIGHT_GRAY)
+        best, median, number = measure(setup(screen), number, repeat)
+        results[name] = {'min_ms': best * 1000, 'median_ms': median * 1000, 'number': number, 'repeat': repeat}
+        print(f"  {name:<26} {best * 1000:9.4f} ms", file=sys.stderr)
+    return results
+
+
+def machine_info():
+    return {'python': platform.python_version(), 'pygame': pygame.version.ver, 'numpy': np.__version__,
+            'platform': platform.platform(), 'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, threshold_percent):
+    """ Prints a comparison table and returns the names of the cases slower than the threshold allows. """
+    regressions = []
+    print(f"{'case':<26} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<26} {'-':>12} {result['min_ms']:11.4f} {'new':>8}")
+            continue
+        change = result['min_ms'] / reference['min_ms'] - 1
+        regressed = change * 100 > threshold_percent
+        if regressed: regressions.append(name)
+        print(f"{name:<26} {reference['min_ms']:12.4f} {result['min_ms']:11.4f} {change:+8.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare it with a JSON baseline.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file (default benchmarks/baseline.json)")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PERCENT,
+                        help=f"allowed slowdown in percent before a case fails (default {DEFAULT_THRESHOLD_PERCENT:g})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed rounds per case")
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if args.filter in name]
+    if args.list:
+        print("\n".join(names)); return 0
+    pygame.init()
+    try:
+        results = run_suite(names, args.repeat)
+    finally:
+        pygame.quit()
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump({'machine': machine_info(), 'seed': SEED, 'results': results}, file, indent=1)
+        print(f"saved {len(results)} cases to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --save", file=sys.stderr)
+        return 2
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get('machine') != machine_info():
+        print(f"note: baseline was recorded on {baseline.get('machine')}", file=sys.stderr)
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    print(f"all {len(results)} cases within {args.threshold:g}% of the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Side-by-side comparison of engine configurations in one window.
+
+    python compare.py "" "rpm=600" "power_exponent=1.2,max_pressure_power=70" "crank_radius=60,conrod_length=200"
+    python compare.py --shared-rpm "compression_exponent=1.3" "compression_exponent=1.4"
+
+Every argument is one engine: comma-separated key=value pairs of engine_model.EngineParams
+fields (except the cylinder's on-screen position) plus "rpm" for its starting RPM; "" is the
+default engine. The window is a grid of tiles, each one the usual engine view shrunk by an
+integer factor, captioned with its configuration.
+
+One clock and one event loop step every engine in lockstep: Play/Pause, Reset and Step in any
+tile act on all engines (Reset restores each engine's configured RPM). The RPM slider moves
+its own tile's engine, or all of them with --shared-rpm.
+
+Each engine draws straight into its tile of the window at tile scale (engine_sim.ScaledDrawing:
+positions, line widths, radii and font sizes divided by the factor) through a LayeredRenderer,
+so a frame only redraws what moved and nothing is drawn at full size or scaled afterwards.
+Engines of the same geometry share one scaled static background; all of them share the text
+cache (fonts and labels rendered at the tile's font sizes), the cycle and thermo tables per
+parameter set, the event loop and one display update per frame (python -m benchmarks.bench_compare).
+"""
+import argparse
+import math
+import sys
+
+import pygame
+
+from engine_model import DEFAULT_PARAMS, EngineParams
+from engine_sim import (Engine, LayeredRenderer, ScaledDrawing, FULL_SIZE, TEXT_CACHE, panel_layout, invalidate_panel_layout,
+                        slider_knob_rect, slider_rpm, WIDTH, HEIGHT, FPS, MIN_RPM, MAX_RPM, HUD_FONT_SIZE,
+                        BLACK, DARK_GRAY, LIGHT_GRAY)
+from profiler import FrameProfiler
+from quality import QualityGovernor, FULL_QUALITY, QUALITY_LEVELS, QUALITY_NAMES
+from thermo_model import DEFAULT_THERMO, solve_ahead
+
+MAX_ENGINES = 9 # 3 x 3 tiles at a third of the size
+TILE_GAP = 2 # Pixels between tiles
+CAPTION_PADDING = 3
+SPEC_FIELDS = tuple(name for name in EngineParams._fields if name not in ("cylinder_center_x", "cylinder_top_y"))
+
+
+def parse_spec(text):
+    """ (EngineParams, starting RPM or None) for a "key=value,..." comparison argument; ValueError when malformed. """
+    values = {}; rpm = None
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        key, separator, value = item.partition("=")
+        key = key.strip()
+        if not separator: raise ValueError(f"{item!r} is not key=value")
+        if key == "rpm":
+            rpm = max(MIN_RPM, min(MAX_RPM, float(value)))
+        elif key in SPEC_FIELDS:
+            values[key] = float(value)
+        else:
+            raise ValueError(f"unknown key {key!r} (rpm or one of {', '.join(SPEC_FIELDS)})")
+    return DEFAULT_PARAMS._replace(**values), rpm
+
+
+class TileRenderer(LayeredRenderer):
+    """ LayeredRenderer whose static background is shared by all engines of one geometry and tile size (backgrounds: key -> Surface). """
+    def __init__(self, backgrounds):
+        super().__init__()
+        self.backgrounds = backgrounds
+        self.shared = False # self.background is the shared surface, not a private copy
+
+    def build_static_layers(self, screen, engine):
+        key = (engine.tdc_y, engine.bdc_y, engine.params.piston_height, screen.get_size())
+        background = self.backgrounds.get(key)
+        if background is None:
+            super().build_static_layers(screen, engine)
+            self.backgrounds[key] = self.background
+        else:
+            self.background = background
+            self.static_layer = None; self.annotation_rects = []; self.annotation_age = None
+        self.shared = True
+
+    def refresh_annotations(self, engine):
+        if self.shared and engine.quality.annotation_interval > 1:
+            self.background = self.background.copy(); self.shared = False # Annotations get baked into it: take a private copy
+        return super().refresh_annotations(engine)
+
+
+class ComparisonView:
+    """ Tiles of several engines in one window (see module docstring). """
+    def __init__(self, engines, captions):
+        count = len(engines)
+        self.engines = engines; self.captions = captions
+        self.columns = math.ceil(math.sqrt(count)); self.rows = math.ceil(count / self.columns)
+        self.factor = max(self.columns, self.rows) # Layout pixels per tile pixel
+        tile_width, tile_height = WIDTH // self.factor, HEIGHT // self.factor
+        drawing = FULL_SIZE if self.factor == 1 else ScaledDrawing(1.0 / self.factor)
+        for engine in engines: engine.drawing = drawing
+        self.size = (self.columns * tile_width + (self.columns - 1) * TILE_GAP, self.rows * tile_height + (self.rows - 1) * TILE_GAP)
+        self.tiles = [pygame.Rect((i % self.columns) * (tile_width + TILE_GAP), (i // self.columns) * (tile_height + TILE_GAP), tile_width, tile_height)
+                      for i in range(count)]
+        self.backgrounds = {}
+        self.renderers = [TileRenderer(self.backgrounds) for _ in engines]
+        self.ui_states = [{'mouse_pos': (-1, -1), 'is_dragging_slider': False} for _ in engines]
+        self.full_update = True
+
+    def invalidate(self):
+        self.backgrounds.clear()
+        for renderer in self.renderers: renderer.invalidate()
+        self.full_update = True
+
+    def to_layout(self, index, pos):
+        """ Full-size layout coordinates (panel_layout) of window position pos in tile index (also outside the tile, e.g. while dragging). """
+        tile = self.tiles[index]
+        return ((pos[0] - tile.left) * self.factor, (pos[1] - tile.top) * self.factor)
+
+    def locate(self, pos):
+        """ (tile index, layout position) under window position pos, or (None, None) between or beside the tiles. """
+        for index, tile in enumerate(self.tiles):
+            if tile.collidepoint(pos): return index, self.to_layout(index, pos)
+        return None, None
+
+    def render(self, screen, mouse_pos, dragging, quality_label):
+        """ Renders every engine into its tile of screen. Returns the window rects to update. """
+        updates = []
+        if self.full_update:
+            screen.fill(DARK_GRAY); updates.append(screen.get_rect())
+        hovered, layout_mouse = self.locate(mouse_pos)
+        for index, engine in enumerate(self.engines):
+            tile = self.tiles[index]
+            ui_state = self.ui_states[index]
+            ui_state['mouse_pos'] = layout_mouse if hovered == index else (-1, -1)
+            ui_state['is_dragging_slider'] = dragging; ui_state['quality'] = quality_label
+            for rect in self.renderers[index].render(screen.subsurface(tile), engine, ui_state):
+                updates.append(rect.move(tile.topleft))
+            updates.append(self.draw_caption(screen, index))
+        self.full_update = False
+        return updates
+
+    def draw_caption(self, screen, index):
+        """ Configuration label over the tile's top-left corner (redrawn every frame: the engine's dirty areas may cover it). """
+        text = TEXT_CACHE.render(self.captions[index], HUD_FONT_SIZE, BLACK)
+        box = text.get_rect().inflate(2 * CAPTION_PADDING, 2 * CAPTION_PADDING)
+        box.topleft = self.tiles[index].topleft
+        pygame.draw.rect(screen, LIGHT_GRAY, box); pygame.draw.rect(screen, DARK_GRAY, box, 1)
+        screen.blit(text, (box.left + CAPTION_PADDING, box.top + CAPTION_PADDING))
+        return box
+
+
+def create_engines(specs, thermo=None, particle_seed=None):
+    """ (engines, starting RPMs, captions) for parsed specs [(text, params, rpm)]. """
+    engines = []; rpms = []; captions = []
+    for number, (text, params, rpm) in enumerate(specs, 1):
+        engine = Engine(particle_seed=particle_seed, thermo=thermo, params=params)
+        if rpm is not None: engine.set_rpm(rpm)
+        engines.append(engine); rpms.append(rpm)
+        captions.append(f"{number}: {text.strip() or 'default'}")
+    return engines, rpms, captions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare engine configurations side by side in one window")
+    parser.add_argument("engines", nargs="+", metavar="SPEC",
+                        help=f'one engine per argument: "key=value,..." with rpm and EngineParams fields ({", ".join(SPEC_FIELDS)}); "" = default')
+    parser.add_argument("--shared-rpm", action="store_true", help="the RPM slider of any tile sets the RPM of every engine")
+    parser.add_argument("--thermo", action="store_true", help="pressure from the crank-angle-resolved thermodynamic model")
+    parser.add_argument("--quality", choices=["auto"] + QUALITY_NAMES, default="auto",
+                        help="render quality; auto (default) lowers and raises it to hold the frame budget")
+    parser.add_argument("--frame-budget", type=float, default=1000.0 / FPS, metavar="MS",
+                        help=f"frame work time the auto quality holds (default {1000.0 / FPS:.1f} ms)")
+    args = parser.parse_args()
+    if len(args.engines) > MAX_ENGINES:
+        parser.error(f"at most {MAX_ENGINES} engines")
+    specs = []
+    for text in args.engines:
+        try:
+            specs.append((text,) + parse_spec(text))
+        except ValueError as error:
+            parser.error(f"{text!r}: {error}")
+
+    pygame.init()
+    engines, rpms, captions = create_engines(specs, DEFAULT_THERMO if args.thermo else None)
+    if args.thermo:
+        for engine in engines: solve_ahead(engine.cycle_table.params, DEFAULT_THERMO, MAX_RPM, engine.rpm)
+    view = ComparisonView(engines, captions)
+    screen = pygame.display.set_mode(view.size)
+    pygame.display.set_caption(f"4-Stroke Engine Simulation - Comparison of {len(engines)} engines")
+    clock = pygame.time.Clock()
+
+    auto_quality = args.quality == "auto"
+    governor = QualityGovernor(args.frame_budget, len(QUALITY_LEVELS) - 1 if auto_quality else QUALITY_NAMES.index(args.quality), enabled=auto_quality)
+    if governor.level is not FULL_QUALITY:
+        for engine in engines: engine.set_quality(governor.level)
+
+    def control(method_name, *method_args):
+        """ Play/pause, reset and step act on every engine, so they stay in lockstep. """
+        for engine, rpm in zip(engines, rpms):
+            getattr(engine, method_name)(*method_args)
+            if method_name == "reset" and rpm is not None: engine.set_rpm(rpm)
+
+    dragging = None # Index of the tile whose RPM slider is being dragged
+    frame_timer = FrameProfiler() # Disabled: only measures each frame's work time for the governor
+    idle = False
+    running = True
+    while running:
+        if idle:
+            events = [pygame.event.wait()] + pygame.event.get() # Paused: sleep in the event queue
+            clock.tick(); frame_timer.restart_frame(); dt = 0.0
+        else:
+            dt = frame_timer.tick(clock, FPS) / 1000.0
+            events = pygame.event.get()
+            quality = None if frame_timer.work_ms is None else governor.observe(frame_timer.work_ms)
+            if quality is not None:
+                for engine in engines: engine.set_quality(quality)
+        layout = panel_layout()
+        for event in events:
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED, pygame.WINDOWEXPOSED):
+                invalidate_panel_layout(); layout = panel_layout()
+                view.invalidate()
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                index, pos = view.locate(event.pos)
+                if index is None: continue
+                if layout['play_pause'].collidepoint(pos): control("toggle_pause")
+                elif layout['reset'].collidepoint(pos): control("reset"); dragging = None
+                elif layout['step'].collidepoint(pos) and engines[index].paused: control("step")
+                elif slider_knob_rect(layout['slider'], engines[index].rpm).collidepoint(pos): dragging = index
+            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                dragging = None
+            if event.type == pygame.MOUSEMOTION and dragging is not None:
+                rpm = slider_rpm(layout['slider'], view.to_layout(dragging, event.pos)[0])
+                for engine in (engines if args.shared_rpm else [engines[dragging]]): engine.set_rpm(rpm)
+
+        for engine in engines: engine.update(dt)
+        pygame.display.update(view.render(screen, pygame.mouse.get_pos(), dragging is not None, governor.label()))
+        idle = all(engine.paused for engine in engines) and dragging is None
+
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == '__main__':
+    main()
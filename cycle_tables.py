@@ -0,0 +1,161 @@
+"""
+Precomputed crank-angle lookup tables (no pygame).
+
+Kinematics, volume and pressure are pure functions of the cycle angle and an
+EngineParams set, so they are tabulated once per parameter set and interpolated
+afterwards instead of re-evaluating sin/cos/sqrt/** on every step.
+
+Kinematics and volume repeat every 360 degrees and are continuous, so they share one
+0-360 table. Pressure jumps at the stroke boundaries, so each stroke gets its own
+0-180 table whose end points are the one-sided limits of that stroke's curve; no
+interpolation cell ever straddles a jump. Every table has one extra sample on each
+side so cubic (Catmull-Rom) interpolation needs no special cases at the ends.
+
+get_cycle_table keeps the computed arrays in the on-disk cache (disk_cache), so later runs
+map them from a file instead of evaluating the model again.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from disk_cache import cached_arrays, content_key, source_digest
+from engine_model import (DEFAULT_PARAMS, CycleState, piston_kinematics, cylinder_volume,
+                          cylinder_pressure, cycle_flags)
+
+TABLE_SAMPLES_PER_DEGREE = 4
+INTERPOLATIONS = ("linear", "cubic")
+MAX_CACHED_TABLES = 8 # Parameter sets kept by get_cycle_table before the least recently used is evicted
+
+
+def _interpolate(table, index, t, interpolation):
+    """ Interpolates padded table(s) (last axis = samples) at cell index + fraction t (scalars or arrays). """
+    if interpolation == "linear":
+        v1 = table[..., index + 1]; v2 = table[..., index + 2]
+        return v1 + (v2 - v1) * t
+    v0 = table[..., index]; v1 = table[..., index + 1]; v2 = table[..., index + 2]; v3 = table[..., index + 3]
+    return v1 + 0.5 * t * (v2 - v0 + t * (2.0 * v0 - 5.0 * v1 + 4.0 * v2 - v3 + t * (3.0 * (v1 - v2) + v3 - v0)))
+
+
+def _interpolate_scalar(values, index, t, interpolation):
+    """ Pure-Python version of _interpolate for one padded list (the per-step engine path). """
+    if interpolation == "linear":
+        v1 = values[index + 1]
+        return v1 + (values[index + 2] - v1) * t
+    v0, v1, v2, v3 = values[index:index + 4]
+    return v1 + 0.5 * t * (v2 - v0 + t * (2.0 * v0 - 5.0 * v1 + 4.0 * v2 - v3 + t * (3.0 * (v1 - v2) + v3 - v0)))
+
+
+def cycle_table_arrays(params=DEFAULT_PARAMS, samples_per_degree=TABLE_SAMPLES_PER_DEGREE):
+    """ {'kinematics', 'pressure'}: the padded tables a CycleTable interpolates. """
+    step = 1.0 / samples_per_degree
+
+    # Kinematics/volume: 0-360 plus one pad sample each side -> shape (5, 360 * spd + 3)
+    crank_cells = int(round(360 * samples_per_degree))
+    crank_angles = np.arange(-1, crank_cells + 2) * step
+    crank_pin_x, crank_pin_y, piston_pin_y, piston_y = piston_kinematics(crank_angles, params)
+    kinematics = np.stack([crank_pin_x, crank_pin_y, piston_pin_y, piston_y, cylinder_volume(piston_y, params)])
+
+    # Pressure: one 0-180 table per stroke, each evaluated with that stroke's curve only -> shape (4, 180 * spd + 3)
+    stroke_cells = int(round(180 * samples_per_degree))
+    local_angles = np.arange(-1, stroke_cells + 2) * step
+    pressure = np.stack([
+        cylinder_pressure(np.full(local_angles.shape, stroke), cylinder_volume(
+            piston_kinematics(local_angles + 180 * stroke, params)[3], params), params)
+        for stroke in range(4)
+    ])
+    return {'kinematics': kinematics, 'pressure': pressure}
+
+
+class CycleTable:
+    def __init__(self, params=DEFAULT_PARAMS, samples_per_degree=TABLE_SAMPLES_PER_DEGREE, interpolation="linear", arrays=None):
+        """ arrays: precomputed cycle_table_arrays(params, samples_per_degree), e.g. from the disk cache. """
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"interpolation must be one of {INTERPOLATIONS}, not {interpolation!r}")
+        self.params = params
+        self.samples_per_degree = samples_per_degree
+        self.interpolation = interpolation
+        if arrays is None:
+            arrays = cycle_table_arrays(params, samples_per_degree)
+        self.kinematics = arrays['kinematics']; self.pressure = arrays['pressure']
+        self.crank_cells = self.kinematics.shape[1] - 3; self.stroke_cells = self.pressure.shape[1] - 3
+        self.pressure_flat = self.pressure.ravel() # Rows back to back, so one index array can address every stroke
+        self.pressure_row_length = self.pressure.shape[1]
+
+        # Plain lists for the scalar path (indexing Python lists is much cheaper than NumPy scalars)
+        self.kinematics_lists = self.kinematics.tolist()
+        self.kinematics_rows = [tuple(row) for row in self.kinematics.T.tolist()] # One tuple of all five values per sample
+        self.pressure_lists = self.pressure.tolist()
+
+    def lookup(self, crank_angles):
+        """ Interpolated CycleState for an array of cycle angles (same fields as engine_model.sweep). """
+        crank_angle = np.mod(np.asarray(crank_angles, dtype=np.float64), 720.0)
+        stroke = np.minimum(crank_angle // 180, 3).astype(np.intp)
+        local_angle = crank_angle - 180.0 * stroke
+        u = local_angle * self.samples_per_degree
+        index = np.minimum(u.astype(np.intp), self.stroke_cells - 1)
+        pressure = _interpolate(self.pressure_flat, stroke * self.pressure_row_length + index, u - index, self.interpolation)
+
+        u += (stroke & 1) * (180.0 * self.samples_per_degree) # Angle within the 360 deg kinematics table
+        index = np.minimum(u.astype(np.intp), self.crank_cells - 1)
+        crank_pin_x, crank_pin_y, piston_pin_y, piston_y, volume = _interpolate(self.kinematics, index, u - index, self.interpolation)
+        stroke = stroke.astype(np.int8)
+
+        intake_valve_open, exhaust_valve_open, spark_window = cycle_flags(crank_angle, stroke)
+        return CycleState(
+            crank_angle=crank_angle,
+            crank_pin_x=crank_pin_x, crank_pin_y=crank_pin_y,
+            piston_pin_y=piston_pin_y, piston_y=piston_y,
+            volume=volume, pressure=pressure, stroke=stroke,
+            intake_valve_open=intake_valve_open, exhaust_valve_open=exhaust_valve_open, spark_window=spark_window,
+        )
+
+    def at(self, crank_angle):
+        """
+        Scalar lookup for the per-step engine update.
+        Returns (crank_pin_x, crank_pin_y, piston_pin_y, piston_y, volume, pressure).
+        """
+        crank_angle %= 720.0
+        stroke = int(crank_angle // 180)
+        if stroke > 3: stroke = 3
+        local_angle = crank_angle - 180.0 * stroke
+        u = (local_angle + (180.0 if stroke & 1 else 0.0)) * self.samples_per_degree # Angle within the 360 deg kinematics table
+        index = int(u)
+        if index >= self.crank_cells: index = self.crank_cells - 1
+        t = u - index
+        u = local_angle * self.samples_per_degree
+        pressure_index = int(u)
+        if pressure_index >= self.stroke_cells: pressure_index = self.stroke_cells - 1
+        pressure_t = u - pressure_index
+        if self.interpolation == "linear":
+            rows = self.kinematics_rows; a = rows[index + 1]; b = rows[index + 2]
+            pressures = self.pressure_lists[stroke]; p1 = pressures[pressure_index + 1]
+            return (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t, a[2] + (b[2] - a[2]) * t,
+                    a[3] + (b[3] - a[3]) * t, a[4] + (b[4] - a[4]) * t, p1 + (pressures[pressure_index + 2] - p1) * pressure_t)
+        values = [_interpolate_scalar(table, index, t, "cubic") for table in self.kinematics_lists]
+        values.append(_interpolate_scalar(self.pressure_lists[stroke], pressure_index, pressure_t, "cubic"))
+        return tuple(values)
+
+
+# --- Memoized tables ---
+_TABLE_CACHE = OrderedDict()
+
+def get_cycle_table(params=DEFAULT_PARAMS, samples_per_degree=TABLE_SAMPLES_PER_DEGREE, interpolation="linear"):
+    """
+    Shared CycleTable for a parameter set, built on first use (arrays from the disk cache when
+    present). Only the MAX_CACHED_TABLES most recently used sets are kept in memory, so changing
+    parameters evicts tables that are no longer in use.
+    """
+    key = (params, samples_per_degree, interpolation)
+    table = _TABLE_CACHE.get(key)
+    if table is None:
+        disk_key = content_key("cycle-table", params, samples_per_degree, source_digest("engine_model", "cycle_tables"))
+        arrays = cached_arrays("cycle-table", disk_key, lambda: cycle_table_arrays(params, samples_per_degree))
+        table = _TABLE_CACHE[key] = CycleTable(params, samples_per_degree, interpolation, arrays)
+        if len(_TABLE_CACHE) > MAX_CACHED_TABLES:
+            _TABLE_CACHE.popitem(last=False)
+    else:
+        _TABLE_CACHE.move_to_end(key)
+    return table
+
+def clear_cycle_tables():
+    _TABLE_CACHE.clear()
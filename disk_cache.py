@@ -0,0 +1,182 @@
+"""
+Content-addressed on-disk cache of precomputed arrays (no pygame).
+
+Expensive per-geometry data (cycle tables, solved thermodynamic cycles) is stored once per
+content key: a hash of everything the data depends on, i.e. the parameter namedtuples, the
+numeric constants passed in, and the source text of the modules that compute it. Changing
+a constant or the model code therefore selects a new entry instead of reading a stale one.
+Old entries are never read again, so store() prunes the directory to MAX_CACHE_BYTES, dropping
+the least recently used entries first (load() touches the mtime of every entry it reads).
+
+Entry file layout (one flat binary file per entry, "<kind>-<key>.bin"):
+    MAGIC (8 bytes) | header length (uint32 LE) | JSON header, padded to ALIGN | arrays
+The header lists every array's name, dtype, shape and offset from the (aligned) end of the
+header; each array starts at a multiple of ALIGN. load() memory-maps the file once and returns
+read-only views into it, so a warm start only touches the pages that are actually read.
+
+Entries are written to a temporary file and renamed into place, so a crash or a concurrent
+writer never leaves a half-written entry under a valid name. Any unreadable entry counts as
+a miss. The directory comes from $ENGINE_SIM_CACHE (set it to "off" to disable the cache),
+else $XDG_CACHE_HOME/engine-sim or ~/.cache/engine-sim.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+MAGIC = b"ENGCACHE"
+FORMAT_VERSION = 1
+ALIGN = 64 # Header and every array start at a multiple of this offset
+CACHE_ENV = "ENGINE_SIM_CACHE"
+MAX_CACHE_BYTES = 64 * 1024 * 1024 # Directory size kept by store() (~800 entries of ~80 KB)
+DISABLED = ("off", "0", "none")
+
+
+def aligned(size):
+    return -(-size // ALIGN) * ALIGN
+
+
+def default_directory():
+    """ Cache directory from the environment, or None when caching is disabled. """
+    directory = os.environ.get(CACHE_ENV)
+    if directory is not None:
+        return None if directory.strip().lower() in DISABLED or not directory.strip() else directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "engine-sim")
+
+
+_SOURCE_DIGESTS = {}
+
+def source_digest(*module_names):
+    """ Hash of the source files of already imported modules (computed once per process). """
+    digest = hashlib.sha256()
+    for name in module_names:
+        if name not in _SOURCE_DIGESTS:
+            path = getattr(sys.modules.get(name), "__file__", None)
+            try:
+                with open(path, "rb") as file: _SOURCE_DIGESTS[name] = hashlib.sha256(file.read()).hexdigest()
+            except (OSError, TypeError):
+                _SOURCE_DIGESTS[name] = name # No source to hash (frozen build): the constants alone key the entry
+        digest.update(_SOURCE_DIGESTS[name].encode())
+    return digest.hexdigest()
+
+
+def content_key(*parts):
+    """ Hex key for parts (namedtuples, numbers, strings; repr() is exact for floats). """
+    return hashlib.sha256(repr((FORMAT_VERSION,) + parts).encode()).hexdigest()[:32]
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0; self.misses = 0
+
+    def path(self, kind, key):
+        return os.path.join(self.directory, f"{kind}-{key}.bin")
+
+    def load(self, kind, key):
+        """ {name: read-only array} of an entry, or None if it is missing or unreadable. """
+        path = self.path(kind, key)
+        try:
+            with open(path, "rb") as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    return None
+                header_length, = struct.unpack("<I", file.read(4))
+                header = json.loads(file.read(header_length))
+            start = aligned(len(MAGIC) + 4 + header_length)
+            if header['version'] != FORMAT_VERSION or header['key'] != key:
+                return None
+            raw = np.memmap(path, np.uint8, "r").view(np.ndarray) # Plain read-only arrays; the map lives as long as any view
+            arrays = {}
+            for entry in header['arrays']:
+                dtype = np.dtype(entry['dtype']); shape = tuple(entry['shape'])
+                begin = start + entry['offset']; end = begin + dtype.itemsize * int(np.prod(shape))
+                if end > len(raw):
+                    return None # Truncated
+                arrays[entry['name']] = raw[begin:end].view(dtype).reshape(shape)
+            try:
+                os.utime(path) # Recently used: pruned last
+            except OSError:
+                pass # Read-only cache directory
+            return arrays
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    def store(self, kind, key, arrays):
+        """ Writes an entry atomically. Returns False (and caches nothing) if the directory is not writable. """
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        entries = []; offset = 0
+        for name, array in arrays.items():
+            entries.append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+            offset += aligned(array.nbytes)
+        header = json.dumps({'version': FORMAT_VERSION, 'kind': kind, 'key': key, 'arrays': entries}).encode()
+        start = aligned(len(MAGIC) + 4 + len(header))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(prefix=f".{kind}-", dir=self.directory)
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(MAGIC + struct.pack("<I", len(header)) + header)
+                    for entry, array in zip(entries, arrays.values()):
+                        file.write(b"\0" * (start + entry['offset'] - file.tell()))
+                        file.write(array.tobytes()) # C order whatever the layout in memory
+                os.chmod(temporary, 0o644) # mkstemp creates it private
+                os.replace(temporary, self.path(kind, key))
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except OSError:
+            return False
+        self.prune(keep=self.path(kind, key))
+        return True
+
+    def prune(self, keep=None):
+        """ Deletes the least recently used entries (oldest mtime) until the directory holds at most max_bytes. """
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for item in scan:
+                    if item.name.endswith(".bin") and not item.name.startswith(".") and item.path != keep:
+                        stat = item.stat(); entries.append((stat.st_mtime, stat.st_size, item.path))
+            total = sum(size for _, size, _ in entries) + (os.path.getsize(keep) if keep else 0)
+        except OSError:
+            return
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path); total -= size
+            except OSError:
+                pass # Already removed by another process
+
+    def cached(self, kind, key, build):
+        """ The arrays of an entry, built with build() (-> {name: array}) and stored on a miss. """
+        arrays = self.load(kind, key)
+        if arrays is not None:
+            self.hits += 1
+            return arrays
+        self.misses += 1
+        arrays = build()
+        self.store(kind, key, arrays)
+        return arrays
+
+
+_DISK_CACHE = None
+
+def disk_cache():
+    """ Shared DiskCache for default_directory(), or None when caching is disabled (checked once). """
+    global _DISK_CACHE
+    if _DISK_CACHE is None:
+        directory = default_directory()
+        _DISK_CACHE = DiskCache(directory) if directory else False
+    return _DISK_CACHE or None
+
+def cached_arrays(kind, key, build):
+    """ disk_cache().cached(...), or just build() without a cache. """
+    cache = disk_cache()
+    return build() if cache is None else cache.cached(kind, key, build)
@@ -0,0 +1,263 @@
+"""
+Pure engine model (no pygame): slider-crank kinematics, conceptual volume/pressure
+and the 4-stroke stroke/valve logic, evaluated for whole arrays of cycle angles.
+
+Uses the same math as Engine.perform_update_calculations, so a headless sweep
+reproduces what the GUI shows for the same angles.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# --- Engine Geometry ---
+CYLINDER_CENTER_X = 300; CYLINDER_TOP_Y = 100; CYLINDER_WIDTH = 100; PISTON_HEIGHT = 40
+CRANK_RADIUS = 75; CONROD_LENGTH = 180
+CRANKSHAFT_CENTER_Y = CYLINDER_TOP_Y + PISTON_HEIGHT / 2 + CONROD_LENGTH + CRANK_RADIUS
+CRANKSHAFT_CENTER_X = CYLINDER_CENTER_X
+STROKE_LENGTH = 2 * CRANK_RADIUS
+
+# --- Conceptual Units for PV ---
+CLEARANCE_VOLUME = 15.0 # Arbitrary minimum volume units at TDC
+SWEPT_VOLUME_SCALE = 0.5 # Make swept volume proportional to pixel stroke
+MIN_PRESSURE = 0.8 # Conceptual pressure units (e.g., atm) - Intake/Exhaust
+MAX_PRESSURE_COMPRESSION = 15.0 # Peak pressure during compression
+MAX_PRESSURE_POWER = 50.0 # Peak pressure during power stroke
+COMPRESSION_EXPONENT = 1.4 # Adiabatic index (gamma) approximation for compression/expansion
+POWER_EXPONENT = 1.3 # Approximation for expansion after combustion
+
+# --- Parameter Sets ---
+# Everything the cycle model depends on. Engine geometry is in pixels, PV values in conceptual units.
+EngineParams = namedtuple("EngineParams", [
+    "cylinder_center_x", "cylinder_top_y", "piston_height", "crank_radius", "conrod_length",
+    "clearance_volume", "swept_volume_scale", "min_pressure", "max_pressure_compression", "max_pressure_power",
+    "compression_exponent", "power_exponent",
+])
+DEFAULT_PARAMS = EngineParams(
+    cylinder_center_x=CYLINDER_CENTER_X, cylinder_top_y=CYLINDER_TOP_Y, piston_height=PISTON_HEIGHT,
+    crank_radius=CRANK_RADIUS, conrod_length=CONROD_LENGTH,
+    clearance_volume=CLEARANCE_VOLUME, swept_volume_scale=SWEPT_VOLUME_SCALE, min_pressure=MIN_PRESSURE,
+    max_pressure_compression=MAX_PRESSURE_COMPRESSION, max_pressure_power=MAX_PRESSURE_POWER,
+    compression_exponent=COMPRESSION_EXPONENT, power_exponent=POWER_EXPONENT,
+)
+
+Geometry = namedtuple("Geometry", [
+    "crankshaft_center_x", "crankshaft_center_y", "tdc_y", "bdc_y", "stroke_pixels", "swept_volume", "min_volume", "max_volume",
+])
+
+
+def engine_geometry(params=DEFAULT_PARAMS):
+    """ Derived positions and volumes for a parameter set (same values Engine.reset computes). """
+    crankshaft_center_y = params.cylinder_top_y + params.piston_height / 2 + params.conrod_length + params.crank_radius
+    tdc_y = crankshaft_center_y - params.crank_radius - params.conrod_length - params.piston_height / 2
+    bdc_y = crankshaft_center_y + params.crank_radius - params.conrod_length - params.piston_height / 2
+    swept_volume = (bdc_y - tdc_y) * params.swept_volume_scale
+    return Geometry(
+        crankshaft_center_x=params.cylinder_center_x, crankshaft_center_y=crankshaft_center_y,
+        tdc_y=tdc_y, bdc_y=bdc_y, stroke_pixels=bdc_y - tdc_y, swept_volume=swept_volume,
+        min_volume=params.clearance_volume, max_volume=params.clearance_volume + swept_volume,
+    )
+
+
+# --- Derived Geometry for the default parameters ---
+_DEFAULT_GEOMETRY = engine_geometry()
+TDC_Y = _DEFAULT_GEOMETRY.tdc_y
+BDC_Y = _DEFAULT_GEOMETRY.bdc_y
+ACTUAL_STROKE_PIXELS = _DEFAULT_GEOMETRY.stroke_pixels
+SWEPT_VOLUME = _DEFAULT_GEOMETRY.swept_volume
+MIN_VOLUME = _DEFAULT_GEOMETRY.min_volume
+MAX_VOLUME = _DEFAULT_GEOMETRY.max_volume
+
+# --- Cycle Layout ---
+# Stroke index is int(cycle_angle // 180): 0-180 Compression, 180-360 Power, 360-540 Exhaust, 540-720 Intake
+STROKE_NAMES = ("Compression", "Power", "Exhaust", "Intake")
+STROKE_COMPRESSION, STROKE_POWER, STROKE_EXHAUST, STROKE_INTAKE = range(4)
+SPARK_WINDOW = (170.0, 180.0) # Cycle angles where the spark plug may fire
+
+CycleState = namedtuple("CycleState", [
+    "crank_angle", "crank_pin_x", "crank_pin_y", "piston_pin_y", "piston_y",
+    "volume", "pressure", "stroke", "intake_valve_open", "exhaust_valve_open", "spark_window",
+])
+
+
+def piston_kinematics(crank_angles, params=DEFAULT_PARAMS):
+    """ Slider-crank positions for an array of angles. Returns (crank_pin_x, crank_pin_y, piston_pin_y, piston_y). """
+    geometry = engine_geometry(params)
+    r = params.crank_radius
+    angle_rad = np.radians(np.mod(crank_angles, 360.0))
+    sin_a = np.sin(angle_rad)
+    crank_pin_x = geometry.crankshaft_center_x + r * sin_a
+    crank_pin_y = geometry.crankshaft_center_y + r * np.cos(angle_rad)
+    conrod_vertical_component = np.sqrt(np.maximum(0.0, params.conrod_length**2 - (r * sin_a)**2))
+    piston_pin_y = crank_pin_y - conrod_vertical_component
+    piston_y = piston_pin_y - params.piston_height / 2
+    return crank_pin_x, crank_pin_y, piston_pin_y, piston_y
+
+
+def cylinder_volume(piston_y, params=DEFAULT_PARAMS):
+    """ Conceptual cylinder volume for an array of piston top positions. """
+    geometry = engine_geometry(params)
+    stroke_fraction = np.clip((piston_y - geometry.tdc_y) / max(0.1, geometry.stroke_pixels), 0.0, 1.0)
+    return params.clearance_volume + geometry.swept_volume * stroke_fraction
+
+
+def cylinder_pressure(stroke, volume, params=DEFAULT_PARAMS):
+    """
+    Conceptual pressure for arrays of stroke indices and volumes.
+    This is the steady curve only: the one-frame jump to max_pressure_power when the
+    spark fires is an event of the stateful Engine and is not part of the sweep.
+    """
+    geometry = engine_geometry(params)
+    safe_volume = np.maximum(0.1, volume)
+    compression = np.minimum(params.min_pressure * 1.1 * (geometry.max_volume / safe_volume) ** params.compression_exponent,
+                             params.max_pressure_compression)
+    power = np.maximum(params.min_pressure, params.max_pressure_power * (geometry.min_volume / safe_volume) ** params.power_exponent)
+    return np.select(
+        [stroke == STROKE_COMPRESSION, stroke == STROKE_POWER, stroke == STROKE_EXHAUST],
+        [compression, power, np.full_like(safe_volume, params.min_pressure * 1.05)],
+        default=params.min_pressure,
+    )
+
+
+def cycle_flags(crank_angle, stroke):
+    """ (intake_valve_open, exhaust_valve_open, spark_window) boolean arrays. """
+    return (stroke == STROKE_INTAKE, stroke == STROKE_EXHAUST,
+            (crank_angle >= SPARK_WINDOW[0]) & (crank_angle < SPARK_WINDOW[1]))
+
+
+def sweep(crank_angles, params=DEFAULT_PARAMS):
+    """
+    Evaluates the full model for an array of cycle angles in degrees (wrapped to 0-720).
+    Returns a CycleState of arrays with the same shape as the input.
+    """
+    crank_angle = np.mod(np.asarray(crank_angles, dtype=np.float64), 720.0)
+    crank_pin_x, crank_pin_y, piston_pin_y, piston_y = piston_kinematics(crank_angle, params)
+    volume = cylinder_volume(piston_y, params)
+    stroke = np.minimum(crank_angle // 180, 3).astype(np.int8) # np.mod rounds a tiny negative angle up to 720.0 (as CycleTable.lookup)
+    pressure = cylinder_pressure(stroke, volume, params)
+    intake_valve_open, exhaust_valve_open, spark_window = cycle_flags(crank_angle, stroke)
+    return CycleState(
+        crank_angle=crank_angle,
+        crank_pin_x=crank_pin_x, crank_pin_y=crank_pin_y,
+        piston_pin_y=piston_pin_y, piston_y=piston_y,
+        volume=volume, pressure=pressure, stroke=stroke,
+        intake_valve_open=intake_valve_open, exhaust_valve_open=exhaust_valve_open, spark_window=spark_window,
+    )
+
+
+# --- Cycle Metrics ---
+CycleMetrics = namedtuple("CycleMetrics", ["indicated_work", "imep", "peak_pressure", "peak_pressure_angle"])
+
+
+def cycle_metrics(params=DEFAULT_PARAMS, samples_per_degree=4):
+    """
+    Indicated work (PV loop area, closed integral of p dV over the 720 deg cycle), IMEP
+    (work / swept volume), peak pressure and the cycle angle it occurs at, for the steady curve.
+    Each stroke is integrated on its own closed 0-180 interval, so the pressure jumps at the
+    stroke boundaries never fall inside a trapezoid.
+    """
+    cells = int(round(180 * samples_per_degree))
+    stroke = np.repeat(np.arange(4), cells + 1).reshape(4, cells + 1)
+    crank_angle = np.linspace(0.0, 180.0, cells + 1) + 180.0 * stroke
+    volume = cylinder_volume(piston_kinematics(crank_angle, params)[3], params)
+    pressure = cylinder_pressure(stroke, volume, params)
+    work = float(np.sum(0.5 * (pressure[:, 1:] + pressure[:, :-1]) * np.diff(volume, axis=1)))
+    peak = int(np.argmax(pressure))
+    swept_volume = engine_geometry(params).swept_volume
+    return CycleMetrics(indicated_work=work, imep=work / swept_volume if swept_volume else float("nan"),
+                        peak_pressure=float(pressure.flat[peak]), peak_pressure_angle=float(crank_angle.flat[peak]))
+
+
+def stroke_labels(stroke):
+    """ Maps an array of stroke indices to their names ("Compression", "Power", ...). """
+    return np.asarray(STROKE_NAMES)[stroke]
+
+
+# --- Simulation Clock & Cycle Events ---
+SIM_STEP_SECONDS = 1.0 / 600 # Fixed simulation step (10 sub-steps per 60 FPS frame, <= 10 deg at MAX_RPM)
+MAX_SUBSTEPS_PER_UPDATE = 240 # Caps catch-up work after a stall; excess time is dropped, not simulated
+TIMER_FRAMES_PER_SECOND = 60 # Spark/combustion timers are counted in frames of this nominal rate
+
+# (cycle angle, event name) for every discrete event of the cycle
+CYCLE_EVENTS = (
+    (0.0, "BDC"), (0.0, "Intake Valve Close"),
+    (SPARK_WINDOW[0], "Ignition"),
+    (180.0, "TDC"),
+    (360.0, "BDC"), (360.0, "Exhaust Valve Open"),
+    (540.0, "TDC"), (540.0, "Exhaust Valve Close"), (540.0, "Intake Valve Open"),
+)
+
+
+class SimulationClock:
+    """
+    Fixed-timestep accumulator. Real (render) time goes in, a whole number of
+    SIM_STEP_SECONDS steps comes out, so the simulated trajectory does not depend
+    on the frame rate. time_scale > 1 runs faster than real time.
+    """
+    def __init__(self, step_seconds=SIM_STEP_SECONDS, max_steps=MAX_SUBSTEPS_PER_UPDATE, time_scale=1.0):
+        self.step_seconds = step_seconds
+        self.max_steps = max_steps
+        self.time_scale = time_scale
+        self.accumulator = 0.0
+
+    def advance(self, real_dt):
+        """ Adds elapsed real time and returns how many fixed steps to run now. """
+        self.accumulator += real_dt * self.time_scale
+        steps = int(self.accumulator / self.step_seconds + 1e-9) # Epsilon keeps 1/60 s from giving 9 steps then 11
+        self.accumulator -= steps * self.step_seconds
+        if steps > self.max_steps:
+            steps = self.max_steps; self.accumulator = 0.0
+        return steps
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+def cycle_events(ignition_angle=SPARK_WINDOW[0]):
+    """ CYCLE_EVENTS with the Ignition event at ignition_angle (e.g. 180 - spark advance of the thermo model). """
+    return tuple((ignition_angle % 720.0 if name == "Ignition" else angle, name) for angle, name in CYCLE_EVENTS)
+
+
+def crossed_events(old_angle, delta_angle, events=CYCLE_EVENTS):
+    """
+    Cycle events passed when the angle advances by delta_angle (0 <= delta < 720) from old_angle.
+    An event exactly at old_angle is not reported (it belonged to the previous step); one exactly
+    at the new angle is. Returns [(fraction_of_step, event_name), ...] in the order they occur.
+    """
+    if delta_angle <= 0:
+        return []
+    crossed = []
+    for event_angle, name in events:
+        offset = (event_angle - old_angle) % 720.0
+        if 0.0 < offset <= delta_angle:
+            crossed.append((offset / delta_angle, name))
+    crossed.sort(key=lambda event: event[0])
+    return crossed
+
+
+# --- Multi-Cylinder Layouts ---
+# firing_order lists cylinder numbers (1-based); bank gives each cylinder's bank (0/1, V engines only).
+# phase_offsets (degrees of crank rotation by which each cylinder lags cylinder 1) defaults to even firing.
+EngineLayout = namedtuple("EngineLayout", ["name", "firing_order", "banks", "bank_angle", "phase_offsets"], defaults=(None,))
+
+LAYOUTS = {
+    "single": EngineLayout("Single", (1,), (0,), 0.0),
+    "inline-3": EngineLayout("Inline-3", (1, 3, 2), (0, 0, 0), 0.0),
+    "inline-4": EngineLayout("Inline-4", (1, 3, 4, 2), (0, 0, 0, 0), 0.0),
+    "inline-6": EngineLayout("Inline-6", (1, 5, 3, 6, 2, 4), (0,) * 6, 0.0),
+    "V6": EngineLayout("V6", (1, 2, 3, 4, 5, 6), (0, 1) * 3, 60.0),
+    "V8": EngineLayout("V8", (1, 8, 4, 3, 6, 5, 7, 2), (0, 1) * 4, 90.0),
+}
+
+
+def cylinder_phase_offsets(layout):
+    """
+    Crank-angle lag of every cylinder behind cylinder 1 (index = cylinder number - 1).
+    Even firing: the k-th cylinder in the firing order fires k * 720 / N degrees after cylinder 1.
+    """
+    if layout.phase_offsets is not None:
+        return np.asarray(layout.phase_offsets, dtype=np.float64) % 720.0
+    count = len(layout.firing_order)
+    offsets = np.zeros(count)
+    for position, cylinder in enumerate(layout.firing_order):
+        offsets[cylinder - 1] = position * 720.0 / count
+    return offsets
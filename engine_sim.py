@@ -1,8 +1,30 @@
 import pygame
+import argparse
+import gc
 import math
 import sys
 import random
-from collections import deque # For storing PV data efficiently
+from collections import deque # For the recent cycle events
+
+import numpy as np
+
+from cycle_tables import get_cycle_table
+from engine_model import (CYLINDER_CENTER_X, CYLINDER_TOP_Y, CYLINDER_WIDTH, PISTON_HEIGHT,
+                          CRANK_RADIUS, CONROD_LENGTH, CRANKSHAFT_CENTER_X, CRANKSHAFT_CENTER_Y, STROKE_LENGTH,
+                          CLEARANCE_VOLUME, SWEPT_VOLUME_SCALE, MIN_PRESSURE, MAX_PRESSURE_COMPRESSION,
+                          MAX_PRESSURE_POWER, COMPRESSION_EXPONENT, POWER_EXPONENT,
+                          SimulationClock, crossed_events, cycle_events, engine_geometry, DEFAULT_PARAMS, TIMER_FRAMES_PER_SECOND, LAYOUTS)
+from particles import (GAS_INTAKE_COLOR, GAS_COMPRESSED_COLOR, GAS_COMBUSTION_START_COLOR,
+                       GAS_COMBUSTION_MID_COLOR, GAS_EXHAUST_COLOR,
+                       NUM_PARTICLES, PARTICLE_RADIUS, MAX_PARTICLE_SPEED, PARTICLE_ACCEL_FACTOR,
+                       PARTICLE_EXPANSION_ACCEL, PARTICLE_FRICTION, COMBUSTION_SPEED_MULTIPLIER,
+                       COMBUSTION_FLASH_DURATION, COMBUSTION_FADE_DURATION, PALETTE, ParticleSystem)
+from profiler import FrameProfiler
+from quality import QualityGovernor, FULL_QUALITY, QUALITY_LEVELS, QUALITY_NAMES
+from pv_history import PVHistory, lttb_indices
+from sim_thread import SimulationThread
+from text_cache import TextCache
+from thermo_model import DEFAULT_THERMO, current_thermo_table, solve_ahead
 
 # --- Constants ---
 WIDTH, HEIGHT = 1000, 600
@@ -16,8 +38,7 @@ WHITE = (255, 255, 255); BLACK = (0, 0, 0); GRAY = (150, 150, 150); DARK_GRAY =
 RED = (200, 0, 0); BLUE = (0, 0, 200); YELLOW = (255, 255, 0); ORANGE = (255, 165, 0); BRIGHT_ORANGE = (255, 100, 0)
 CYLINDER_COLOR = (180, 180, 190); PISTON_COLOR = (100, 100, 110); CONROD_COLOR = (120, 120, 130); CRANK_COLOR = (90, 90, 100)
 RING_COLOR = (60, 60, 70); SPRING_COLOR = (140, 140, 140)
-GAS_INTAKE_COLOR = (173, 216, 230); GAS_COMPRESSED_COLOR = (100, 149, 237); GAS_COMBUSTION_START_COLOR = YELLOW
-GAS_COMBUSTION_MID_COLOR = BRIGHT_ORANGE; GAS_EXHAUST_COLOR = (169, 169, 169)
+# Gas colours are defined with the particle system in particles.py
 PV_PLOT_COLOR = (50, 150, 50); PV_CURRENT_POINT_COLOR = RED; ANNOTATION_COLOR = (0, 0, 100)
 BUTTON_COLOR = (180, 180, 220) # Light violet
 BUTTON_HOVER_COLOR = (210, 210, 240)
@@ -25,37 +46,28 @@ BUTTON_TEXT_COLOR = BLACK
 SLIDER_BG_COLOR = (160, 160, 160)
 SLIDER_KNOB_COLOR = (90, 90, 110)
 
-# Engine Geometry (Keep existing)
-# ... (previous geometry) ...
-CYLINDER_CENTER_X = 300; CYLINDER_TOP_Y = 100; CYLINDER_WIDTH = 100; PISTON_HEIGHT = 40
-CRANK_RADIUS = 75; CONROD_LENGTH = 180
-CRANKSHAFT_CENTER_Y = CYLINDER_TOP_Y + PISTON_HEIGHT / 2 + CONROD_LENGTH + CRANK_RADIUS
-CRANKSHAFT_CENTER_X = CYLINDER_CENTER_X
-STROKE_LENGTH = 2 * CRANK_RADIUS
+# Engine Geometry (the cylinder and crank come from the pygame-free model in engine_model.py)
 VALVE_SIZE = 15; INTAKE_VALVE_X = CYLINDER_CENTER_X - CYLINDER_WIDTH // 4; EXHAUST_VALVE_X = CYLINDER_CENTER_X + CYLINDER_WIDTH // 4
 VALVE_Y = CYLINDER_TOP_Y - VALVE_SIZE - 5; VALVE_LIFT = 12
 SPARK_PLUG_X = CYLINDER_CENTER_X; SPARK_PLUG_Y = CYLINDER_TOP_Y - 15; SPARK_TIP_Y = CYLINDER_TOP_Y - 5; SPARK_DURATION_FRAMES = 5
 
 # Enhancement Constants (Keep existing)
 # ... (previous enhancement constants) ...
-NUM_PARTICLES = 150; PARTICLE_RADIUS = 2.5; MAX_PARTICLE_SPEED = 2.5; PARTICLE_ACCEL_FACTOR = 0.05
-PARTICLE_EXPANSION_ACCEL = 0.08; PARTICLE_FRICTION = 0.99; COMBUSTION_SPEED_MULTIPLIER = 2.5
-COMBUSTION_FLASH_DURATION = 8; COMBUSTION_FADE_DURATION = 40
+# Particle constants are defined with the particle system in particles.py
 
 # --- Educational Feature Constants ---
 # PV Diagram Area
 PV_RECT = pygame.Rect(WIDTH - 360, 250, 330, 300) # Position and size of the PV plot
 PV_PADDING = 25
-PV_POINT_HISTORY = 150 # How many points to store for the plot line (2 full cycles approx @ 60fps)
-# Conceptual Units for PV
-CLEARANCE_VOLUME = 15.0 # Arbitrary minimum volume units at TDC
-# Swept volume is proportional to stroke length, let's scale it
-SWEPT_VOLUME_SCALE = 0.5 # Make swept volume proportional to pixel stroke
-MIN_PRESSURE = 0.8 # Conceptual pressure units (e.g., atm) - Intake/Exhaust
-MAX_PRESSURE_COMPRESSION = 15.0 # Peak pressure during compression
-MAX_PRESSURE_POWER = 50.0 # Peak pressure during power stroke
-COMPRESSION_EXPONENT = 1.4 # Adiabatic index (gamma) approximation for compression/expansion
-POWER_EXPONENT = 1.3 # Approximation for expansion after combustion
+PV_POINT_HISTORY = 16384 # PV samples kept at full resolution (one per simulation step; ~13 cycles at MIN_RPM, ~220 at MAX_RPM)
+PV_REDRAW_CYCLES = 4 # Most recent cycles a PV trace drawn from scratch shows (older ones have faded out of the incremental plot)
+PV_DISPLAY_POINTS = 1024 # Vertices such a trace is thinned to (lttb_indices), whatever the history length
+STATS_LINE_HEIGHT = 20 # Cycle statistics column beside the readouts
+PV_CYCLE_FADE_ALPHA = 90 # Whitening applied to the plotted trace at each new cycle, so older cycles fade out
+EVENT_HISTORY = 64 # Recent cycle events kept on the Engine
+PV_SNAPSHOT_TAIL = 256 # Newest PV samples carried by each state snapshot (sim thread -> renderer)
+SNAPSHOT_EVENT = pygame.event.custom_type() # Posted by the simulation thread after it applied a command
+# Conceptual Units for PV are defined in engine_model.py
 
 # Annotation Positions (relative adjustments might be needed)
 LABEL_FONT_SIZE = 16
@@ -86,35 +98,34 @@ SLIDER_KNOB_W, SLIDER_KNOB_H = 10, 25
 MIN_RPM = 10
 MAX_RPM = 1000
 STEP_ANGLE_DEGREES = 2.0 # How much angle advances per step
+HUD_FONT_SIZE = 16
+MIN_SCALED_FONT_SIZE = 8 # ScaledDrawing never renders smaller text (the default font is unreadable below)
+HUD_POS = (10, HEIGHT - 10) # Bottom-left corner of the profiler HUD
+HUD_REFRESH_FRAMES = 15 # HUD text is recomputed this often (percentiles over the rolling window)
+DEFAULT_PROFILE_PATH = "profile.json"
 
 # --- Helper Functions ---
-# Keep draw_text
+TEXT_CACHE = TextCache() # Shared fonts, rendered labels and wrapped layouts (see text_cache.py)
+PROFILER = FrameProfiler() # Per-phase frame timers, off unless --profile or the HUD (F3) is on (see profiler.py)
+PALETTE_COLORS = [tuple(color) for color in PALETTE.tolist()] # Shared color tuples (no per-particle color objects per frame)
+
 def draw_text(surface, text, size, x, y, color=BLACK, align="center", wrap_width=0):
-    font = pygame.font.Font(None, size)
+    """ Draws text (optionally word-wrapped) and returns the Rect it covered. """
+    with PROFILER.phase("text"):
+        return _draw_text(surface, text, size, x, y, color, align, wrap_width)
+
+def _draw_text(surface, text, size, x, y, color, align, wrap_width):
     if wrap_width > 0:
-        words = text.split(' ')
-        lines = []
-        current_line = ""
-        for word in words:
-            test_line = current_line + word + " "
-            if font.size(test_line)[0] < wrap_width:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = word + " "
-        lines.append(current_line)
-
-        rendered_lines = [font.render(line, True, color) for line in lines]
-        line_height = font.get_linesize()
+        lines = TEXT_CACHE.wrap(text, size, wrap_width)
+        line_height = TEXT_CACHE.font(size).get_linesize()
+        covered = pygame.Rect(x, y, 0, 0)
         if align == "topleft":
-            start_y = y
-            for i, line_surface in enumerate(rendered_lines):
-                text_rect = line_surface.get_rect()
-                text_rect.topleft = (x, start_y + i * line_height)
-                surface.blit(line_surface, text_rect)
+            for i, line in enumerate(lines):
+                covered.union_ip(surface.blit(TEXT_CACHE.render(line, size, color), (x, y + i * line_height)))
         # Add other alignments if needed for wrapped text
+        return covered
     else:
-        text_surface = font.render(text, True, color)
+        text_surface = TEXT_CACHE.render(text, size, color)
         text_rect = text_surface.get_rect()
         if align == "center":
             text_rect.midtop = (x, y)
@@ -122,44 +133,409 @@ def draw_text(surface, text, size, x, y, color=BLACK, align="center", wrap_width
             text_rect.topleft = (x, y)
         elif align == "topright":
             text_rect.topright = (x, y)
-        surface.blit(text_surface, text_rect)
+        return surface.blit(text_surface, text_rect)
+
+class Drawing:
+    """
+    How an Engine draws: layout coordinates (the full-size window) go straight to pygame.draw and
+    draw_text, so the full-size frame is exactly what those calls draw. ScaledDrawing maps the same
+    calls onto a smaller surface.
+    """
+    scale = 1.0
+    line = staticmethod(pygame.draw.line); rect = staticmethod(pygame.draw.rect)
+    circle = staticmethod(pygame.draw.circle); arc = staticmethod(pygame.draw.arc)
+    text = staticmethod(draw_text)
+
+    @staticmethod
+    def point(x, y):
+        return x, y
+
+    @staticmethod
+    def area(rect):
+        """ Pixels of a layout rect (the rect itself; callers must not modify it). """
+        return rect
+
+    @staticmethod
+    def pixels(value):
+        """ A line width or radius in pixels. """
+        return value
+
+    @staticmethod
+    def font_size(size):
+        return size
+
+class ScaledDrawing(Drawing):
+    """
+    Drawing at scale times the layout coordinates (compare.py's tiles): positions, rects, line widths, radii
+    and font sizes are scaled, so a small view is drawn at its own size instead of shrunk from a full one.
+    Text is rendered at the scaled font size and shared through TEXT_CACHE like any other.
+    """
+    def __init__(self, scale):
+        self.scale = scale
+
+    def point(self, x, y):
+        return round(x * self.scale), round(y * self.scale)
+
+    def area(self, rect):
+        left, top, width, height = rect; s = self.scale
+        x = round(left * s); y = round(top * s)
+        return pygame.Rect(x, y, max(1, round((left + width) * s) - x), max(1, round((top + height) * s) - y))
+
+    def pixels(self, value):
+        return max(1, round(value * self.scale)) if value else 0 # 0 stays "filled"
+
+    def font_size(self, size):
+        return max(MIN_SCALED_FONT_SIZE, round(size * self.scale))
+
+    # The drawing calls are inlined: tiles make hundreds of them per frame
+    def line(self, screen, color, start, end, width=1):
+        s = self.scale
+        return pygame.draw.line(screen, color, (round(start[0] * s), round(start[1] * s)), (round(end[0] * s), round(end[1] * s)), max(1, round(width * s)))
+
+    def rect(self, screen, color, rect, width=0, border_radius=0):
+        return pygame.draw.rect(screen, color, self.area(rect), self.pixels(width), border_radius=self.pixels(border_radius))
+
+    def circle(self, screen, color, center, radius, width=0):
+        s = self.scale
+        return pygame.draw.circle(screen, color, (round(center[0] * s), round(center[1] * s)), max(1, round(radius * s)), self.pixels(width))
+
+    def arc(self, screen, color, rect, start_angle, stop_angle, width=1):
+        return pygame.draw.arc(screen, color, self.area(rect), start_angle, stop_angle, self.pixels(width))
+
+    def text(self, surface, text, size, x, y, color=BLACK, align="center", wrap_width=0):
+        s = self.scale
+        return draw_text(surface, text, self.font_size(size), round(x * s), round(y * s), color, align, round(wrap_width * s))
+
+FULL_SIZE = Drawing()
+
+_PANEL_LAYOUT = None
+
+def panel_layout():
+    """
+    Positions of the UI panel elements (title, buttons, slider, readouts, stroke description, PV plot).
+    Computed once and shared by drawing and hit testing; invalidate_panel_layout() after anything it depends on changes.
+    The Rects are shared too, so callers must not modify them.
+    """
+    global _PANEL_LAYOUT
+    if _PANEL_LAYOUT is None: _PANEL_LAYOUT = compute_panel_layout()
+    return _PANEL_LAYOUT
+
+def invalidate_panel_layout():
+    global _PANEL_LAYOUT
+    _PANEL_LAYOUT = None
+
+def compute_panel_layout():
+    ui_x = PV_RECT.left; ui_panel_width = PV_RECT.width
+    current_y = 30 # Track current Y position for layout
+    layout = {'ui_x': ui_x, 'width': ui_panel_width, 'title_y': current_y}
+    current_y += 35 # Space after title
+    button_spacing = 15
+    layout['play_pause'] = pygame.Rect(ui_x, current_y, BUTTON_W, BUTTON_H)
+    layout['reset'] = pygame.Rect(layout['play_pause'].right + button_spacing, current_y, BUTTON_W, BUTTON_H)
+    layout['step'] = pygame.Rect(layout['reset'].right + button_spacing, current_y, BUTTON_W, BUTTON_H)
+    current_y += BUTTON_H + 15 # Space after buttons
+    layout['slider_label_y'] = current_y
+    layout['slider'] = pygame.Rect(ui_x, current_y + 25, SLIDER_W, SLIDER_H)
+    current_y = layout['slider'].bottom + 15 # Space after slider
+    layout['info_y'] = current_y
+    current_y += 26 + 26 + 24 + 31 # Four readout lines
+    layout['description'] = pygame.Rect(ui_x, current_y, ui_panel_width, DESCRIPTION_RECT_H)
+    current_y = layout['description'].bottom + 10
+    layout['pv'] = pygame.Rect(ui_x, current_y, ui_panel_width, HEIGHT - current_y - 15) # Remaining height with bottom padding
+    return layout
+
+def slider_rpm(slider_rect, x):
+    """ RPM for a mouse x over the RPM slider (clamped to the slider's ends). """
+    return MIN_RPM + max(0, min(1, (x - slider_rect.left) / slider_rect.width)) * (MAX_RPM - MIN_RPM)
+
+def slider_knob_rect(slider_rect, rpm):
+    """ Knob rect on the RPM slider for the given RPM. """
+    rpm_fraction = (rpm - MIN_RPM) / max(1, MAX_RPM - MIN_RPM)
+    knob_x = slider_rect.left + rpm_fraction * (slider_rect.width - SLIDER_KNOB_W) # Adjust for knob width
+    return pygame.Rect(knob_x, slider_rect.centery - SLIDER_KNOB_H // 2, SLIDER_KNOB_W, SLIDER_KNOB_H)
+
+class ScratchSurface:
+    """
+    One reusable SRCALPHA surface for translucent fills of varying size (the combustion flash follows
+    the piston). Only the top-left part the size of the target is filled and blitted; the surface
+    is reallocated only when a larger area is asked for.
+    """
+    def __init__(self):
+        self.surface = None
+
+    def blend_fill(self, screen, rect, color):
+        """ Blends color (RGBA) over rect of screen. Returns the covered Rect. """
+        width, height = rect.size
+        if self.surface is None or width > self.surface.get_width() or height > self.surface.get_height():
+            size = (width, height) if self.surface is None else (max(width, self.surface.get_width()), max(height, self.surface.get_height()))
+            self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        area = (0, 0, width, height)
+        self.surface.fill(color, area)
+        return screen.blit(self.surface, rect.topleft, area)
+
+FLASH_SURFACE = ScratchSurface() # Combustion flash of every engine (drawn one chamber at a time)
+
+class ParticleSprites:
+    """
+    Batched particle drawing. For each circle radius the footprint pygame.draw.circle fills is
+    rendered once, as pixel offsets and as one colorkeyed sprite per PALETTE color (the combustion
+    fade included). 32-bit targets get the palette pixels written straight into their buffer in one
+    vectorized store, particle by particle so later particles cover earlier ones as with one
+    draw.circle call each; other formats get every sprite in one Surface.blits call.
+    """
+    def __init__(self):
+        self.footprints = {} # int radius -> (x offsets, y offsets) of the filled pixels
+        self.sprites = {} # int radius -> one Surface per palette color
+        self.mapped = {} # pixel format (masks) -> palette colors as uint32 pixels
+        self.targets = np.empty(0, np.intp); self.pixels = np.empty(0, np.uint32) # Pooled work buffers (grown, never shrunk)
+
+    def footprint(self, radius):
+        if radius not in self.footprints:
+            size = 2 * radius + 1
+            sprite = pygame.Surface((size, size)); sprite.fill(BLACK)
+            pygame.draw.circle(sprite, WHITE, (radius, radius), radius)
+            dx, dy = np.nonzero(pygame.surfarray.array2d(sprite))
+            self.footprints[radius] = (dx - radius, dy - radius)
+        return self.footprints[radius]
+
+    def sprite_set(self, radius):
+        if radius not in self.sprites:
+            size = 2 * radius + 1
+            sprites = []
+            for color in PALETTE_COLORS:
+                sprite = pygame.Surface((size, size)); sprite.fill(BLACK); sprite.set_colorkey(BLACK) # No palette color is black
+                pygame.draw.circle(sprite, color, (radius, radius), radius)
+                sprites.append(sprite)
+            self.sprites[radius] = sprites
+        return self.sprites[radius]
+
+    def draw(self, screen, xs, ys, color_index, radius):
+        """ Draws circles of radius at integer centers (xs, ys) in the PALETTE colors of color_index. """
+        radius = int(radius) # draw.circle truncates the radius the same way
+        if not len(xs): return
+        if screen.get_bytesize() == 4:
+            masks = screen.get_masks()
+            if masks not in self.mapped:
+                self.mapped[masks] = np.array([screen.map_rgb(color) & 0xFFFFFFFF for color in PALETTE_COLORS], np.uint32)
+            dx, dy = self.footprint(radius)
+            count, size = len(xs), len(dx)
+            if len(self.targets) < count * size:
+                self.targets = np.empty(count * size, np.intp); self.pixels = np.empty(count * size, np.uint32)
+            # Particle-major pixel lists (row = particle): a pixel written twice keeps the later particle's color
+            pitch = screen.get_pitch() // 4
+            targets = self.targets[:count * size]; pixels = self.pixels[:count * size]
+            np.add((ys * pitch + xs)[:, None], dy * pitch + dx, out=targets.reshape(count, size))
+            pixels.reshape(count, size)[:] = self.mapped[masks][color_index][:, None]
+            clip = screen.get_clip()
+            if not (xs.min() + dx.min() >= clip.left and xs.max() + dx.max() < clip.right and ys.min() + dy.min() >= clip.top and ys.max() + dy.max() < clip.bottom):
+                x = (xs[:, None] + dx).ravel(); y = (ys[:, None] + dy).ravel() # Clipped at an edge: drop the pixels outside
+                inside = (x >= clip.left) & (x < clip.right) & (y >= clip.top) & (y < clip.bottom)
+                targets, pixels = targets[inside], pixels[inside]
+            buffer = screen.get_buffer() # Locks screen until released
+            np.frombuffer(buffer, np.uint32)[targets] = pixels
+            buffer = None
+        else:
+            sprites = self.sprite_set(radius)
+            screen.blits(zip([sprites[color] for color in color_index.tolist()], zip((xs - radius).tolist(), (ys - radius).tolist())), doreturn=False)
+
+PARTICLE_SPRITES = ParticleSprites() # Shared by every engine's gas
+_PAUSE_OVERLAYS = {} # size -> overlay
+
+def pause_overlay(size=(WIDTH, HEIGHT)):
+    """ Translucent dim over a whole view of size drawn while paused (built once per size). """
+    overlay = _PAUSE_OVERLAYS.get(size)
+    if overlay is None:
+        overlay = _PAUSE_OVERLAYS[size] = pygame.Surface(size, pygame.SRCALPHA); overlay.fill((0, 0, 0, 128))
+    return overlay
 
 # --- PV Diagram Drawing Function (Minor tweak for label) ---
-def draw_pv_diagram(screen, pv_rect, pv_data, current_v, current_p, v_min, v_max, p_min, p_max):
-    pygame.draw.rect(screen, WHITE, pv_rect) # Background
-    pygame.draw.rect(screen, BLACK, pv_rect, 2) # Border
+def draw_pv_axes(screen, pv_rect, background=True, drawing=FULL_SIZE):
+    """ Static part of the PV diagram: box, axes and axis labels (pv_rect in layout coordinates). """
+    if background: drawing.rect(screen, WHITE, pv_rect) # Background
+    drawing.rect(screen, BLACK, pv_rect, 2) # Border
 
     origin_x = pv_rect.left + PV_PADDING
     origin_y = pv_rect.bottom - PV_PADDING
     axis_width = pv_rect.width - 2 * PV_PADDING
     axis_height = pv_rect.height - 2 * PV_PADDING
 
-    pygame.draw.line(screen, BLACK, (origin_x, origin_y), (origin_x + axis_width, origin_y), 2) # X-axis (Volume)
-    pygame.draw.line(screen, BLACK, (origin_x, origin_y), (origin_x, origin_y - axis_height), 2) # Y-axis (Pressure)
+    drawing.line(screen, BLACK, (origin_x, origin_y), (origin_x + axis_width, origin_y), 2) # X-axis (Volume)
+    drawing.line(screen, BLACK, (origin_x, origin_y), (origin_x, origin_y - axis_height), 2) # Y-axis (Pressure)
 
-    draw_text(screen, "Volume", 18, origin_x + axis_width // 2, origin_y + 5, BLACK, "center")
+    drawing.text(screen, "Volume", 18, origin_x + axis_width // 2, origin_y + 5, BLACK, "center")
     # Adjusted Pressure label X position slightly left
-    draw_text(screen, "Pressure", 18, origin_x - 20, origin_y - axis_height // 2, BLACK, "center") # Needs rotation ideally
-
-    def scale_point(v, p):
-        v_range = max(0.1, v_max - v_min)
-        x = origin_x + axis_width * ( (v - v_min) / v_range )
-        p_range = max(0.1, p_max - p_min)
-        y = origin_y - axis_height * ( (p - p_min) / p_range )
-        x = max(origin_x, min(origin_x + axis_width, x))
-        y = max(origin_y - axis_height, min(origin_y, y))
+    drawing.text(screen, "Pressure", 18, origin_x - 20, origin_y - axis_height // 2, BLACK, "center") # Needs rotation ideally
+
+class PVTransform:
+    """ Precomputed volume/pressure -> pixel mapping for a PV plot area, applied to whole arrays at once. """
+    def __init__(self, pv_rect, v_min, v_max, p_min, p_max, padding=PV_PADDING):
+        self.x_min = pv_rect.left + padding; self.x_max = pv_rect.right - padding
+        self.y_max = pv_rect.bottom - padding; self.y_min = pv_rect.top + padding
+        self.scale_x = (self.x_max - self.x_min) / max(0.1, v_max - v_min); self.offset_x = self.x_min - v_min * self.scale_x
+        self.scale_y = -(self.y_max - self.y_min) / max(0.1, p_max - p_min); self.offset_y = self.y_max - p_min * self.scale_y
+        self.work = np.empty((0, 2)); self.pixels = np.empty((0, 2), dtype=np.int32) # Reused point buffers, grown on demand
+
+    def points(self, volume, pressure):
+        """ (n, 2) int32 array of pixel coordinates, clamped to the axes. It is a reused buffer: valid until the next call. """
+        count = len(volume)
+        if count > len(self.work):
+            self.work = np.empty((max(count, 2 * len(self.work)), 2)); self.pixels = np.empty(self.work.shape, dtype=np.int32)
+        work = self.work[:count]; x = work[:, 0]; y = work[:, 1]
+        np.multiply(volume, self.scale_x, out=x); x += self.offset_x; np.clip(x, self.x_min, self.x_max, out=x)
+        np.multiply(pressure, self.scale_y, out=y); y += self.offset_y; np.clip(y, self.y_min, self.y_max, out=y)
+        pixels = self.pixels[:count]
+        np.copyto(pixels, work, casting="unsafe") # Truncates like astype(np.int32)
+        return pixels
+
+    def point(self, volume, pressure):
+        x = max(self.x_min, min(self.x_max, volume * self.scale_x + self.offset_x))
+        y = max(self.y_min, min(self.y_max, pressure * self.scale_y + self.offset_y))
         return int(x), int(y)
 
-    if len(pv_data) >= 2:
-        scaled_points = [scale_point(v, p) for v, p in pv_data]
-        pygame.draw.lines(screen, PV_PLOT_COLOR, False, scaled_points, 2)
+_PV_TRANSFORM = (None, None) # (key, PVTransform) of the last draw_pv_diagram call, reused while the plot does not change
+
+def pv_transform(pv_rect, v_min, v_max, p_min, p_max):
+    global _PV_TRANSFORM
+    key = (tuple(pv_rect), v_min, v_max, p_min, p_max)
+    if _PV_TRANSFORM[0] != key: _PV_TRANSFORM = (key, PVTransform(pv_rect, v_min, v_max, p_min, p_max))
+    return _PV_TRANSFORM[1]
 
-    current_x, current_y = scale_point(current_v, current_p)
-    pygame.draw.circle(screen, PV_CURRENT_POINT_COLOR, (current_x, current_y), 4)
+def draw_pv_diagram(screen, pv_rect, pv_data, current_v, current_p, v_min, v_max, p_min, p_max):
+    """
+    Stateless PV trace (the last PV_REDRAW_CYCLES cycles, thinned to PV_DISPLAY_POINTS, and the current point)
+    over draw_pv_axes. Returns the covered Rect. The running simulation uses the incremental PVPlot instead; this is for one-off renders.
+    """
+    transform = pv_transform(pv_rect, v_min, v_max, p_min, p_max)
+    line_rect = None
+    count, _ = pv_data.recent_cycles(PV_REDRAW_CYCLES)
+    if count >= 2:
+        volume, pressure = pv_data.latest(count)
+        keep = lttb_indices(volume, pressure, PV_DISPLAY_POINTS)
+        line_rect = pygame.draw.lines(screen, PV_PLOT_COLOR, False, transform.points(volume[keep], pressure[keep]), 2)
+
+    point_rect = pygame.draw.circle(screen, PV_CURRENT_POINT_COLOR, transform.point(current_v, current_p), 4)
+    return point_rect.union(line_rect) if line_rect else point_rect
+
+class PVPlot:
+    """
+    Incremental PV diagram. The trace lives on a persistent surface and each frame only the
+    samples added since the previous frame are drawn into it, so the per-frame cost does not
+    depend on history length. At every new cycle the existing trace is faded, which leaves the
+    last few cycles overlaid. The whole surface is rebuilt only when the history is reset, from
+    the last PV_REDRAW_CYCLES cycles, each thinned to its share of PV_DISPLAY_POINTS.
+    For a multi-channel history, channel selects which cylinder is plotted. With stride > 1 the
+    trace runs through every stride-th sample only, and new samples are drawn once stride of them
+    have arrived (fewer, longer segments). size is in layout coordinates; drawing scales the plot to its view.
+    """
+    def __init__(self, size, v_min, v_max, p_min, p_max, channel=None, stride=1, drawing=FULL_SIZE):
+        self.channel = channel
+        self.stride = stride
+        self.drawing = drawing
+        self.layout_rect = pygame.Rect((0, 0), size)
+        self.surface = pygame.Surface(drawing.area(self.layout_rect).size)
+        self.local_rect = self.surface.get_rect()
+        self.transform = PVTransform(self.local_rect, v_min, v_max, p_min, p_max, drawing.pixels(PV_PADDING))
+        self.line_width = drawing.pixels(2); self.point_radius = drawing.pixels(4)
+        self.fade_surface = pygame.Surface(self.local_rect.size, pygame.SRCALPHA); self.fade_surface.fill((255, 255, 255, PV_CYCLE_FADE_ALPHA))
+        self.drawn_total = None; self.drawn_cycles = 0
+
+    def channel_samples(self, history, count):
+        """ The last count (volume, pressure) samples of the plotted channel. """
+        volume, pressure = history.latest(count)
+        if self.channel is not None:
+            volume, pressure = volume[:, self.channel], pressure[:, self.channel]
+        return volume, pressure
+
+    def samples(self, history, count):
+        """ channel_samples() thinned to the stride (both ends kept). """
+        volume, pressure = self.channel_samples(history, count)
+        if self.stride > 1 and count > 2:
+            keep = np.r_[0:count - 1:self.stride, count - 1]
+            volume, pressure = volume[keep], pressure[keep]
+        return volume, pressure
+
+    def rebuild(self, history):
+        """ Redraws the surface from scratch with the recent cycles, faded as update() would have left them. """
+        draw_pv_axes(self.surface, self.layout_rect, drawing=self.drawing)
+        count, splits = history.recent_cycles(PV_REDRAW_CYCLES)
+        volume, pressure = self.channel_samples(history, count)
+        edges = [0] + splits.tolist() + [count]
+        for start, end in zip(edges, edges[1:]):
+            if start:
+                self.surface.blit(self.fade_surface, (0, 0))
+                draw_pv_axes(self.surface, self.layout_rect, False, self.drawing)
+                start -= 1 # Joined to the previous cycle's last sample, as update() draws it
+            if end - start >= 2:
+                keep = lttb_indices(volume[start:end], pressure[start:end], PV_DISPLAY_POINTS // PV_REDRAW_CYCLES)
+                pygame.draw.lines(self.surface, PV_PLOT_COLOR, False, self.transform.points(volume[start:end][keep], pressure[start:end][keep]), self.line_width)
+        self.drawn_total = history.total; self.drawn_cycles = history.cycle_count
+
+    def invalidate(self):
+        """ Rebuilds from the history on the next update (the history was replaced, e.g. by a replay seek). """
+        self.drawn_total = None
+
+    def update(self, history):
+        """ Brings the surface up to date with the history, drawing only the new segment. """
+        if self.drawn_total is None or history.total < self.drawn_total:
+            self.rebuild(history) # First use or history reset
+            return
+        new_samples = history.total - self.drawn_total
+        if new_samples + 1 > len(history) and new_samples > 0:
+            self.rebuild(history) # More new samples than the history still holds
+            return
+        if new_samples < self.stride and history.cycle_count == self.drawn_cycles:
+            return # Batched until stride samples are waiting
+        if history.cycle_count != self.drawn_cycles:
+            self.surface.blit(self.fade_surface, (0, 0))
+            draw_pv_axes(self.surface, self.layout_rect, False, self.drawing)
+            self.drawn_cycles = history.cycle_count
+        if new_samples:
+            pygame.draw.lines(self.surface, PV_PLOT_COLOR, False, self.transform.points(*self.samples(history, new_samples + 1)), self.line_width)
+            self.drawn_total = history.total
+
+    def draw(self, screen, topleft, current_v, current_p):
+        """ Blits the plot (topleft in pixels) and the current-state point. Returns the covered Rect. """
+        covered = screen.blit(self.surface, topleft)
+        x, y = self.transform.point(current_v, current_p)
+        pygame.draw.circle(screen, PV_CURRENT_POINT_COLOR, (x + topleft[0], y + topleft[1]), self.point_radius)
+        return covered
+
+def draw_profiler_hud(screen, lines):
+    """ Profiler table (phase, p50/p95/p99 ms) on a dark box in the bottom-left corner. Returns the covered Rect. """
+    line_height = TEXT_CACHE.font(HUD_FONT_SIZE).get_linesize()
+    rows = ["phase          p50   p95   p99"] + lines
+    box = pygame.Rect(0, 0, 250, line_height * len(rows) + 8); box.bottomleft = HUD_POS
+    pygame.draw.rect(screen, BLACK, box)
+    for i, line in enumerate(rows):
+        draw_text(screen, line, HUD_FONT_SIZE, box.left + 6, box.top + 4 + i * line_height, YELLOW if i == 0 else WHITE, align="topleft")
+    return box
+
+def render_cycle_stats(summary, channel, drawing=FULL_SIZE):
+    """ Panel block of rolling (last ROLLING_CYCLES) and whole-run cycle statistics for one channel, on the panel background. """
+    font = TEXT_CACHE.font(drawing.font_size(LABEL_FONT_SIZE)); line_height = drawing.pixels(STATS_LINE_HEIGHT)
+    lines = [font.render(line, True, BLACK) for line in (
+        f"Cycles: {summary.cycles}",
+        f"Work: {summary.mean_work[channel]:.0f}  CoV {summary.cov_work[channel]:.1f}%",
+        f"Peak: {summary.mean_peak_pressure[channel]:.1f} @ {summary.peak_angle[channel]:.0f}°",
+        f"Run CoV: {summary.lifetime_cov_work[channel]:.1f}%")]
+    block = pygame.Surface((max(line.get_width() for line in lines), line_height * len(lines)))
+    block.fill(LIGHT_GRAY)
+    for i, line in enumerate(lines):
+        block.blit(line, line.get_rect(topright=(block.get_width(), i * line_height)))
+    return block
+
+def draw_particles(screen, particles, bounds_rect, drawing=FULL_SIZE):
+    """ Draws the visible particles of a ParticleSystem as circles in their palette color (one batch, see ParticleSprites). """
+    bounds = (bounds_rect.left, bounds_rect.top, bounds_rect.right, bounds_rect.bottom)
+    visible = particles.visible(bounds)
+    xs = particles.x[visible]; ys = particles.y[visible]
+    if drawing.scale != 1.0: xs = xs * drawing.scale; ys = ys * drawing.scale
+    PARTICLE_SPRITES.draw(screen, xs.astype(np.intp), ys.astype(np.intp), particles.color_index[visible], drawing.pixels(PARTICLE_RADIUS))
 
 # --- Classes ---
 
-# Keep Particle Class the same as the previous version
+# Reference per-object particle. The Engine uses the batched ParticleSystem (particles.py);
+# this class is kept as the behavioural reference it is compared against in benchmarks/bench_particles.py.
 class Particle:
     def __init__(self, bounds_rect):
         self.bounds = bounds_rect
@@ -231,7 +607,21 @@ class Particle:
 
 
 class Engine:
-    def __init__(self):
+    def __init__(self, particle_seed=None, particle_collisions=False, thermo=None, params=DEFAULT_PARAMS):
+        # engine_model.EngineParams: crank/conrod/piston geometry and the conceptual pressure curve (the cylinder's
+        # on-screen position, cylinder_center_x/cylinder_top_y, stays at the layout constants)
+        self.params = params
+        self.particle_seed = particle_seed # Fixed seed makes the gas reproducible (benchmarks); None = fresh entropy
+        self.particle_collisions = particle_collisions # Particle-particle collisions (spatial-hash grid, see particles.py)
+        # Where the gas moves: "draw" = once per rendered frame (single-threaded loop), "update" = at the nominal
+        # frame rate of simulated time (simulation thread), "none" = never (renderer fed by snapshots)
+        self.particle_stepping = "draw"
+        self.thermo = thermo # thermo_model.ThermoParams: pressure from the crank-angle-resolved cylinder model; None = conceptual curve
+        self.cycle_events = cycle_events() if thermo is None else cycle_events(180.0 - thermo.spark_advance) # Ignition at the model's spark
+        self.recorder = None # recording.Recorder that gets every simulation step (kept across resets)
+        self.telemetry = None # telemetry.TelemetryServer that gets every simulation step (kept across resets)
+        self.quality = FULL_QUALITY # quality.QualityLevel the gas, PV trace, annotations and spark are drawn at (kept across resets)
+        self.drawing = FULL_SIZE # Drawing the artwork goes through; a ScaledDrawing draws the whole view smaller (compare.py tiles)
         self.reset() # Initialize state via reset method
 
     def reset(self):
@@ -244,100 +634,201 @@ class Engine:
         self.spark_firing = False; self.spark_timer = 0
         self.combustion_timer = 0
 
+        # Simulation time (advanced in fixed steps, independent of the render frame rate)
+        self.sim_clock = SimulationClock()
+        self.particle_clock = SimulationClock(1.0 / TIMER_FRAMES_PER_SECOND) # Gas steps when particle_stepping == "update"
+        self.sim_time = 0.0
+        self.events = deque(maxlen=EVENT_HISTORY) # (sim_time, event name) of recent cycle events
+
         # Kinematic variables
         self.piston_y = 0; self.piston_pin_y = 0; self.crank_pin_x = 0; self.crank_pin_y = 0
         self.piston_pin_x = CYLINDER_CENTER_X
 
         # TDC/BDC calculation
-        self.tdc_pin_y = CRANKSHAFT_CENTER_Y - CRANK_RADIUS - CONROD_LENGTH
-        self.bdc_pin_y = CRANKSHAFT_CENTER_Y + CRANK_RADIUS - CONROD_LENGTH
-        self.tdc_y = self.tdc_pin_y - PISTON_HEIGHT / 2
-        self.bdc_y = self.bdc_pin_y - PISTON_HEIGHT / 2
+        params = self.params; geometry = engine_geometry(params)
+        self.crankshaft_center_y = geometry.crankshaft_center_y
+        self.tdc_pin_y = self.crankshaft_center_y - params.crank_radius - params.conrod_length
+        self.bdc_pin_y = self.crankshaft_center_y + params.crank_radius - params.conrod_length
+        self.tdc_y = self.tdc_pin_y - params.piston_height / 2
+        self.bdc_y = self.bdc_pin_y - params.piston_height / 2
         self.actual_stroke_pixels = self.bdc_y - self.tdc_y
 
         # Gas simulation (re-initialize particles or just their state if complex)
         initial_bounds = pygame.Rect(CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, int(self.tdc_y),
                                      CYLINDER_WIDTH, int(self.bdc_y - self.tdc_y))
         # Recreate particles to reset positions/velocities
-        self.particles = [Particle(initial_bounds) for _ in range(NUM_PARTICLES)]
+        self.particles = self.create_particles((initial_bounds.left, initial_bounds.top,
+                                                initial_bounds.right, initial_bounds.bottom))
+        self.particles.active = self.active_particles(self.quality)
 
         # Educational Feature Data
-        self.cylinder_volume = CLEARANCE_VOLUME
-        self.pressure = MIN_PRESSURE
-        self.pv_data = deque(maxlen=PV_POINT_HISTORY)
-        self.swept_volume = self.actual_stroke_pixels * SWEPT_VOLUME_SCALE
-        self.max_volume = CLEARANCE_VOLUME + self.swept_volume
-        self.min_volume = CLEARANCE_VOLUME
+        self.cylinder_volume = params.clearance_volume
+        self.pressure = params.min_pressure
+        self.pv_data = self.create_pv_history()
+        self.pv_source_total = 0 # pv_total of the last snapshot read (render side of the simulation thread)
+        self.source_cycle_summary = None # Cycle statistics of the last snapshot read (the render side keeps no samples to summarise)
+        self.pv_plot = None # Incremental PV renderer, created on first draw
+        self.pv_channel = None # Column of a multi-channel pv_data that is plotted
+        self.hud_lines = None; self.hud_age = 0 # Profiler HUD text, refreshed every HUD_REFRESH_FRAMES frames
+        self.stats_block = None # (summary, channel, drawing, Surface) of the cycle statistics shown on the panel
+        # Rects of moving parts, moved in place by draw_mechanism instead of rebuilt every frame
+        self.piston_rect = pygame.Rect(CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, 0, CYLINDER_WIDTH, params.piston_height)
+        self.intake_valve_rect = pygame.Rect(INTAKE_VALVE_X - VALVE_SIZE // 2, VALVE_Y, VALVE_SIZE, VALVE_SIZE)
+        self.exhaust_valve_rect = pygame.Rect(EXHAUST_VALVE_X - VALVE_SIZE // 2, VALVE_Y, VALVE_SIZE, VALVE_SIZE)
+        self.swept_volume = self.actual_stroke_pixels * params.swept_volume_scale
+        self.max_volume = params.clearance_volume + self.swept_volume
+        self.min_volume = params.clearance_volume
+        self.cycle_table = get_cycle_table(params) # Kinematics/volume/pressure vs cycle angle for this geometry
+        self.thermo_table = None # Solved thermodynamic cycle for the current RPM (thermo mode only)
+        self.thermo_pending = False # thermo_table is a nearby bucket's until the worker has solved this RPM's
+        self.update_thermo_table()
 
         # Force initial update to set positions correctly for angle 0
         self.perform_update_calculations(0.0) # Update kinematics/state for angle 0
 
+    def create_particles(self, bounds):
+        return ParticleSystem(NUM_PARTICLES, bounds, self.particle_seed, self.particle_collisions)
+
+    def create_pv_history(self):
+        return PVHistory(PV_POINT_HISTORY)
+
     def perform_update_calculations(self, dt, is_step=False):
         """ Contains the core logic for updating engine state based on angle change. """
         # --- Angle Update ---
         # Only update angle automatically if not paused and not stepping manually
+        old_angle = self.crank_angle; delta_angle = 0.0
         if not self.paused and not is_step:
              deg_per_second = self.rpm * 360 / 60
              delta_angle = deg_per_second * dt
-             self.crank_angle = (self.crank_angle + delta_angle) % 720
         elif is_step:
-            self.crank_angle = (self.crank_angle + STEP_ANGLE_DEGREES) % 720
-
-        # --- Kinematics ---
-        angle_rad = math.radians(self.crank_angle % 360)
-        r = CRANK_RADIUS; l = CONROD_LENGTH; cx = CRANKSHAFT_CENTER_X; cy = CRANKSHAFT_CENTER_Y
-        self.crank_pin_x = cx + r * math.sin(angle_rad)
-        self.crank_pin_y = cy + r * math.cos(angle_rad)
-        sqrt_term_val = l**2 - (r * math.sin(angle_rad))**2
-        sqrt_term_val = max(0, sqrt_term_val)
-        conrod_vertical_component = math.sqrt(sqrt_term_val)
-        self.piston_pin_y = self.crank_pin_y - conrod_vertical_component
-        self.piston_y = self.piston_pin_y - PISTON_HEIGHT / 2
-
-        # --- Update Volume ---
-        stroke_fraction = (self.piston_y - self.tdc_y) / max(0.1, self.actual_stroke_pixels)
-        stroke_fraction = max(0, min(1, stroke_fraction))
-        self.cylinder_volume = CLEARANCE_VOLUME + self.swept_volume * stroke_fraction
-
-        # --- Combustion Timer ---
+            delta_angle = STEP_ANGLE_DEGREES
+        self.crank_angle = (old_angle + delta_angle) % 720
+        step_start_time = self.sim_time
+        self.sim_time += dt
+        # Timers count frames of the nominal rate, driven by elapsed time; a manual step counts as one frame
+        timer_ticks = 1 if is_step else dt * TIMER_FRAMES_PER_SECOND
+
+        # --- Cycle Events (exact crossings, so no event is skipped however large the step) ---
+        events = crossed_events(old_angle, delta_angle, self.cycle_events)
+        for fraction, name in events:
+            self.events.append((step_start_time + dt * fraction, name))
+
+        # --- Kinematics, Volume & Pressure (interpolated from the precomputed cycle table) ---
+        (self.crank_pin_x, self.crank_pin_y, self.piston_pin_y, self.piston_y,
+         self.cylinder_volume, self.pressure) = self.cycle_table.at(self.crank_angle)
+        if self.thermo_table is not None: self.pressure = self.thermo_table.pressure_at(self.crank_angle)
+
+        # --- Combustion & Spark Timers ---
         if self.combustion_timer > 0:
-             self.combustion_timer -= 1
+             self.combustion_timer = max(0, self.combustion_timer - timer_ticks)
+        if self.spark_timer > 0:
+            self.spark_timer -= timer_ticks
+            if self.spark_timer <= 0: self.spark_firing = False
+        for fraction, name in events:
+            if name == "Ignition": # Start the timers at the ignition point, not the end of the step
+                 ticks_since_ignition = (1 - fraction) * timer_ticks
+                 self.spark_timer = SPARK_DURATION_FRAMES - ticks_since_ignition; self.spark_firing = self.spark_timer > 0
+                 self.combustion_timer = max(0, COMBUSTION_FADE_DURATION - ticks_since_ignition)
+        ignited = any(name == "Ignition" for _, name in events)
 
         # --- Stroke Logic & Pressure Update ---
         old_stroke = self.stroke
         if 0 <= self.crank_angle < 180: # UP: Compression
             self.stroke = "Compression"; self.intake_valve_open = False; self.exhaust_valve_open = False
-            p_start = MIN_PRESSURE * 1.1; vol_ratio = self.max_volume / max(0.1, self.cylinder_volume)
-            self.pressure = p_start * (vol_ratio ** COMPRESSION_EXPONENT); self.pressure = min(self.pressure, MAX_PRESSURE_COMPRESSION)
-            if 170 <= self.crank_angle < 180 and not self.spark_firing and self.combustion_timer <= 0:
-                 self.spark_firing = True; self.spark_timer = SPARK_DURATION_FRAMES
-                 self.combustion_timer = COMBUSTION_FADE_DURATION; self.pressure = MAX_PRESSURE_POWER
+            if ignited and self.thermo_table is None: self.pressure = self.params.max_pressure_power # The thermo model burns over burn_duration instead
         elif 180 <= self.crank_angle < 360: # DOWN: Power
             self.stroke = "Power"; self.intake_valve_open = False; self.exhaust_valve_open = False
-            p_start = MAX_PRESSURE_POWER; vol_ratio = self.min_volume / max(0.1, self.cylinder_volume)
-            self.pressure = p_start * (vol_ratio ** POWER_EXPONENT); self.pressure = max(MIN_PRESSURE, self.pressure)
         elif 360 <= self.crank_angle < 540: # UP: Exhaust
             self.stroke = "Exhaust"; self.intake_valve_open = False; self.exhaust_valve_open = True
-            self.pressure = MIN_PRESSURE * 1.05
         else: # 540 <= self.crank_angle < 720 (DOWN: Intake)
             self.stroke = "Intake"; self.intake_valve_open = True; self.exhaust_valve_open = False
-            self.pressure = MIN_PRESSURE
-
-        # Update spark visual timer
-        if self.spark_timer > 0:
-            self.spark_timer -= 1
-            if self.spark_timer <= 0: self.spark_firing = False
 
         # --- Store PV Data Point ---
         # Store point if not paused OR if it's a manual step
         if not self.paused or is_step:
-             self.pv_data.append((self.cylinder_volume, self.pressure))
+             if old_angle + delta_angle >= 720: self.pv_data.start_cycle() # Wrapped past 720: a new cycle begins
+             self.pv_data.append(self.cylinder_volume, self.pressure, self.crank_angle)
+             if self.recorder is not None: self.recorder.record(self)
+             if self.telemetry is not None: self.telemetry.publish(self)
+
+    def panel_angle(self):
+        """ Cycle angle shown on the panel. """
+        return self.crank_angle
+
+    def cycle_summary(self):
+        """ Rolling and lifetime statistics of the completed cycles (pv_history.CycleSummary), or None before the first. """
+        if self.source_cycle_summary is not None: return self.source_cycle_summary
+        return self.pv_data.cycles.summary()
 
     def update(self, dt):
-        """ High-level update called each frame. Delegates calculation if not paused. """
+        """ High-level update called each frame. Runs as many fixed simulation steps as dt covers if not paused. """
+        if self.thermo_pending: self.update_thermo_table() # Switches to this RPM's table once the worker has it
         if not self.paused:
-             self.perform_update_calculations(dt, is_step=False)
+             for _ in range(self.sim_clock.advance(dt)):
+                  self.perform_update_calculations(self.sim_clock.step_seconds, is_step=False)
         # If paused, calculations are only done via step()
+        if self.particle_stepping == "update": # The gas keeps moving while paused, as it does when stepped in draw
+             for _ in range(self.particle_clock.advance(dt)):
+                  self.step_particles()
+
+    def chamber_rect(self):
+        """ Gas region above the piston. """
+        return pygame.Rect(CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y, CYLINDER_WIDTH, max(1, self.piston_y - CYLINDER_TOP_Y))
+
+    def step_particles(self):
+        """ Advances the gas by one nominal frame inside the current chamber. """
+        chamber = self.chamber_rect()
+        if chamber.height > 1:
+            self.particles.step((chamber.left, chamber.top, chamber.right, chamber.bottom), self.stroke, self.combustion_timer)
+
+    # --- state snapshots (simulation thread -> renderer, see sim_thread.py) ---
+    SNAPSHOT_ATTRIBUTES = ("crank_angle", "rpm", "paused", "stroke", "intake_valve_open", "exhaust_valve_open",
+                           "spark_firing", "spark_timer", "combustion_timer", "sim_time",
+                           "crank_pin_x", "crank_pin_y", "piston_pin_y", "piston_y", "cylinder_volume", "pressure")
+
+    def snapshot_arrays(self):
+        """ Arrays published with each snapshot (name -> array); the snapshot copies them. """
+        particles = self.particles
+        count = min(len(self.pv_data), PV_SNAPSHOT_TAIL)
+        pv_volume, pv_pressure = self.pv_data.latest(count)
+        return {'particle_x': particles.x, 'particle_y': particles.y, 'particle_color': particles.color_index,
+                'particle_top': np.asarray(particles.top, dtype=np.float64), 'particle_bottom': np.asarray(particles.bottom, dtype=np.float64),
+                'pv_volume': pv_volume, 'pv_pressure': pv_pressure}
+
+    def write_snapshot(self, snapshot):
+        """ Copies the state the renderer needs into snapshot (a sim_thread.EngineSnapshot). """
+        values = snapshot.values
+        for name in self.SNAPSHOT_ATTRIBUTES:
+            values[name] = getattr(self, name)
+        values['pv_total'] = self.pv_data.total; values['pv_cycles'] = self.pv_data.cycle_count; values['pv_cycle_start'] = self.pv_data.cycle_start
+        values['cycle_summary'] = self.cycle_summary()
+        for name, array in self.snapshot_arrays().items():
+            snapshot.store(name, array)
+
+    def read_snapshot(self, snapshot):
+        """ Makes this (render-side) engine show the state in snapshot. """
+        values = snapshot.values; arrays = snapshot.arrays
+        for name in self.SNAPSHOT_ATTRIBUTES:
+            setattr(self, name, values[name])
+        particles = self.particles
+        if 'particle_x' in arrays: # Recordings may leave the gas out
+            np.copyto(particles.x, arrays['particle_x']); np.copyto(particles.y, arrays['particle_y'])
+            np.copyto(particles.color_index, arrays['particle_color'])
+            particles.top = arrays['particle_top']; particles.bottom = arrays['particle_bottom']
+        # PV: append the samples of the tail that are newer than the last snapshot read
+        source_total = values['pv_total']
+        if source_total < self.pv_source_total:
+            self.pv_data.clear() # The simulation was reset
+            self.pv_source_total = 0
+        new_samples = min(source_total - self.pv_source_total, len(arrays['pv_volume']))
+        if new_samples:
+            self.pv_data.extend(arrays['pv_volume'][-new_samples:], arrays['pv_pressure'][-new_samples:])
+        self.pv_source_total = source_total
+        if values['pv_cycles'] > self.pv_data.cycle_count and 'pv_cycle_start' in values: # Recordings carry no cycle starts
+            self.pv_data.cycle_count = values['pv_cycles'] - 1
+            self.pv_data.mark_cycle_start(self.pv_data.total - (source_total - values['pv_cycle_start']))
+        self.pv_data.cycle_count = values['pv_cycles']
+        self.source_cycle_summary = values.get('cycle_summary') # Recordings carry none
 
     def step(self):
         """ Advances the engine state by a small fixed angle increment. Only works when paused. """
@@ -346,89 +837,157 @@ class Engine:
 
     def set_rpm(self, new_rpm):
         self.rpm = max(MIN_RPM, min(MAX_RPM, new_rpm)) # Clamp RPM within range
+        self.update_thermo_table()
+
+    def update_thermo_table(self):
+        """ Picks the cached thermodynamic cycle for the current RPM (see thermo_model.current_thermo_table). """
+        if self.thermo is not None:
+            self.thermo_table, ready = current_thermo_table(self.cycle_table.params, self.thermo, self.rpm)
+            self.thermo_pending = not ready
 
     def toggle_pause(self):
         self.paused = not self.paused
 
-    # --- draw method (needs significant additions for UI) ---
+    def active_particles(self, quality):
+        return max(1, round(len(self.particles) * quality.particle_fraction))
+
+    def set_quality(self, quality):
+        """ Switches to a quality.QualityLevel (particle count, PV trace stride, annotation interval, spark detail). """
+        self.quality = quality
+        self.particles.active = self.active_particles(quality)
+        if self.pv_plot is not None: self.pv_plot.stride = quality.pv_stride
+
+    # --- draw methods ---
     def draw(self, screen, ui_state):
-        # --- Draw Background & Engine Components (same as before) ---
-        pygame.draw.rect(screen, DARK_GRAY, (CYLINDER_CENTER_X - CYLINDER_WIDTH*1.5, self.tdc_y + PISTON_HEIGHT , CYLINDER_WIDTH*3, HEIGHT ))
-        # ... (Sections 1-7: Cylinder, Flash, Particles, Crank, Conrod, Piston, Valves, Spark Plug - No changes needed here) ...
-         # 1. Cylinder/Head
+        """ Full redraw (static artwork, then the dynamic layer). Returns the dirty rects of the dynamic layer. """
+        self.draw_static(screen)
+        return self.draw_dynamic(screen, ui_state)
+
+    def draw_static(self, screen):
+        """ Everything that never moves: crankcase, cylinder head/walls, spark plug body, title, panel boxes and PV axes. """
+        self.draw_static_mechanism(screen)
+        self.draw_static_panel(screen)
+
+    def draw_static_mechanism(self, screen):
+        d = self.drawing
+        d.rect(screen, DARK_GRAY, (CYLINDER_CENTER_X - CYLINDER_WIDTH*1.5, self.tdc_y + self.params.piston_height , CYLINDER_WIDTH*3, HEIGHT ))
+        # Cylinder/Head
         wall_thickness = 8; head_base_y = CYLINDER_TOP_Y - 30
-        pygame.draw.rect(screen, CYLINDER_COLOR, (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2 - wall_thickness, head_base_y, CYLINDER_WIDTH + 2 * wall_thickness, (CYLINDER_TOP_Y-head_base_y) + wall_thickness//2))
-        pygame.draw.line(screen, CYLINDER_COLOR, (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y), (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, self.bdc_y + PISTON_HEIGHT + 10), wall_thickness)
-        pygame.draw.line(screen, CYLINDER_COLOR, (CYLINDER_CENTER_X + CYLINDER_WIDTH // 2, CYLINDER_TOP_Y), (CYLINDER_CENTER_X + CYLINDER_WIDTH // 2, self.bdc_y + PISTON_HEIGHT + 10), wall_thickness)
+        d.rect(screen, CYLINDER_COLOR, (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2 - wall_thickness, head_base_y, CYLINDER_WIDTH + 2 * wall_thickness, (CYLINDER_TOP_Y-head_base_y) + wall_thickness//2))
+        d.line(screen, CYLINDER_COLOR, (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y), (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, self.bdc_y + self.params.piston_height + 10), wall_thickness)
+        d.line(screen, CYLINDER_COLOR, (CYLINDER_CENTER_X + CYLINDER_WIDTH // 2, CYLINDER_TOP_Y), (CYLINDER_CENTER_X + CYLINDER_WIDTH // 2, self.bdc_y + self.params.piston_height + 10), wall_thickness)
+        # Spark Plug body (the spark itself is dynamic)
+        d.line(screen, DARK_GRAY, (SPARK_PLUG_X, SPARK_PLUG_Y), (SPARK_PLUG_X, SPARK_TIP_Y), 4); d.line(screen, BLACK, (SPARK_PLUG_X, SPARK_TIP_Y), (SPARK_PLUG_X, SPARK_TIP_Y+3), 2)
+
+    def draw_static_panel(self, screen):
+        d = self.drawing
+        layout = panel_layout()
+        # Title
+        d.text(screen, "4-Stroke Engine Simulation", 28, layout['ui_x'] + layout['width'] // 2, layout['title_y'], align="center")
+        # Stroke description box
+        d.rect(screen, WHITE, layout['description']); d.rect(screen, BLACK, layout['description'], 1)
+        # PV diagram frame
+        draw_pv_axes(screen, layout['pv'], drawing=d)
+
+    def draw_dynamic(self, screen, ui_state, annotations=True):
+        """ Everything that moves or changes with state. Returns the list of rects it drew into. """
+        dirty = []; mark = dirty.append
+        self.draw_mechanism(screen, mark)
+        if annotations:
+            with PROFILER.phase("annotations"):
+                self.draw_annotations(screen, mark)
+        self.draw_panel(screen, ui_state, mark)
+        self.draw_pause_overlay(screen, ui_state, mark)
+        if PROFILER.hud_visible:
+            if self.hud_lines is None or self.hud_age >= HUD_REFRESH_FRAMES:
+                self.hud_lines = PROFILER.hud_lines(); self.hud_age = 0
+            self.hud_age += 1
+            mark(draw_profiler_hud(screen, self.hud_lines))
+        return dirty
+
+    def draw_mechanism(self, screen, mark):
+        """ Moving engine parts, gas and annotations. mark(rect) is called for every area drawn into. """
+        d = self.drawing
         # Combustion Flash
-        combustion_chamber_rect = pygame.Rect( CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y, CYLINDER_WIDTH, max(1, self.piston_y - CYLINDER_TOP_Y) )
+        combustion_chamber_rect = self.chamber_rect()
         if self.combustion_timer > (COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION):
-             flash_surface = pygame.Surface((combustion_chamber_rect.width, combustion_chamber_rect.height), pygame.SRCALPHA)
              alpha = 150 * ( (self.combustion_timer - (COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION)) / COMBUSTION_FLASH_DURATION )
-             flash_surface.fill((255, 255, 100, int(alpha)))
-             screen.blit(flash_surface, combustion_chamber_rect.topleft)
+             mark(FLASH_SURFACE.blend_fill(screen, d.area(combustion_chamber_rect), (255, 255, 100, int(alpha))))
         # 2. Particles
         if combustion_chamber_rect.height > 1:
-             engine_state = {'stroke': self.stroke, 'combustion_timer': self.combustion_timer}
-             for particle in self.particles: particle.move_and_draw(screen, combustion_chamber_rect, engine_state)
+            with PROFILER.phase("particles"):
+                if self.particle_stepping == "draw": self.step_particles()
+                draw_particles(screen, self.particles, combustion_chamber_rect, d)
+            mark(d.area(combustion_chamber_rect.inflate(2 * PARTICLE_RADIUS + 2, 2 * PARTICLE_RADIUS + 2)))
         # 3. Crankshaft
-        counter_weight_angle_rad = math.radians((self.crank_angle % 360) + 180); counter_weight_radius = CRANK_RADIUS * 0.9
+        counter_weight_angle_rad = math.radians((self.crank_angle % 360) + 180); counter_weight_radius = self.params.crank_radius * 0.9; center_y = self.crankshaft_center_y
         start_angle = counter_weight_angle_rad - math.pi/2; stop_angle = counter_weight_angle_rad + math.pi/2
-        try: pygame.draw.arc(screen, CRANK_COLOR, (CRANKSHAFT_CENTER_X - counter_weight_radius, CRANKSHAFT_CENTER_Y - counter_weight_radius, 2*counter_weight_radius, 2*counter_weight_radius), start_angle, stop_angle, int(counter_weight_radius//1.2))
+        try: mark(d.arc(screen, CRANK_COLOR, (CRANKSHAFT_CENTER_X - counter_weight_radius, center_y - counter_weight_radius, 2*counter_weight_radius, 2*counter_weight_radius), start_angle, stop_angle, int(counter_weight_radius//1.2)))
         except ValueError: pass
-        pygame.draw.circle(screen, DARK_GRAY, (int(CRANKSHAFT_CENTER_X), int(CRANKSHAFT_CENTER_Y)), 15)
-        pygame.draw.line(screen, CRANK_COLOR, (CRANKSHAFT_CENTER_X, CRANKSHAFT_CENTER_Y), (self.crank_pin_x, self.crank_pin_y), 12)
-        pygame.draw.circle(screen, GRAY, (int(self.crank_pin_x), int(self.crank_pin_y)), 8)
+        # The hub is static but sits between the counterweight and the crank arm, so it is redrawn here
+        mark(d.circle(screen, DARK_GRAY, (int(CRANKSHAFT_CENTER_X), int(center_y)), 15))
+        mark(d.line(screen, CRANK_COLOR, (CRANKSHAFT_CENTER_X, center_y), (self.crank_pin_x, self.crank_pin_y), 12))
+        mark(d.circle(screen, GRAY, (int(self.crank_pin_x), int(self.crank_pin_y)), 8))
         # 4. Conrod
-        pygame.draw.line(screen, CONROD_COLOR, (self.piston_pin_x, self.piston_pin_y), (self.crank_pin_x, self.crank_pin_y), 10)
+        mark(d.line(screen, CONROD_COLOR, (self.piston_pin_x, self.piston_pin_y), (self.crank_pin_x, self.crank_pin_y), 10))
         # 5. Piston
-        piston_rect = pygame.Rect(CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, self.piston_y, CYLINDER_WIDTH, PISTON_HEIGHT)
-        pygame.draw.rect(screen, PISTON_COLOR, piston_rect); pygame.draw.rect(screen, DARK_GRAY, piston_rect, 2)
-        ring_y_offset = PISTON_HEIGHT * 0.15; ring_height = 2
-        for i in range(3): ring_y = self.piston_y + ring_y_offset + i * (ring_height + 3); pygame.draw.rect(screen, RING_COLOR, (piston_rect.left + 2, ring_y, piston_rect.width - 4, ring_height))
-        pygame.draw.circle(screen, GRAY, (int(self.piston_pin_x), int(self.piston_pin_y)), 6)
+        piston_rect = self.piston_rect; piston_rect.y = int(self.piston_y) # int() truncates like the Rect constructor did
+        mark(d.rect(screen, PISTON_COLOR, piston_rect)); d.rect(screen, DARK_GRAY, piston_rect, 2)
+        ring_y_offset = self.params.piston_height * 0.15; ring_height = 2
+        for i in range(3): ring_y = self.piston_y + ring_y_offset + i * (ring_height + 3); d.rect(screen, RING_COLOR, (piston_rect.left + 2, ring_y, piston_rect.width - 4, ring_height))
+        d.circle(screen, GRAY, (int(self.piston_pin_x), int(self.piston_pin_y)), 6)
         # 6. Valves
         intake_color = BLUE if self.intake_valve_open else DARK_GRAY; intake_y_offset = VALVE_LIFT if self.intake_valve_open else 0
-        intake_valve_rect = pygame.Rect(INTAKE_VALVE_X - VALVE_SIZE // 2, VALVE_Y - intake_y_offset, VALVE_SIZE, VALVE_SIZE)
-        pygame.draw.rect(screen, intake_color, intake_valve_rect); stem_top_y = intake_valve_rect.top; stem_bottom_y = stem_top_y - 15
-        pygame.draw.line(screen, DARK_GRAY, (INTAKE_VALVE_X, stem_top_y), (INTAKE_VALVE_X, stem_bottom_y), 3)
-        for i in range(4): spring_y = stem_bottom_y - i * 3; pygame.draw.line(screen, SPRING_COLOR, (INTAKE_VALVE_X - 4, spring_y), (INTAKE_VALVE_X + 4, spring_y - 1.5), 2)
+        intake_valve_rect = self.intake_valve_rect; intake_valve_rect.y = VALVE_Y - intake_y_offset
+        mark(d.rect(screen, intake_color, intake_valve_rect)); stem_top_y = intake_valve_rect.top; stem_bottom_y = stem_top_y - 15
+        mark(d.line(screen, DARK_GRAY, (INTAKE_VALVE_X, stem_top_y), (INTAKE_VALVE_X, stem_bottom_y), 3))
+        for i in range(4): spring_y = stem_bottom_y - i * 3; mark(d.line(screen, SPRING_COLOR, (INTAKE_VALVE_X - 4, spring_y), (INTAKE_VALVE_X + 4, spring_y - 1.5), 2))
         exhaust_color = RED if self.exhaust_valve_open else DARK_GRAY; exhaust_y_offset = VALVE_LIFT if self.exhaust_valve_open else 0
-        exhaust_valve_rect = pygame.Rect(EXHAUST_VALVE_X - VALVE_SIZE // 2, VALVE_Y - exhaust_y_offset, VALVE_SIZE, VALVE_SIZE)
-        pygame.draw.rect(screen, exhaust_color, exhaust_valve_rect); stem_top_y = exhaust_valve_rect.top; stem_bottom_y = stem_top_y - 15
-        pygame.draw.line(screen, DARK_GRAY, (EXHAUST_VALVE_X, stem_top_y), (EXHAUST_VALVE_X, stem_bottom_y), 3)
-        for i in range(4): spring_y = stem_bottom_y - i * 3; pygame.draw.line(screen, SPRING_COLOR, (EXHAUST_VALVE_X - 4, spring_y), (EXHAUST_VALVE_X + 4, spring_y - 1.5), 2)
-        # 7. Spark Plug
-        pygame.draw.line(screen, DARK_GRAY, (SPARK_PLUG_X, SPARK_PLUG_Y), (SPARK_PLUG_X, SPARK_TIP_Y), 4); pygame.draw.line(screen, BLACK, (SPARK_PLUG_X, SPARK_TIP_Y), (SPARK_PLUG_X, SPARK_TIP_Y+3), 2)
+        exhaust_valve_rect = self.exhaust_valve_rect; exhaust_valve_rect.y = VALVE_Y - exhaust_y_offset
+        mark(d.rect(screen, exhaust_color, exhaust_valve_rect)); stem_top_y = exhaust_valve_rect.top; stem_bottom_y = stem_top_y - 15
+        mark(d.line(screen, DARK_GRAY, (EXHAUST_VALVE_X, stem_top_y), (EXHAUST_VALVE_X, stem_bottom_y), 3))
+        for i in range(4): spring_y = stem_bottom_y - i * 3; mark(d.line(screen, SPRING_COLOR, (EXHAUST_VALVE_X - 4, spring_y), (EXHAUST_VALVE_X + 4, spring_y - 1.5), 2))
+        # 7. Spark
         if self.spark_firing:
-            spark_center = (SPARK_PLUG_X, SPARK_TIP_Y + 7); num_points = 7; outer_radius = 12; inner_radius = 5
-            for i in range(num_points * 2): radius = outer_radius if i % 2 == 0 else inner_radius; angle = math.pi * 2 * i / (num_points * 2) - math.pi / 2; p1 = spark_center; p2 = (spark_center[0] + radius * math.cos(angle), spark_center[1] + radius * math.sin(angle)); pygame.draw.line(screen, YELLOW, p1, p2, random.randint(1,3))
+            spark_center = (SPARK_PLUG_X, SPARK_TIP_Y + 7); num_points = self.quality.spark_points; outer_radius = 12; inner_radius = 5
+            for i in range(num_points * 2): radius = outer_radius if i % 2 == 0 else inner_radius; angle = math.pi * 2 * i / (num_points * 2) - math.pi / 2; p1 = spark_center; p2 = (spark_center[0] + radius * math.cos(angle), spark_center[1] + radius * math.sin(angle)); d.line(screen, YELLOW, p1, p2, d.pixels(random.randint(1,3)))
+            mark(d.area(pygame.Rect(spark_center[0] - outer_radius - 2, spark_center[1] - outer_radius - 2, 2 * outer_radius + 4, 2 * outer_radius + 4)))
 
-        # --- Draw Educational UI Elements & New Controls ---
-        ui_x = PV_RECT.left # Base X for the UI panel
-        ui_panel_width = PV_RECT.width
-        current_y = 30 # Track current Y position for layout
+    def draw_annotations(self, screen, mark):
+        """ Part labels with leader lines (drawn over the mechanism, or into the background, see LayeredRenderer). """
+        d = self.drawing
+        for name, (text_x, text_y, point_x, point_y) in ANNOTATIONS.items():
+            current_point_y = point_y; current_point_x = point_x # Defaults
+            if name == "Piston":
+                 text_y = self.piston_y + self.params.piston_height * 0.5; current_point_y = self.piston_y + self.params.piston_height * 0.5
+            elif name == "Connecting Rod":
+                 mid_conrod_x = (self.piston_pin_x + self.crank_pin_x) / 2; mid_conrod_y = (self.piston_pin_y + self.crank_pin_y) / 2
+                 text_y = mid_conrod_y; current_point_x = mid_conrod_x; current_point_y = mid_conrod_y
+            elif name == "Crankshaft": # Follows the crankshaft of a non-default geometry
+                 text_y += self.crankshaft_center_y - CRANKSHAFT_CENTER_Y; current_point_y += self.crankshaft_center_y - CRANKSHAFT_CENTER_Y
+            mark(d.line(screen, ANNOTATION_COLOR, (text_x, text_y), (current_point_x + 3, current_point_y), 1))
+            mark(d.text(screen, name, LABEL_FONT_SIZE, text_x, text_y - LABEL_FONT_SIZE // 2 -1, ANNOTATION_COLOR, align="center"))
 
-        # Title
-        draw_text(screen, "4-Stroke Engine Simulation", 28, ui_x + ui_panel_width // 2, current_y, align="center")
-        current_y += 35 # Space after title
+    def draw_panel(self, screen, ui_state, mark):
+        """ Buttons, RPM slider, readouts, stroke description and PV plot. """
+        # --- Draw Educational UI Elements & New Controls ---
+        layout = panel_layout(); d = self.drawing
+        ui_x = layout['ui_x'] # Base X for the UI panel
 
         # --- Buttons ---
-        button_y = current_y
-        button_spacing = 15
         # Play/Pause Button
         play_pause_text = "Play" if self.paused else "Pause"
-        play_pause_rect = pygame.Rect(ui_x, button_y, BUTTON_W, BUTTON_H)
-        pygame.draw.rect(screen, BUTTON_HOVER_COLOR if play_pause_rect.collidepoint(ui_state['mouse_pos']) else BUTTON_COLOR, play_pause_rect, border_radius=5)
-        draw_text(screen, play_pause_text, 20, play_pause_rect.centerx, play_pause_rect.centery - 10, BUTTON_TEXT_COLOR, "center")
+        play_pause_rect = layout['play_pause']
+        mark(d.rect(screen, BUTTON_HOVER_COLOR if play_pause_rect.collidepoint(ui_state['mouse_pos']) else BUTTON_COLOR, play_pause_rect, border_radius=5))
+        d.text(screen, play_pause_text, 20, play_pause_rect.centerx, play_pause_rect.centery - 10, BUTTON_TEXT_COLOR, "center")
 
         # Reset Button
-        reset_rect = pygame.Rect(play_pause_rect.right + button_spacing, button_y, BUTTON_W, BUTTON_H)
-        pygame.draw.rect(screen, BUTTON_HOVER_COLOR if reset_rect.collidepoint(ui_state['mouse_pos']) else BUTTON_COLOR, reset_rect, border_radius=5)
-        draw_text(screen, "Reset", 20, reset_rect.centerx, reset_rect.centery - 10, BUTTON_TEXT_COLOR, "center")
+        reset_rect = layout['reset']
+        mark(d.rect(screen, BUTTON_HOVER_COLOR if reset_rect.collidepoint(ui_state['mouse_pos']) else BUTTON_COLOR, reset_rect, border_radius=5))
+        d.text(screen, "Reset", 20, reset_rect.centerx, reset_rect.centery - 10, BUTTON_TEXT_COLOR, "center")
 
         # Step Button (Only functional when paused)
-        step_rect = pygame.Rect(reset_rect.right + button_spacing, button_y, BUTTON_W, BUTTON_H)
+        step_rect = layout['step']
         step_button_color = BUTTON_COLOR
         step_text_color = BUTTON_TEXT_COLOR
         if not self.paused:
@@ -437,133 +996,255 @@ class Engine:
         elif step_rect.collidepoint(ui_state['mouse_pos']):
              step_button_color = BUTTON_HOVER_COLOR
 
-        pygame.draw.rect(screen, step_button_color, step_rect, border_radius=5)
-        draw_text(screen, "Step", 20, step_rect.centerx, step_rect.centery - 10, step_text_color, "center")
-
-        current_y += BUTTON_H + 15 # Space after buttons
+        mark(d.rect(screen, step_button_color, step_rect, border_radius=5))
+        d.text(screen, "Step", 20, step_rect.centerx, step_rect.centery - 10, step_text_color, "center")
 
         # --- RPM Slider ---
-        slider_label_y = current_y
-        draw_text(screen, f"RPM: {self.rpm:.0f}", 20, ui_x, slider_label_y, align="topleft", color=BLACK)
-        slider_y = slider_label_y + 25
-        slider_rect = pygame.Rect(ui_x, slider_y, SLIDER_W, SLIDER_H)
-        pygame.draw.rect(screen, SLIDER_BG_COLOR, slider_rect, border_radius=3)
+        mark(d.text(screen, f"RPM: {self.rpm:.0f}", 20, ui_x, layout['slider_label_y'], align="topleft", color=BLACK))
+        slider_rect = layout['slider']
+        d.rect(screen, SLIDER_BG_COLOR, slider_rect, border_radius=3)
         # Calculate knob position based on RPM
-        rpm_fraction = (self.rpm - MIN_RPM) / max(1, MAX_RPM - MIN_RPM)
-        knob_x = slider_rect.left + rpm_fraction * (slider_rect.width - SLIDER_KNOB_W) # Adjust for knob width
-        knob_rect = pygame.Rect(knob_x, slider_rect.centery - SLIDER_KNOB_H // 2, SLIDER_KNOB_W, SLIDER_KNOB_H)
-        pygame.draw.rect(screen, SLIDER_KNOB_COLOR, knob_rect, border_radius=3)
-
-        current_y = slider_rect.bottom + 15 # Space after slider
+        knob_rect = slider_knob_rect(slider_rect, self.rpm)
+        d.rect(screen, SLIDER_KNOB_COLOR, knob_rect, border_radius=3)
+        mark(d.area(slider_rect.union(pygame.Rect(slider_rect.left, knob_rect.top, slider_rect.width, knob_rect.height))))
 
         # --- Info Text (Angle, Stroke, V, P) ---
         # Repositioned below slider
+        current_y = layout['info_y']
         line_height_info = 26
-        draw_text(screen, f"Cycle Angle: {self.crank_angle:.1f}°", 20, ui_x, current_y, align="topleft", color=BLACK)
+        mark(d.text(screen, f"Cycle Angle: {self.panel_angle():.1f}°", 20, ui_x, current_y, align="topleft", color=BLACK))
         current_y += line_height_info
-        draw_text(screen, f"Stroke: {self.stroke}", 20, ui_x, current_y, align="topleft", color=BLACK)
+        mark(d.text(screen, f"Stroke: {self.stroke}", 20, ui_x, current_y, align="topleft", color=BLACK))
         current_y += line_height_info
-        draw_text(screen, f"Volume: {self.cylinder_volume:.1f}", 18, ui_x, current_y, align="topleft", color=BLACK)
+        mark(d.text(screen, f"Volume: {self.cylinder_volume:.1f}", 18, ui_x, current_y, align="topleft", color=BLACK))
         current_y += line_height_info - 2
-        draw_text(screen, f"Pressure: {self.pressure:.1f}", 18, ui_x, current_y, align="topleft", color=BLACK)
-        current_y += line_height_info + 5
+        mark(d.text(screen, f"Pressure: {self.pressure:.1f}", 18, ui_x, current_y, align="topleft", color=BLACK))
+
+        # --- Cycle Statistics (rendered once per cycle into a block, so the per-cycle strings stay out of the text cache) ---
+        summary = self.cycle_summary()
+        if summary is not None:
+            channel = self.pv_channel or 0
+            if self.stats_block is None or self.stats_block[0] is not summary or self.stats_block[1] != channel or self.stats_block[2] is not d:
+                self.stats_block = (summary, channel, d, render_cycle_stats(summary, channel, d))
+            block = self.stats_block[3]
+            mark(screen.blit(block, block.get_rect(topright=d.point(layout['pv'].right, layout['info_y']))))
 
         # --- Stroke Description ---
-        dynamic_description_rect = pygame.Rect(ui_x, current_y, ui_panel_width, DESCRIPTION_RECT_H)
-        pygame.draw.rect(screen, WHITE, dynamic_description_rect); pygame.draw.rect(screen, BLACK, dynamic_description_rect, 1)
+        dynamic_description_rect = layout['description']
         description = STROKE_DESCRIPTIONS.get(self.stroke, "")
-        draw_text(screen, description, 18, dynamic_description_rect.left + 10, dynamic_description_rect.top + 10,
-                  color=BLACK, align="topleft", wrap_width=dynamic_description_rect.width - 20)
-        current_y = dynamic_description_rect.bottom + 10
+        mark(d.text(screen, description, 18, dynamic_description_rect.left + 10, dynamic_description_rect.top + 10,
+                       color=BLACK, align="topleft", wrap_width=dynamic_description_rect.width - 20))
 
         # --- PV Diagram ---
-        # Make PV diagram take remaining space or fixed size
-        pv_rect_final_h = HEIGHT - current_y - 15 # Calculate remaining height with bottom padding
-        pv_rect_final = pygame.Rect(ui_x, current_y, ui_panel_width, pv_rect_final_h)
-        draw_pv_diagram(screen, pv_rect_final, self.pv_data,
-                        self.cylinder_volume, self.pressure,
-                        self.min_volume, self.max_volume,
-                        MIN_PRESSURE * 0.8, MAX_PRESSURE_POWER * 1.1)
-
-        # --- Draw Annotations (Same as before) ---
-        # ... (Annotation drawing loop) ...
-        for name, (text_x, text_y, point_x, point_y) in ANNOTATIONS.items():
-            current_point_y = point_y; current_point_x = point_x # Defaults
-            if name == "Piston":
-                 text_y = self.piston_y + PISTON_HEIGHT * 0.5; current_point_y = self.piston_y + PISTON_HEIGHT * 0.5
-            elif name == "Connecting Rod":
-                 mid_conrod_x = (self.piston_pin_x + self.crank_pin_x) / 2; mid_conrod_y = (self.piston_pin_y + self.crank_pin_y) / 2
-                 text_y = mid_conrod_y; current_point_x = mid_conrod_x; current_point_y = mid_conrod_y
-            pygame.draw.line(screen, ANNOTATION_COLOR, (text_x, text_y), (current_point_x + 3, current_point_y), 1)
-            draw_text(screen, name, LABEL_FONT_SIZE, text_x, text_y - LABEL_FONT_SIZE // 2 -1, ANNOTATION_COLOR, align="center")
-
-
+        with PROFILER.phase("pv"):
+            pv_rect = layout['pv']
+            if self.pv_plot is None or self.pv_plot.layout_rect.size != pv_rect.size or self.pv_plot.drawing is not d:
+                 peak = self.params.max_pressure_power if self.thermo_table is None else max(self.params.max_pressure_power, self.thermo_table.peak_pressure)
+                 self.pv_plot = PVPlot(pv_rect.size, self.min_volume, self.max_volume, self.params.min_pressure * 0.8, peak * 1.1, self.pv_channel, self.quality.pv_stride, d)
+            self.pv_plot.update(self.pv_data)
+            mark(self.pv_plot.draw(screen, d.point(*pv_rect.topleft), self.cylinder_volume, self.pressure))
+
+        # --- Render quality (adaptive governor) ---
+        if ui_state.get('quality'):
+            mark(d.text(screen, ui_state['quality'], HUD_FONT_SIZE, layout['pv'].right, layout['pv'].bottom + 1, DARK_GRAY, align="topright"))
+
+    def draw_pause_overlay(self, screen, ui_state, mark):
         # --- Pause Overlay ---
+        d = self.drawing
         if self.paused and not ui_state.get("is_dragging_slider", False): # Don't obscure UI while dragging slider
-             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA); overlay.fill((0, 0, 0, 128))
-             screen.blit(overlay, (0,0))
+             mark(screen.blit(pause_overlay(screen.get_size()), (0,0)))
              # Draw smaller PAUSED text to avoid covering buttons/slider too much
-             draw_text(screen, "PAUSED", 48, ui_x - 50, 50 , RED, align="center")
+             d.text(screen, "PAUSED", 48, PV_RECT.left - 50, 50 , RED, align="center")
+
+
+class LayeredRenderer:
+    """
+    Frame = pre-rendered static background + dynamic layer drawn on top. Only the areas
+    the dynamic layer touched this frame or the previous one are restored and pushed to
+    the display. The background is rebuilt when invalidated or when the window size changes.
+
+    When the engine's quality level has an annotation_interval above 1, the annotations are
+    drawn into the background instead (under the moving parts) and redrawn only every that
+    many frames; a clean copy of the static layer is kept to erase them.
+    """
+    def __init__(self):
+        self.background = None
+        self.previous_dirty = []
+        self.static_layer = None # Background without annotations (only while they are baked in)
+        self.annotation_rects = []; self.annotation_age = None # Rects of the baked annotations; frames since drawn (None: not baked)
+
+    def invalidate(self):
+        """ Forces the static layer to be rebuilt and the next frame to be a full update. """
+        self.background = None
+
+    def build_static_layers(self, screen, engine):
+        self.background = pygame.Surface(screen.get_size(), 0, screen)
+        self.background.fill(LIGHT_GRAY)
+        engine.draw_static(self.background)
+        self.static_layer = None; self.annotation_rects = []; self.annotation_age = None
+
+    def refresh_annotations(self, engine):
+        """ Bakes the annotations into the background when due (or takes them out again). Returns the background rects that changed. """
+        interval = engine.quality.annotation_interval
+        if self.annotation_age is None and interval == 1:
+            return []
+        if self.annotation_age is not None and interval > 1:
+            self.annotation_age += 1
+            if self.annotation_age < interval: return []
+        if self.static_layer is None: self.static_layer = self.background.copy()
+        changed = self.annotation_rects
+        for rect in changed: self.background.blit(self.static_layer, rect, rect)
+        self.annotation_rects = []; self.annotation_age = None
+        if interval > 1:
+            with PROFILER.phase("annotations"):
+                engine.draw_annotations(self.background, self.annotation_rects.append)
+            self.annotation_age = 0
+        return changed + self.annotation_rects
+
+    def render(self, screen, engine, ui_state):
+        """ Composites one frame onto screen and returns the rects to pass to pygame.display.update. """
+        screen_rect = screen.get_rect()
+        full_update = self.background is None or self.background.get_size() != screen_rect.size
+        if full_update: self.build_static_layers(screen, engine)
+        baked = self.refresh_annotations(engine)
+        if full_update:
+            screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous_dirty + baked: screen.blit(self.background, rect, rect)
+        dirty = [rect.clip(screen_rect) for rect in engine.draw_dynamic(screen, ui_state, annotations=self.annotation_age is None)]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        update_rects = [screen_rect] if full_update else self.previous_dirty + [rect.clip(screen_rect) for rect in baked] + dirty
+        self.previous_dirty = dirty
+        return update_rects
 
 
 # --- Main Game Loop --- (Modified for UI interaction)
+def create_engine(layout="single", **options):
+    """ Engine for a layout name from engine_model.LAYOUTS ("single" is the original one-cylinder engine). options go to the Engine constructor. """
+    if layout == "single":
+        return Engine(**options)
+    from multi_cylinder import MultiCylinderEngine # Imported here: multi_cylinder builds on this module
+    return MultiCylinderEngine(layout, **options)
+
 def main():
+    parser = argparse.ArgumentParser(description="Interactive 4-stroke engine simulation")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="single", help="cylinder layout (default: single)")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_PATH, default=None, metavar="JSON",
+                        help=f"time every frame phase and write percentiles/histograms to JSON on exit (default {DEFAULT_PROFILE_PATH}); F3 toggles the HUD")
+    parser.add_argument("--collisions", action="store_true", help="particle-particle collisions in the gas")
+    parser.add_argument("--sim-thread", action="store_true", help="run the simulation on its own thread, rendering its latest state snapshot")
+    parser.add_argument("--thermo", action="store_true", help="pressure from the crank-angle-resolved thermodynamic model (Wiebe heat release, valve flow)")
+    parser.add_argument("--spark-advance", type=float, default=DEFAULT_THERMO.spark_advance, metavar="DEG",
+                        help=f"thermo model: spark before firing TDC in degrees (default {DEFAULT_THERMO.spark_advance:g})")
+    parser.add_argument("--burn-duration", type=float, default=DEFAULT_THERMO.burn_duration, metavar="DEG",
+                        help=f"thermo model: combustion duration in degrees (default {DEFAULT_THERMO.burn_duration:g})")
+    parser.add_argument("--record", metavar="FILE", help="record every simulation step to FILE for replay.py")
+    parser.add_argument("--record-particles", action="store_true", help="include the gas particles in the recording (much larger records)")
+    parser.add_argument("--telemetry", nargs="?", const="127.0.0.1:7878", default=None, metavar="ADDRESS",
+                        help="stream engine state to local subscribers on HOST:PORT or unix:PATH (default 127.0.0.1:7878)")
+    parser.add_argument("--telemetry-every", type=int, default=8, metavar="N",
+                        help="send every N-th simulation step to subscribers that do not ask for a rate (default 8)")
+    parser.add_argument("--quality", choices=["auto"] + QUALITY_NAMES, default="auto",
+                        help="render quality; auto (default) lowers and raises it to hold the frame budget")
+    parser.add_argument("--frame-budget", type=float, default=1000.0 / FPS, metavar="MS",
+                        help=f"frame work time the auto quality holds (default {1000.0 / FPS:.1f} ms, i.e. {FPS} FPS)")
+    args = parser.parse_args()
+    if args.burn_duration <= 0: parser.error("--burn-duration must be positive") # The Wiebe function divides by it
+    thermo = DEFAULT_THERMO._replace(spark_advance=args.spark_advance, burn_duration=args.burn_duration) if args.thermo else None
+    PROFILER.enabled = args.profile is not None
+
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("4-Stroke Engine Simulation - Interactive UI")
     clock = pygame.time.Clock()
-    engine = Engine()
+    engine = create_engine(args.layout, particle_collisions=args.collisions, thermo=thermo)
+    if thermo is not None: solve_ahead(engine.cycle_table.params, thermo, MAX_RPM, engine.rpm) # Slider drags then never wait for the solver
+    renderer = LayeredRenderer()
+    simulation = None
+    if args.sim_thread:
+        # The worker simulates its own engine; this one only displays the snapshots it publishes
+        simulation = SimulationThread(create_engine(args.layout, particle_collisions=args.collisions, thermo=thermo))
+        simulation.notify = lambda: pygame.event.post(pygame.event.Event(SNAPSHOT_EVENT)) # Wakes an idle loop for the command's result
+        simulation.start()
+        engine.particle_stepping = "none"
+    recorder = None
+    if args.record:
+        from recording import Recorder # Imported here: only needed when recording
+        simulated = simulation.engine if simulation else engine
+        recorder = simulated.recorder = Recorder(args.record, simulated, args.record_particles)
+    telemetry = None
+    if args.telemetry:
+        from telemetry import TelemetryServer # Imported here: only needed when streaming
+        simulated = simulation.engine if simulation else engine
+        telemetry = simulated.telemetry = TelemetryServer(args.telemetry, max(1, args.telemetry_every)).start()
+
+    def control(method_name, *method_args):
+        """ Engine controls (toggle_pause, reset, step, set_rpm) go to the simulation thread when there is one. """
+        if simulation: simulation.post(method_name, *method_args)
+        else: getattr(engine, method_name)(*method_args)
+
+    def set_quality(quality):
+        """ The displayed engine draws at quality; the simulating one (if separate) steps that share of the gas. """
+        engine.set_quality(quality)
+        if simulation: simulation.post("set_quality", quality)
+
+    auto_quality = args.quality == "auto"
+    governor = QualityGovernor(args.frame_budget, len(QUALITY_LEVELS) - 1 if auto_quality else QUALITY_NAMES.index(args.quality), enabled=auto_quality)
+    if governor.level is not FULL_QUALITY: set_quality(governor.level)
 
     # --- UI State Variables ---
     is_dragging_slider = False
-    # Store UI element rects for click detection (defined within the draw logic for dynamic positioning)
-    # We will get them dynamically within the loop for now
+    ui_draw_state = {'mouse_pos': (0, 0), 'is_dragging_slider': False, 'quality': governor.label()} # Updated in place every frame
+    idle = False # The last frame showed the paused engine, so nothing changes until the next event
 
+    # Everything built so far (pygame, fonts, tables, engine) lives for the whole run: move it out of the
+    # collector's generations so the occasional full collection does not re-scan it (a ~10 ms hitch)
+    gc.collect(); gc.freeze()
     running = True
     while running:
-        dt = clock.tick(FPS) / 1000.0
+        PROFILER.end_frame()
+        if idle:
+            # Paused and nothing animating: sleep in the event queue instead of redrawing at FPS
+            events = [pygame.event.wait()] + pygame.event.get()
+            clock.tick(); PROFILER.restart_frame() # Restarts frame timing; the time spent waiting is not simulated
+            dt = 0.0
+        else:
+            dt = PROFILER.tick(clock, FPS) / 1000.0
+            events = pygame.event.get()
+            quality = None if PROFILER.work_ms is None else governor.observe(PROFILER.work_ms) # Previous frame, without the tick's sleep
+            if quality is not None:
+                set_quality(quality); ui_draw_state['quality'] = governor.label()
         mouse_pos = pygame.mouse.get_pos()
         mouse_pressed = pygame.mouse.get_pressed()
+        layout = panel_layout() # The rects the panel is drawn with
 
         # --- Event Handling ---
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED, pygame.WINDOWEXPOSED):
+                invalidate_panel_layout(); layout = panel_layout()
+                renderer.invalidate()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE: running = False
+                if event.key == pygame.K_F3: PROFILER.toggle_hud()
+                if pygame.K_1 <= event.key <= pygame.K_9 and hasattr(engine, "select_cylinder"):
+                    engine.select_cylinder(event.key - pygame.K_1)
                 # Keep spacebar as alternative toggle? Optional.
                 # if event.key == pygame.K_SPACE: engine.toggle_pause()
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # Left mouse button
-                    # Define button rects based on current draw positions (could be optimized)
-                    # Note: This assumes fixed positions - better to calculate them once before the draw call
-                    # or pass them back from draw if truly dynamic. Using approximate fixed positions for simplicity here.
-                    ui_x = PV_RECT.left # Approx start of UI panel
-                    btn_y_approx = 30 + 35 # Approx Y of buttons
-
-                    play_pause_btn_rect = pygame.Rect(ui_x, btn_y_approx, BUTTON_W, BUTTON_H)
-                    reset_btn_rect = pygame.Rect(play_pause_btn_rect.right + 15, btn_y_approx, BUTTON_W, BUTTON_H)
-                    step_btn_rect = pygame.Rect(reset_btn_rect.right + 15, btn_y_approx, BUTTON_W, BUTTON_H)
-
-                    # RPM Slider Knob Rect (Needs calculation based on current RPM)
-                    slider_base_y = btn_y_approx + BUTTON_H + 15 + 25 # Approx Y of slider bar
-                    slider_base_rect = pygame.Rect(ui_x, slider_base_y, SLIDER_W, SLIDER_H)
-                    rpm_frac = (engine.rpm - MIN_RPM) / max(1, MAX_RPM - MIN_RPM)
-                    knob_x_pos = slider_base_rect.left + rpm_frac * (slider_base_rect.width - SLIDER_KNOB_W)
-                    slider_knob_rect = pygame.Rect(knob_x_pos, slider_base_rect.centery - SLIDER_KNOB_H // 2, SLIDER_KNOB_W, SLIDER_KNOB_H)
-
-
                     # Button Clicks
-                    if play_pause_btn_rect.collidepoint(event.pos):
-                        engine.toggle_pause()
-                    elif reset_btn_rect.collidepoint(event.pos):
-                        engine.reset()
+                    if layout['play_pause'].collidepoint(event.pos):
+                        control("toggle_pause")
+                    elif layout['reset'].collidepoint(event.pos):
+                        control("reset")
                         is_dragging_slider = False # Stop dragging on reset
-                    elif step_btn_rect.collidepoint(event.pos) and engine.paused:
-                        engine.step()
+                    elif layout['step'].collidepoint(event.pos) and engine.paused:
+                        control("step")
                     # Slider Click/Drag Start
-                    elif slider_knob_rect.collidepoint(event.pos):
+                    elif slider_knob_rect(layout['slider'], engine.rpm).collidepoint(event.pos):
                         is_dragging_slider = True
 
 
@@ -573,33 +1254,31 @@ def main():
 
             if event.type == pygame.MOUSEMOTION:
                  if is_dragging_slider and mouse_pressed[0]: # Check if left button is still held
-                    # Define slider rect again (could be optimized)
-                    ui_x = PV_RECT.left
-                    btn_y_approx = 30 + 35
-                    slider_base_y = btn_y_approx + BUTTON_H + 15 + 25
-                    slider_bar_rect = pygame.Rect(ui_x, slider_base_y, SLIDER_W, SLIDER_H)
-
-                    # Update knob position and RPM based on mouse X
-                    relative_x = event.pos[0] - slider_bar_rect.left
-                    new_rpm_fraction = max(0, min(1, relative_x / slider_bar_rect.width))
-                    new_rpm = MIN_RPM + new_rpm_fraction * (MAX_RPM - MIN_RPM)
-                    engine.set_rpm(new_rpm)
+                    control("set_rpm", slider_rpm(layout['slider'], event.pos[0]))
 
 
         # --- Update ---
-        engine.update(dt) # Engine internal update logic
+        if simulation:
+            with PROFILER.phase("snapshot"):
+                snapshot, is_new = simulation.latest()
+                if is_new: engine.read_snapshot(snapshot)
+        else:
+            with PROFILER.phase("update"):
+                engine.update(dt) # Engine internal update logic
 
         # --- Draw ---
-        screen.fill(LIGHT_GRAY)
         # Pass UI state needed for drawing (mouse pos, dragging state)
-        ui_draw_state = {
-            'mouse_pos': mouse_pos,
-            'is_dragging_slider': is_dragging_slider
-        }
-        engine.draw(screen, ui_draw_state)
-
-        pygame.display.flip()
-
+        ui_draw_state['mouse_pos'] = mouse_pos; ui_draw_state['is_dragging_slider'] = is_dragging_slider
+        with PROFILER.phase("render"):
+            update_rects = renderer.render(screen, engine, ui_draw_state)
+        with PROFILER.phase("display"):
+            pygame.display.update(update_rects)
+        idle = engine.paused and not is_dragging_slider
+
+    if simulation: simulation.stop()
+    if recorder: recorder.close()
+    if telemetry: telemetry.stop()
+    if args.profile: PROFILER.dump(args.profile)
     pygame.quit()
     sys.exit()
 
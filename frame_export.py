@@ -0,0 +1,183 @@
+"""
+Headless frame export: renders the simulation offscreen (SDL dummy video driver) at a fixed
+simulated frame rate, as fast as the machine allows, and writes the frames as a PNG sequence
+or a raw RGB24 stream.
+
+Rendering and disk writes overlap: the render loop copies each finished frame into a buffer
+taken from a fixed pool and hands it to a background writer thread through a bounded queue.
+The writer returns the buffer to the pool once it is on disk, so no frame memory is allocated
+after start-up, and a writer that falls behind simply makes the render loop wait for a free buffer.
+
+    python frame_export.py --duration 600 --rpm 300 -o frames/             # frames/frame_000000.png ...
+    python frame_export.py --duration 600 --format raw -o - | ffmpeg -f rawvideo -pix_fmt rgb24 -s 1000x600 -r 60 -i - clip.mp4
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Must be set before pygame.display is initialised
+
+import argparse
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+import engine_sim
+from engine_model import LAYOUTS
+
+DEFAULT_EXPORT_FPS = 60
+FRAME_POOL_SIZE = 8 # Frame buffers shared by the render loop and the writer (bounds memory and queued work)
+PNG_COMPRESSION_LEVEL = 1
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+EXPORT_UI_STATE = {'mouse_pos': (-1, -1), 'is_dragging_slider': False} # No hover highlights in exported frames
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)))
+
+
+class PNGSequenceWriter:
+    """
+    Writes each frame to directory/frame_NNNNNN.png. The PNG is assembled here around one
+    zlib.compress call rather than with pygame.image.save: zlib releases the GIL while it
+    compresses, so encoding overlaps with rendering, and level 1 is several times faster
+    than the default for a few percent larger files.
+    """
+    def __init__(self, directory, size, compression=PNG_COMPRESSION_LEVEL):
+        self.directory = directory; self.compression = compression
+        width, height = size
+        os.makedirs(directory, exist_ok=True)
+        self.header = PNG_SIGNATURE + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) # 8-bit RGB
+        self.footer = _png_chunk(b"IEND", b"")
+        self.scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8) # Filter byte 0 (None) + one RGB row per line
+
+    def write(self, index, frame):
+        self.scanlines[:, 1:] = frame.reshape(len(frame), -1)
+        data = _png_chunk(b"IDAT", zlib.compress(self.scanlines, self.compression))
+        with open(os.path.join(self.directory, f"frame_{index:06d}.png"), "wb") as file:
+            file.write(self.header); file.write(data); file.write(self.footer)
+
+    def close(self):
+        pass
+
+
+class RawRGBWriter:
+    """ Appends frames as packed RGB24 rows (top to bottom) to a file, or to stdout for "-". """
+    def __init__(self, path, size):
+        self.size = size
+        self.stream = sys.stdout.buffer if path == "-" else open(path, "wb")
+
+    def write(self, index, frame):
+        self.stream.write(frame)
+
+    def close(self):
+        self.stream.flush()
+        if self.stream is not sys.stdout.buffer: self.stream.close()
+
+
+class FrameExporter:
+    """
+    Bounded producer/consumer pipeline. submit(surface) copies the surface into a pooled
+    (height, width, 3) uint8 buffer and queues it; a daemon thread writes queued frames in
+    order with writer.write(index, buffer) and releases the buffers. Errors raised by the
+    writer are re-raised in the render thread on the next submit() or on close().
+    """
+    def __init__(self, writer, size, pool_size=FRAME_POOL_SIZE):
+        self.writer = writer
+        width, height = size
+        self.free = queue.Queue()
+        for _ in range(pool_size):
+            self.free.put(np.empty((height, width, 3), dtype=np.uint8))
+        self.pending = queue.Queue(maxsize=pool_size)
+        self.frames_submitted = 0
+        self.wait_seconds = 0.0 # Time the render loop spent waiting for a free buffer (writer-bound when large)
+        self.error = None
+        self.thread = threading.Thread(target=self._drain, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, surface):
+        if self.error is not None: raise self.error
+        start = time.perf_counter()
+        frame = self.free.get()
+        self.wait_seconds += time.perf_counter() - start
+        pixels = pygame.surfarray.pixels3d(surface) # (width, height, 3) view of the surface, no copy
+        np.copyto(frame, pixels.transpose(1, 0, 2))
+        del pixels # Unlocks the surface
+        self.pending.put((self.frames_submitted, frame))
+        self.frames_submitted += 1
+
+    def _drain(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            index, frame = item
+            try:
+                if self.error is None: self.writer.write(index, frame)
+            except Exception as error: # Surfaced to the render thread; keep draining so it never blocks
+                self.error = error
+            self.free.put(frame)
+
+    def close(self):
+        """ Waits for every queued frame to be written, then closes the writer. """
+        self.pending.put(None)
+        self.thread.join()
+        self.writer.close()
+        if self.error is not None: raise self.error
+
+
+def export(engine, exporter, frame_count, fps=DEFAULT_EXPORT_FPS, size=(engine_sim.WIDTH, engine_sim.HEIGHT), progress=None):
+    """
+    Renders frame_count frames of the running engine, advancing simulated time by exactly 1/fps
+    per frame regardless of how long rendering takes, and submits each one to the exporter.
+    progress(frames_done) is called after every frame if given.
+    """
+    screen = pygame.Surface(size)
+    renderer = engine_sim.LayeredRenderer()
+    if engine.paused: engine.toggle_pause()
+    frame_dt = 1.0 / fps
+    for frame_index in range(frame_count):
+        engine.update(frame_dt)
+        renderer.render(screen, engine, EXPORT_UI_STATE) # Dirty rects are irrelevant offscreen; the surface holds the full frame
+        exporter.submit(screen)
+        if progress: progress(frame_index + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the simulation offscreen to a PNG sequence or a raw RGB24 stream.")
+    parser.add_argument("-o", "--output", required=True, help="output directory (png) or file, '-' for stdout (raw)")
+    parser.add_argument("--format", choices=("png", "raw"), default="png")
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated seconds to export (default 10)")
+    parser.add_argument("--fps", type=int, default=DEFAULT_EXPORT_FPS, help=f"frames per simulated second (default {DEFAULT_EXPORT_FPS})")
+    parser.add_argument("--rpm", type=float, default=60.0)
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="single", help="cylinder layout (default: single)")
+    parser.add_argument("--collisions", action="store_true", help="particle-particle collisions in the gas")
+    parser.add_argument("--pool-size", type=int, default=FRAME_POOL_SIZE, help="frame buffers in flight")
+    args = parser.parse_args(argv)
+    if args.format == "png" and args.output == "-":
+        parser.error("PNG sequences need an output directory")
+
+    pygame.init()
+    size = (engine_sim.WIDTH, engine_sim.HEIGHT)
+    engine = engine_sim.create_engine(args.layout, particle_collisions=args.collisions); engine.set_rpm(args.rpm)
+    writer = PNGSequenceWriter(args.output, size) if args.format == "png" else RawRGBWriter(args.output, size)
+    exporter = FrameExporter(writer, size, args.pool_size)
+    frame_count = int(round(args.duration * args.fps))
+    start = time.perf_counter()
+    try:
+        export(engine, exporter, frame_count, args.fps, size)
+    finally:
+        exporter.close()
+        pygame.quit()
+    elapsed = time.perf_counter() - start
+    print(f"{frame_count} frames ({frame_count / args.fps:.1f} s of video) in {elapsed:.1f} s "
+          f"({frame_count / args.fps / max(elapsed, 1e-9):.1f}x real time, {exporter.wait_seconds:.1f} s waiting on the writer)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
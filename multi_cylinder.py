@@ -0,0 +1,271 @@
+"""
+Multi-cylinder engines: inline-3/4/6, V6 and V8 with firing order and crank phase offsets.
+
+Every cylinder runs the same 720 degree cycle as the single-cylinder Engine, lagging the
+crank by its phase offset (engine_model.cylinder_phase_offsets). Per-cylinder state lives in
+NumPy arrays and is advanced with one batched table lookup per simulation step; the gas of
+all cylinders is one grouped ParticleSystem. Cylinders are drawn side by side at a reduced
+scale (V engines unrolled, banks told apart by head color). The panel readouts, description
+and PV plot follow the selected cylinder.
+"""
+import math
+import random
+
+import numpy as np
+import pygame
+
+from engine_model import (LAYOUTS, CYCLE_EVENTS, DEFAULT_PARAMS, CycleState, STROKE_NAMES, STROKE_COMPRESSION, cylinder_phase_offsets,
+                          TIMER_FRAMES_PER_SECOND)
+from particles import ParticleSystem
+from pv_history import PVHistory
+from engine_sim import (Engine, draw_text, PROFILER, FLASH_SURFACE, PARTICLE_SPRITES, PV_RECT, PV_POINT_HISTORY, HEIGHT, STEP_ANGLE_DEGREES, SPARK_DURATION_FRAMES,
+                        CYLINDER_CENTER_X, CYLINDER_TOP_Y, CYLINDER_WIDTH, PISTON_HEIGHT, CRANK_RADIUS,
+                        CRANKSHAFT_CENTER_X, CRANKSHAFT_CENTER_Y, NUM_PARTICLES, PARTICLE_RADIUS,
+                        COMBUSTION_FADE_DURATION, COMBUSTION_FLASH_DURATION,
+                        VALVE_SIZE, VALVE_Y, VALVE_LIFT, INTAKE_VALVE_X, EXHAUST_VALVE_X,
+                        SPARK_PLUG_X, SPARK_PLUG_Y, SPARK_TIP_Y,
+                        WHITE, BLACK, GRAY, DARK_GRAY, RED, BLUE, YELLOW,
+                        CYLINDER_COLOR, PISTON_COLOR, CONROD_COLOR, CRANK_COLOR)
+
+# --- Layout on screen ---
+MECHANISM_RECT = pygame.Rect(10, 0, PV_RECT.left - 30, HEIGHT) # Area the cylinders are spread over
+NATURAL_PITCH = 160 # Horizontal room one cylinder needs at full scale
+SCALE_ANCHOR_Y = VALVE_Y - 30 # Drawings are scaled towards this line (top of the valve springs)
+BANK_COLORS = (CYLINDER_COLOR, (170, 180, 205)) # Head/wall color of bank A and bank B
+
+# --- Cycle events as arrays ---
+EVENT_NAMES = [name for _, name in CYCLE_EVENTS]
+IGNITION_EVENT = EVENT_NAMES.index("Ignition")
+
+
+class MultiCylinderEngine(Engine):
+    def __init__(self, layout="inline-4", particle_seed=None, particle_collisions=False, thermo=None, params=DEFAULT_PARAMS):
+        self.layout = LAYOUTS[layout] if isinstance(layout, str) else layout
+        super().__init__(particle_seed, particle_collisions, thermo, params)
+
+    def reset(self):
+        """ Resets all cylinders; cylinder 1 starts at BDC like the single-cylinder engine. """
+        count = self.cylinder_count = len(self.layout.firing_order)
+        self.phase_offsets = cylinder_phase_offsets(self.layout)
+        self.event_angles = np.array([angle for angle, _ in self.cycle_events]) # In EVENT_NAMES order
+        self.selected_cylinder = 0 # Index of the cylinder shown on the panel
+        self.cylinder_angles = np.zeros(count)
+        self.cylinder_strokes = np.zeros(count, dtype=np.int8)
+        self.cylinder_spark_timers = np.zeros(count); self.cylinder_combustion_timers = np.zeros(count)
+        self.cylinder_state = None # CycleState of arrays (one entry per cylinder), set by every update
+
+        # Drawing transform: model x -> centers[i] + scale * (x - CYLINDER_CENTER_X), y -> anchor + scale * (y - anchor)
+        pitch = MECHANISM_RECT.width / count
+        self.draw_scale = min(1.0, pitch / NATURAL_PITCH)
+        self.cylinder_centers = [MECHANISM_RECT.left + pitch * (i + 0.5) for i in range(count)]
+        self.cylinder_center_array = np.array(self.cylinder_centers) # For indexing by particle group
+        super().reset()
+        self.pv_channel = self.selected_cylinder
+
+    def create_particles(self, bounds):
+        return ParticleSystem.grouped(NUM_PARTICLES, [bounds] * self.cylinder_count, self.particle_seed, self.particle_collisions)
+
+    def create_pv_history(self):
+        return PVHistory(PV_POINT_HISTORY, channels=self.cylinder_count)
+
+    def select_cylinder(self, index):
+        """ Shows cylinder index (0-based) on the panel and PV plot. """
+        if 0 <= index < self.cylinder_count and index != self.selected_cylinder:
+            self.selected_cylinder = self.pv_channel = index
+            self.pv_plot = None
+            self.mirror_selected_cylinder()
+
+    def perform_update_calculations(self, dt, is_step=False):
+        """ Batched version of Engine.perform_update_calculations: every cylinder in one pass. """
+        # --- Angle Update ---
+        old_angle = self.crank_angle; delta_angle = 0.0
+        if not self.paused and not is_step:
+            delta_angle = self.rpm * 360 / 60 * dt
+        elif is_step:
+            delta_angle = STEP_ANGLE_DEGREES
+        self.crank_angle = (old_angle + delta_angle) % 720
+        step_start_time = self.sim_time
+        self.sim_time += dt
+        timer_ticks = 1 if is_step else dt * TIMER_FRAMES_PER_SECOND
+
+        # --- Cycle Events (offsets of every event from every cylinder's old angle) ---
+        old_cylinder_angles = self.cylinder_angles
+        self.cylinder_angles = (self.crank_angle - self.phase_offsets) % 720
+        ignited = np.zeros(self.cylinder_count, dtype=bool)
+        if delta_angle > 0:
+            offsets = (self.event_angles - old_cylinder_angles[:, None]) % 720.0
+            crossed = (offsets > 0.0) & (offsets <= delta_angle)
+            if crossed.any():
+                cylinders, events = np.nonzero(crossed)
+                fractions = offsets[cylinders, events] / delta_angle
+                for order in np.argsort(fractions, kind="stable").tolist():
+                    self.events.append((step_start_time + dt * fractions[order],
+                                        f"{EVENT_NAMES[events[order]]} (cyl {cylinders[order] + 1})"))
+                ignited = crossed[:, IGNITION_EVENT]
+
+        # --- Kinematics, Volume & Pressure (one table lookup for all cylinders) ---
+        state = self.cylinder_state = self.cycle_table.lookup(self.cylinder_angles)
+        if self.thermo_table is not None:
+            state = self.cylinder_state = state._replace(pressure=self.thermo_table.pressure(self.cylinder_angles))
+        self.cylinder_strokes = state.stroke
+
+        # --- Combustion & Spark Timers ---
+        np.maximum(self.cylinder_combustion_timers - timer_ticks, 0.0, out=self.cylinder_combustion_timers)
+        np.maximum(self.cylinder_spark_timers - timer_ticks, 0.0, out=self.cylinder_spark_timers)
+        if ignited.any():
+            ticks_since_ignition = (1 - offsets[:, IGNITION_EVENT] / delta_angle) * timer_ticks
+            self.cylinder_spark_timers[ignited] = SPARK_DURATION_FRAMES - ticks_since_ignition[ignited]
+            self.cylinder_combustion_timers[ignited] = np.maximum(0.0, COMBUSTION_FADE_DURATION - ticks_since_ignition[ignited])
+            if self.thermo_table is None: state.pressure[ignited & (state.stroke == STROKE_COMPRESSION)] = self.params.max_pressure_power
+        self.mirror_selected_cylinder()
+
+        # --- Store PV Data Point (all cylinders per sample) ---
+        if not self.paused or is_step:
+            if old_angle + delta_angle >= 720: self.pv_data.start_cycle()
+            self.pv_data.append(state.volume, state.pressure, self.cylinder_angles)
+            if self.recorder is not None: self.recorder.record(self)
+            if self.telemetry is not None: self.telemetry.publish(self)
+
+    def mirror_selected_cylinder(self):
+        """ Copies the selected cylinder's state into the scalar attributes the panel draws from. """
+        state = self.cylinder_state; i = self.selected_cylinder
+        self.crank_pin_x = float(state.crank_pin_x[i]); self.crank_pin_y = float(state.crank_pin_y[i])
+        self.piston_pin_y = float(state.piston_pin_y[i]); self.piston_y = float(state.piston_y[i])
+        self.cylinder_volume = float(state.volume[i]); self.pressure = float(state.pressure[i])
+        self.stroke = STROKE_NAMES[state.stroke[i]]
+        self.intake_valve_open = bool(state.intake_valve_open[i]); self.exhaust_valve_open = bool(state.exhaust_valve_open[i])
+        self.spark_timer = float(self.cylinder_spark_timers[i]); self.spark_firing = self.spark_timer > 0
+        self.combustion_timer = float(self.cylinder_combustion_timers[i])
+
+    def panel_angle(self):
+        return float(self.cylinder_angles[self.selected_cylinder])
+
+    def step_particles(self):
+        """ Advances the gas of every cylinder by one nominal frame, each inside its own chamber. """
+        state = self.cylinder_state
+        chamber_left = CYLINDER_CENTER_X - CYLINDER_WIDTH // 2; chamber_right = chamber_left + CYLINDER_WIDTH
+        strokes = [STROKE_NAMES[stroke] for stroke in state.stroke.tolist()]
+        self.particles.step_groups([(chamber_left, CYLINDER_TOP_Y, chamber_right, max(CYLINDER_TOP_Y + 1, y)) for y in state.piston_y.tolist()],
+                                   strokes, self.cylinder_combustion_timers.tolist())
+
+    # --- state snapshots ---
+    def snapshot_arrays(self):
+        arrays = super().snapshot_arrays()
+        arrays.update(('cylinder_' + name, array) for name, array in self.cylinder_state._asdict().items())
+        arrays.update(cylinder_angles=self.cylinder_angles, cylinder_spark_timers=self.cylinder_spark_timers,
+                      cylinder_combustion_timers=self.cylinder_combustion_timers)
+        return arrays
+
+    def read_snapshot(self, snapshot):
+        """ Per-cylinder state from the snapshot; the panel then mirrors this engine's own selected cylinder. """
+        super().read_snapshot(snapshot)
+        arrays = snapshot.arrays
+        self.cylinder_state = CycleState(**{name: arrays['cylinder_' + name] for name in CycleState._fields})
+        self.cylinder_angles = arrays['cylinder_angles']; self.cylinder_strokes = self.cylinder_state.stroke
+        self.cylinder_spark_timers = arrays['cylinder_spark_timers']; self.cylinder_combustion_timers = arrays['cylinder_combustion_timers']
+        self.mirror_selected_cylinder()
+
+    # --- draw methods ---
+    def to_screen(self, index, x, y):
+        """ Model coordinates of cylinder index -> screen coordinates. """
+        s = self.draw_scale
+        return self.cylinder_centers[index] + s * (x - CYLINDER_CENTER_X), SCALE_ANCHOR_Y + s * (y - SCALE_ANCHOR_Y)
+
+    def scaled_rect(self, index, x, y, w, h):
+        left, top = self.to_screen(index, x, y)
+        return pygame.Rect(int(left), int(top), max(1, int(w * self.draw_scale)), max(1, int(h * self.draw_scale)))
+
+    def draw_static_mechanism(self, screen):
+        s = self.draw_scale; layout = self.layout
+        # Shared crankcase and crankshaft
+        left = self.to_screen(0, CYLINDER_CENTER_X - NATURAL_PITCH / 2, 0)[0]
+        right = self.to_screen(self.cylinder_count - 1, CYLINDER_CENTER_X + NATURAL_PITCH / 2, 0)[0]
+        case_top = self.to_screen(0, 0, self.tdc_y + PISTON_HEIGHT)[1]
+        pygame.draw.rect(screen, DARK_GRAY, (left, case_top, right - left, HEIGHT))
+        shaft_y = self.to_screen(0, 0, CRANKSHAFT_CENTER_Y)[1]
+        pygame.draw.line(screen, GRAY, (left, shaft_y), (right, shaft_y), max(2, int(8 * s)))
+        wall_thickness = max(2, int(8 * s)); head_base_y = CYLINDER_TOP_Y - 30
+        for i in range(self.cylinder_count):
+            color = BANK_COLORS[layout.banks[i]]
+            # Cylinder/Head
+            head = self.scaled_rect(i, CYLINDER_CENTER_X - CYLINDER_WIDTH // 2 - 8, head_base_y, CYLINDER_WIDTH + 16, CYLINDER_TOP_Y - head_base_y + 4)
+            pygame.draw.rect(screen, color, head)
+            for wall_x in (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_CENTER_X + CYLINDER_WIDTH // 2):
+                pygame.draw.line(screen, color, self.to_screen(i, wall_x, CYLINDER_TOP_Y), self.to_screen(i, wall_x, self.bdc_y + PISTON_HEIGHT + 10), wall_thickness)
+            # Spark Plug body
+            pygame.draw.line(screen, DARK_GRAY, self.to_screen(i, SPARK_PLUG_X, SPARK_PLUG_Y), self.to_screen(i, SPARK_PLUG_X, SPARK_TIP_Y), max(1, int(4 * s)))
+            # Cylinder number (and bank for V engines)
+            label = f"{i + 1}" + (" AB"[layout.banks[i] + 1] if layout.bank_angle else "")
+            x, y = self.to_screen(i, CRANKSHAFT_CENTER_X, CRANKSHAFT_CENTER_Y + CRANK_RADIUS + 25)
+            draw_text(screen, label, 18, x, y, WHITE, align="center")
+        # Layout name and firing order
+        title = f"{layout.name}  firing order {'-'.join(map(str, layout.firing_order))}"
+        if layout.bank_angle: title += f"  ({layout.bank_angle:.0f}° V, drawn unrolled)"
+        draw_text(screen, title, 20, MECHANISM_RECT.left + 5, 8, BLACK, align="topleft")
+        draw_text(screen, f"Keys 1-{self.cylinder_count}: cylinder shown on the panel", 16, MECHANISM_RECT.left + 5, 30, DARK_GRAY, align="topleft")
+
+    def draw_mechanism(self, screen, mark):
+        """ Moving parts of every cylinder, drawn from the per-cylinder state arrays. """
+        state = self.cylinder_state; s = self.draw_scale
+        chamber_left = CYLINDER_CENTER_X - CYLINDER_WIDTH // 2; chamber_right = chamber_left + CYLINDER_WIDTH
+        piston_y = state.piston_y.tolist(); piston_pin_y = state.piston_pin_y.tolist()
+        crank_pin_x = state.crank_pin_x.tolist(); crank_pin_y = state.crank_pin_y.tolist()
+        combustion_timers = self.cylinder_combustion_timers.tolist()
+        flash_start = COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION
+
+        # Gas of all cylinders in one batched step
+        with PROFILER.phase("particles"):
+            if self.particle_stepping == "draw": self.step_particles()
+            self.draw_particles(screen)
+
+        for i in range(self.cylinder_count):
+            # Combustion Flash
+            chamber = self.scaled_rect(i, chamber_left, CYLINDER_TOP_Y, CYLINDER_WIDTH, max(1, piston_y[i] - CYLINDER_TOP_Y))
+            mark(chamber.inflate(2 * PARTICLE_RADIUS + 2, 2 * PARTICLE_RADIUS + 2))
+            if combustion_timers[i] > flash_start:
+                FLASH_SURFACE.blend_fill(screen, chamber, (255, 255, 100, int(150 * (combustion_timers[i] - flash_start) / COMBUSTION_FLASH_DURATION)))
+            # Crankshaft
+            center = self.to_screen(i, CRANKSHAFT_CENTER_X, CRANKSHAFT_CENTER_Y); pin = self.to_screen(i, crank_pin_x[i], crank_pin_y[i])
+            counter_weight_angle_rad = math.radians((self.cylinder_angles[i] % 360) + 180); counter_weight_radius = CRANK_RADIUS * 0.9 * s
+            try: mark(pygame.draw.arc(screen, CRANK_COLOR, (center[0] - counter_weight_radius, center[1] - counter_weight_radius, 2 * counter_weight_radius, 2 * counter_weight_radius),
+                                      counter_weight_angle_rad - math.pi / 2, counter_weight_angle_rad + math.pi / 2, max(1, int(counter_weight_radius // 1.2))))
+            except ValueError: pass
+            mark(pygame.draw.circle(screen, DARK_GRAY, center, 15 * s))
+            mark(pygame.draw.line(screen, CRANK_COLOR, center, pin, max(1, int(12 * s))))
+            mark(pygame.draw.circle(screen, GRAY, pin, 8 * s))
+            # Conrod
+            piston_pin = self.to_screen(i, CYLINDER_CENTER_X, piston_pin_y[i])
+            mark(pygame.draw.line(screen, CONROD_COLOR, piston_pin, pin, max(1, int(10 * s))))
+            # Piston
+            piston_rect = self.scaled_rect(i, chamber_left, piston_y[i], CYLINDER_WIDTH, PISTON_HEIGHT)
+            mark(pygame.draw.rect(screen, PISTON_COLOR, piston_rect)); pygame.draw.rect(screen, DARK_GRAY, piston_rect, max(1, int(2 * s)))
+            pygame.draw.circle(screen, GRAY, piston_pin, 6 * s)
+            # Valves
+            for valve_x, is_open, open_color in ((INTAKE_VALVE_X, state.intake_valve_open[i], BLUE), (EXHAUST_VALVE_X, state.exhaust_valve_open[i], RED)):
+                valve_rect = self.scaled_rect(i, valve_x - VALVE_SIZE // 2, VALVE_Y - (VALVE_LIFT if is_open else 0), VALVE_SIZE, VALVE_SIZE)
+                mark(pygame.draw.rect(screen, open_color if is_open else DARK_GRAY, valve_rect))
+                mark(pygame.draw.line(screen, DARK_GRAY, valve_rect.midtop, (valve_rect.centerx, valve_rect.top - 15 * s), max(1, int(3 * s))))
+            # Spark
+            if self.cylinder_spark_timers[i] > 0:
+                spark_center = self.to_screen(i, SPARK_PLUG_X, SPARK_TIP_Y + 7); outer_radius = 12 * s; inner_radius = 5 * s
+                rays = 2 * self.quality.spark_points
+                for k in range(rays):
+                    radius = outer_radius if k % 2 == 0 else inner_radius; angle = math.pi * 2 * k / rays - math.pi / 2
+                    pygame.draw.line(screen, YELLOW, spark_center, (spark_center[0] + radius * math.cos(angle), spark_center[1] + radius * math.sin(angle)), random.randint(1, 2))
+                mark(pygame.Rect(spark_center[0] - outer_radius - 2, spark_center[1] - outer_radius - 2, 2 * outer_radius + 4, 2 * outer_radius + 4))
+
+        # Selected cylinder marker
+        x, y = self.to_screen(self.selected_cylinder, CRANKSHAFT_CENTER_X, CRANKSHAFT_CENTER_Y + CRANK_RADIUS + 25)
+        mark(pygame.draw.rect(screen, YELLOW, (x - 14, y - 4, 28, 26), 2, border_radius=4))
+
+    def draw_annotations(self, screen, mark):
+        """ No part labels: the cylinders are too small for them. """
+
+    def draw_particles(self, screen):
+        """ Visible particles of every cylinder, mapped through each cylinder's drawing transform. """
+        particles = self.particles; s = self.draw_scale
+        visible = particles.visible()
+        centers = self.cylinder_center_array[particles.group[visible]]
+        xs = (centers + s * (particles.x[visible] - CYLINDER_CENTER_X)).astype(np.intp)
+        ys = (SCALE_ANCHOR_Y + s * (particles.y[visible] - SCALE_ANCHOR_Y)).astype(np.intp)
+        PARTICLE_SPRITES.draw(screen, xs, ys, particles.color_index[visible], max(1.0, PARTICLE_RADIUS * s))
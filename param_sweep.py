@@ -0,0 +1,136 @@
+"""
+Headless parameter sweep (no pygame).
+
+Evaluates the cycle model over the Cartesian product of value grids for RPM and any
+EngineParams field, across a process pool, and streams one row per operating point
+(indicated work, IMEP, peak pressure and its cycle angle, indicated power) to CSV or
+JSON Lines as chunks finish. Points are generated lazily and only a bounded number of
+chunks is in flight, so memory stays flat however large the grid.
+
+Grid values are a comma list ("1.3,1.35,1.4") or start:stop:count ("10:60:11", inclusive).
+
+    python param_sweep.py --rpm 600:6000:10 --power-exponent 1.2:1.4:21 --max-pressure-power 30,50,70 -o sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+
+import numpy as np
+
+from engine_model import DEFAULT_PARAMS, EngineParams, cycle_metrics
+
+DEFAULT_RPM = 60
+DEFAULT_CHUNK_SIZE = 256 # Points per task; large enough to amortize inter-process overhead
+CHUNKS_IN_FLIGHT_PER_WORKER = 4 # Bounds queued work (and memory) while keeping every worker busy
+INTEGRATION_SAMPLES_PER_DEGREE = 4
+FIELDS = ("point", "rpm") + EngineParams._fields + ("indicated_work", "imep", "peak_pressure", "peak_pressure_angle", "indicated_power")
+
+
+def parse_grid(text):
+    """ "a,b,c" -> [a, b, c]; "start:stop:count" -> count evenly spaced values, both ends included. """
+    if ":" in text:
+        start, stop, count = text.split(":")
+        return np.linspace(float(start), float(stop), int(count)).tolist()
+    return [float(value) for value in text.split(",")]
+
+
+@lru_cache(maxsize=1024)
+def _metrics(params, samples_per_degree):
+    return cycle_metrics(params, samples_per_degree) # RPM does not change the loop, so points that differ only in RPM share it
+
+
+def evaluate_chunk(chunk, samples_per_degree=INTEGRATION_SAMPLES_PER_DEGREE):
+    """ Worker: [(point, rpm, params), ...] -> list of result rows (tuples in FIELDS order). """
+    rows = []
+    for point, rpm, params in chunk:
+        metrics = _metrics(params, samples_per_degree)
+        indicated_power = metrics.indicated_work * rpm / 120.0 # One cycle per two revolutions, per second
+        rows.append((point, rpm) + tuple(params) + tuple(metrics) + (indicated_power,))
+    return rows
+
+
+def grid_points(rpm_values, field_values):
+    """ Lazily yields (point, rpm, EngineParams) over the product of the grids (RPM varies fastest). """
+    names = list(field_values)
+    for point, values in enumerate(itertools.product(*(field_values[name] for name in names), rpm_values)):
+        yield point, values[-1], DEFAULT_PARAMS._replace(**dict(zip(names, values[:-1])))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def run_sweep(points, write_rows, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, samples_per_degree=INTEGRATION_SAMPLES_PER_DEGREE):
+    """
+    Evaluates points (an iterable of (point, rpm, params)) and calls write_rows(rows) as each chunk
+    finishes (completion order, not point order). workers=1 runs in-process. Returns the point count.
+    """
+    count = 0
+    if workers == 1:
+        for chunk in chunked(points, chunk_size):
+            rows = evaluate_chunk(chunk, samples_per_degree); write_rows(rows); count += len(rows)
+        return count
+    workers = workers or os.cpu_count()
+    max_pending = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunked(points, chunk_size):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows = future.result(); write_rows(rows); count += len(rows)
+            pending.add(pool.submit(evaluate_chunk, chunk, samples_per_degree))
+        for future in wait(pending).done:
+            rows = future.result(); write_rows(rows); count += len(rows)
+    return count
+
+
+class RowWriter:
+    """ Streams result rows to a text file as CSV (with header) or JSON Lines. """
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        if output_format == "csv":
+            self.csv = csv.writer(stream); self.csv.writerow(FIELDS)
+
+    def __call__(self, rows):
+        if self.output_format == "csv":
+            self.csv.writerows(rows)
+        else:
+            self.stream.writelines(json.dumps(dict(zip(FIELDS, row))) + "\n" for row in rows)
+        self.stream.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the cycle model over parameter grids (indicated work, IMEP, peak pressure).")
+    parser.add_argument("--rpm", type=parse_grid, default=[DEFAULT_RPM], help=f"RPM grid (default {DEFAULT_RPM})")
+    for name in EngineParams._fields:
+        parser.add_argument("--" + name.replace("_", "-"), dest=name, type=parse_grid, default=None,
+                            help=f"grid for {name} (default {getattr(DEFAULT_PARAMS, name)})")
+    parser.add_argument("-o", "--output", default="-", help="output file (default stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="output format (default from the file extension, else csv)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores; 1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--samples-per-degree", type=int, default=INTEGRATION_SAMPLES_PER_DEGREE, help="integration resolution")
+    args = parser.parse_args(argv)
+
+    field_values = {name: getattr(args, name) for name in EngineParams._fields if getattr(args, name) is not None}
+    output_format = args.format or ("jsonl" if args.output.endswith((".jsonl", ".json")) else "csv")
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        count = run_sweep(grid_points(args.rpm, field_values), RowWriter(stream, output_format),
+                          args.workers, args.chunk_size, args.samples_per_degree)
+    finally:
+        if stream is not sys.stdout: stream.close()
+    print(f"{count} points", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Structure-of-arrays gas particle system (no pygame).
+
+Same behaviour as the per-object Particle class in engine_sim.py, but positions,
+velocities and color indices live in contiguous NumPy arrays and every rule
+(random acceleration, speed clamp, friction, wall reflection, combustion color
+fade) is applied to all particles at once.
+
+Optional particle-particle collisions use a uniform spatial-hash grid with cells one particle
+diameter wide, rebuilt every step as a compressed (CSR) cell list: particles are sorted by
+(group, cell) with one integer sort, and each cell is the run [start, start + count) of that
+order. Every particle is tested against the members after it in its own cell and against all
+members of the 4 forward neighbour cells (HALF_NEIGHBOR_OFFSETS), so each pair is seen once.
+Cells hold any number of particles: work per step grows with n times the local density, and
+no overlapping pair is ever missed however far the piston squeezes the gas.
+"""
+import numpy as np
+
+# --- Particle Constants ---
+NUM_PARTICLES = 150; PARTICLE_RADIUS = 2.5; MAX_PARTICLE_SPEED = 2.5; PARTICLE_ACCEL_FACTOR = 0.05
+PARTICLE_EXPANSION_ACCEL = 0.08; PARTICLE_FRICTION = 0.99; COMBUSTION_SPEED_MULTIPLIER = 2.5
+COMBUSTION_FLASH_DURATION = 8; COMBUSTION_FADE_DURATION = 40
+
+# --- Collision Grid ---
+COLLISION_CELL_SIZE = 2 * PARTICLE_RADIUS # One diameter: touching particles are always in the same or adjacent cells
+COLLISION_RESTITUTION = 1.0 # 1.0 = elastic
+HALF_NEIGHBOR_OFFSETS = np.array([(0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]) # Own cell first; the other 4 are reached from their mirror
+
+# --- Gas Colors ---
+YELLOW = (255, 255, 0); BRIGHT_ORANGE = (255, 100, 0)
+GAS_INTAKE_COLOR = (173, 216, 230); GAS_COMPRESSED_COLOR = (100, 149, 237); GAS_COMBUSTION_START_COLOR = YELLOW
+GAS_COMBUSTION_MID_COLOR = BRIGHT_ORANGE; GAS_EXHAUST_COLOR = (169, 169, 169)
+
+# --- Color Palette ---
+# Fixed entries for the plain strokes, followed by the combustion fade from MID (level 0) to START (last level)
+COLOR_INTAKE, COLOR_COMPRESSED, COLOR_EXHAUST = range(3)
+COMBUSTION_FADE_LEVELS = 33
+COLOR_COMBUSTION_MID = 3
+COLOR_COMBUSTION_START = COLOR_COMBUSTION_MID + COMBUSTION_FADE_LEVELS - 1
+
+
+def build_palette():
+    """ (N, 3) uint8 array of every color a particle can take, indexed by the COLOR_* constants. """
+    fade = np.linspace(0.0, 1.0, COMBUSTION_FADE_LEVELS)[:, None]
+    mid = np.array(GAS_COMBUSTION_MID_COLOR, dtype=np.float64); start = np.array(GAS_COMBUSTION_START_COLOR, dtype=np.float64)
+    combustion = (mid + (start - mid) * fade).astype(np.uint8) # Truncates like the scalar int() version
+    fixed = np.array([GAS_INTAKE_COLOR, GAS_COMPRESSED_COLOR, GAS_EXHAUST_COLOR], dtype=np.uint8)
+    return np.concatenate([fixed, combustion])
+
+
+PALETTE = build_palette()
+
+
+def gas_color_index(stroke, combustion_timer):
+    """ Palette index for the gas in the given stroke (mirrors Particle.move_and_draw's color rules). """
+    if stroke == "Intake": return COLOR_INTAKE
+    if stroke == "Compression": return COLOR_COMPRESSED
+    if stroke == "Exhaust": return COLOR_EXHAUST
+    # Power
+    if combustion_timer <= 0: return COLOR_COMBUSTION_MID
+    if combustion_timer > (COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION): return COLOR_COMBUSTION_START
+    fade_ratio = max(0, combustion_timer - COMBUSTION_FLASH_DURATION) / (COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION)
+    return COLOR_COMBUSTION_MID + int(fade_ratio * (COMBUSTION_FADE_LEVELS - 1))
+
+
+class ParticleSystem:
+    def __init__(self, count, bounds, seed=None, collisions=False):
+        """
+        bounds is (left, top, right, bottom) of the region the particles start in (scalars or per-particle arrays).
+        collisions enables elastic particle-particle collisions (particles of different groups never collide).
+        """
+        self.rng = np.random.default_rng(seed)
+        self.collisions = collisions
+        left, top, right, bottom = bounds
+        self.x = self.rng.uniform(left + PARTICLE_RADIUS, right - PARTICLE_RADIUS, count)
+        self.y = self.rng.uniform(top + PARTICLE_RADIUS, bottom - PARTICLE_RADIUS, count)
+        self.vx = self.rng.uniform(-MAX_PARTICLE_SPEED / 2, MAX_PARTICLE_SPEED / 2, count)
+        self.vy = self.rng.uniform(-MAX_PARTICLE_SPEED / 2, MAX_PARTICLE_SPEED / 2, count)
+        self.color_index = np.full(count, COLOR_INTAKE, dtype=np.uint8)
+        self.group = np.zeros(count, dtype=np.intp) # Region (e.g. cylinder) each particle belongs to
+        self.top = top; self.bottom = bottom # Vertical extent used by the last step, for visible()
+        self.active = count # Particles [0, active) are stepped and drawn; the rest keep their state until reactivated
+
+    @classmethod
+    def grouped(cls, count_per_group, group_bounds, seed=None, collisions=False):
+        """ One system for several regions: count_per_group particles in each of group_bounds[g] = (left, top, right, bottom). """
+        group = np.tile(np.arange(len(group_bounds)), count_per_group) # Interleaved, so any active prefix is shared evenly
+        bounds = np.asarray(group_bounds, dtype=np.float64)[group]
+        system = cls(len(group), bounds.T, seed, collisions)
+        system.group = group
+        return system
+
+    def __len__(self):
+        return len(self.x)
+
+    def step(self, bounds, stroke, combustion_timer):
+        """ Advances every particle by one frame inside bounds = (left, top, right, bottom). """
+        is_combustion_flash = combustion_timer > (COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION)
+        self._advance(bounds, stroke == "Intake" or stroke == "Power",
+                      MAX_PARTICLE_SPEED * (COMBUSTION_SPEED_MULTIPLIER if is_combustion_flash else 1.0),
+                      -0.9 if stroke in ("Compression", "Exhaust") else -0.5)
+        self.color_index.fill(gas_color_index(stroke, combustion_timer))
+
+    def step_groups(self, group_bounds, strokes, combustion_timers):
+        """ Like step(), with one (bounds, stroke, combustion_timer) per group; particles follow their own group's. """
+        flash = [timer > (COMBUSTION_FADE_DURATION - COMBUSTION_FLASH_DURATION) for timer in combustion_timers]
+        expanding = np.array([stroke == "Intake" or stroke == "Power" for stroke in strokes])
+        max_speed = np.array([MAX_PARTICLE_SPEED * (COMBUSTION_SPEED_MULTIPLIER if f else 1.0) for f in flash])
+        reflect = np.array([-0.9 if stroke in ("Compression", "Exhaust") else -0.5 for stroke in strokes])
+        colors = np.array([gas_color_index(stroke, timer) for stroke, timer in zip(strokes, combustion_timers)], dtype=np.uint8)
+        group = self.group[:self.active]
+        self._advance(np.asarray(group_bounds, dtype=np.float64)[group].T, expanding[group], max_speed[group], reflect[group])
+        group = self.group
+        np.take(colors, group, out=self.color_index)
+
+    def _advance(self, bounds, expanding, max_speed, bottom_reflect):
+        """ Shared physics; every argument is either a scalar or a per-particle array. """
+        left, top, right, bottom = bounds
+        n = self.active
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+
+        # Acceleration/Forces
+        vx += self.rng.uniform(-PARTICLE_ACCEL_FACTOR, PARTICLE_ACCEL_FACTOR, n)
+        vy += self.rng.uniform(-PARTICLE_ACCEL_FACTOR, PARTICLE_ACCEL_FACTOR, n)
+        if np.ndim(expanding):
+            vy += PARTICLE_EXPANSION_ACCEL * expanding
+        elif expanding:
+            vy += PARTICLE_EXPANSION_ACCEL
+
+        # Limit speed & Friction (one combined scale per particle)
+        scale = max_speed / np.maximum(np.hypot(vx, vy), max_speed) # 1.0 for particles under the limit
+        scale *= PARTICLE_FRICTION
+        vx *= scale; vy *= scale
+
+        # Update Position
+        x += vx; y += vy
+
+        # Particle-Particle Collisions (before the walls, which then undo any push through them)
+        if self.collisions:
+            self.collide(left, top)
+
+        # Boundary Collisions
+        hit = x - PARTICLE_RADIUS < left
+        np.copyto(x, left + PARTICLE_RADIUS, where=hit); vx[hit] *= -0.8
+        hit = ~hit & (x + PARTICLE_RADIUS > right)
+        np.copyto(x, right - PARTICLE_RADIUS, where=hit); vx[hit] *= -0.8
+        hit = y - PARTICLE_RADIUS < top
+        np.copyto(y, top + PARTICLE_RADIUS, where=hit); vy[hit] *= -0.8
+        hit = ~hit & (y + PARTICLE_RADIUS > bottom)
+        np.copyto(y, bottom - PARTICLE_RADIUS, where=hit); np.copyto(vy, vy * bottom_reflect - 0.1, where=hit)
+        if np.ndim(top): # Per-particle extents stay full length (snapshots and recordings have fixed shapes)
+            if np.shape(self.top) != self.x.shape:
+                self.top = np.zeros_like(self.x); self.bottom = np.zeros_like(self.x)
+            self.top[:n] = top; self.bottom[:n] = bottom
+        else:
+            self.top = top; self.bottom = bottom
+
+    def collision_pairs(self, left, top):
+        """
+        Index arrays (i, j), i < j, of overlapping particles of the same group, found through the
+        spatial-hash grid anchored at (left, top) (scalars or per-particle arrays).
+        """
+        n = self.active
+        x, y, group = self.x[:n], self.y[:n], self.group[:n]
+        if n < 2:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        # Cell of every particle; the grid spans the largest region of any group
+        cell_x = np.maximum(((x - left) // COLLISION_CELL_SIZE).astype(np.intp), 0)
+        cell_y = np.maximum(((y - top) // COLLISION_CELL_SIZE).astype(np.intp), 0)
+        columns = int(cell_x.max()) + 1; rows = int(cell_y.max()) + 1
+        cell = (group * rows + cell_y) * columns + cell_x
+        cell_count = (int(group.max()) + 1) * rows * columns
+
+        # CSR cell list: cell c holds order[starts[c]:starts[c] + counts[c]]
+        order = np.argsort(cell.astype(np.int16) if cell_count < 2**15 else cell, kind="stable") # Radix sort for small keys
+        counts = np.bincount(cell, minlength=cell_count + 1) # Last cell: "no cell", always empty
+        starts = np.cumsum(counts) - counts
+
+        # Candidates in sorted positions: the rest of the own cell, then every member of the forward neighbours
+        sorted_x = cell_x[order]; sorted_y = cell_y[order]; sorted_cell = cell[order]
+        neighbor_x = sorted_x[:, None] + HALF_NEIGHBOR_OFFSETS[:, 0]; neighbor_y = sorted_y[:, None] + HALF_NEIGHBOR_OFFSETS[:, 1]
+        inside = (neighbor_x < columns) & (neighbor_x >= 0) & (neighbor_y < rows) # Forward offsets never go up
+        neighbor_cell = np.where(inside, sorted_cell[:, None] + (HALF_NEIGHBOR_OFFSETS[:, 1] * columns + HALF_NEIGHBOR_OFFSETS[:, 0]), cell_count)
+        first = starts[neighbor_cell]; count = counts[neighbor_cell]
+        first[:, 0] = np.arange(1, n + 1); count[:, 0] = starts[sorted_cell] + counts[sorted_cell] - first[:, 0]
+        count = count.ravel()
+        position = np.repeat(np.arange(n), count.reshape(n, -1).sum(axis=1)) # Sorted position of the first particle of each candidate pair
+        other = np.arange(len(position)) + np.repeat(first.ravel() - (np.cumsum(count) - count), count) # ... and of the second
+        i = order[position]; j = order[other]
+        dx = x[i] - x[j]; dy = y[i] - y[j]
+        touching = dx * dx + dy * dy < COLLISION_CELL_SIZE * COLLISION_CELL_SIZE
+        i = i[touching]; j = j[touching]
+        return np.minimum(i, j), np.maximum(i, j)
+
+    def collide(self, left, top):
+        """ Resolves overlapping pairs: equal-mass elastic impulse along the line of centers, then separation. """
+        i, j = self.collision_pairs(left, top)
+        if not len(i):
+            return
+        n = self.active
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        dx = x[i] - x[j]; dy = y[i] - y[j]
+        distance = np.maximum(np.hypot(dx, dy), 1e-6)
+        nx = dx / distance; ny = dy / distance
+        approach = (vx[i] - vx[j]) * nx + (vy[i] - vy[j]) * ny
+        impulse = np.where(approach < 0, 0.5 * (1 + COLLISION_RESTITUTION) * approach, 0.0) # Only pairs moving together
+        push = 0.5 * (COLLISION_CELL_SIZE - distance) # Half the overlap for each particle
+        # Accumulate per particle; a particle in several pairs gets the average, so simultaneous contacts add no energy
+        share = 1.0 / np.maximum(np.bincount(i, minlength=n) + np.bincount(j, minlength=n), 1)
+        vx -= (np.bincount(i, impulse * nx, n) - np.bincount(j, impulse * nx, n)) * share
+        vy -= (np.bincount(i, impulse * ny, n) - np.bincount(j, impulse * ny, n)) * share
+        x += (np.bincount(i, push * nx, n) - np.bincount(j, push * nx, n)) * share
+        y += (np.bincount(i, push * ny, n) - np.bincount(j, push * ny, n)) * share
+
+    def visible(self, bounds=None):
+        """ Boolean mask of active particles fully inside the vertical extent of bounds (default: the last step's), i.e. the ones that get drawn. """
+        top, bottom = (self.top, self.bottom) if bounds is None else (bounds[1], bounds[3])
+        mask = (self.y >= top + PARTICLE_RADIUS) & (self.y <= bottom - PARTICLE_RADIUS)
+        mask[self.active:] = False
+        return mask
@@ -0,0 +1,159 @@
+"""
+Per-phase frame profiler (no pygame).
+
+Code under test wraps each phase in `with PROFILER.phase("name"):`. Time spent in a phase
+is summed over the frame (draw_text runs many times per frame) and end_frame() pushes the
+per-frame totals into a ring buffer for rolling percentiles and into a fixed-bin histogram
+for the whole run. Phases may nest: "text" is also counted inside "annotations" and "render".
+
+tick(clock, fps) replaces clock.tick(fps) and records the frame's own work time (perf_counter
+from the end of the previous tick to the start of this one, i.e. without the sleep; pygame's
+get_rawtime() only has whole milliseconds) and the headroom left against the 1/fps budget.
+work_ms holds it even when disabled, for the quality governor.
+
+When disabled, phase() returns one shared no-op context manager, so an instrumented call
+costs a method call and a with-statement and nothing is recorded.
+"""
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+PROFILE_WINDOW = 600 # Frames kept for rolling percentiles (10 s at 60 FPS)
+HISTOGRAM_BIN_MS = 0.25
+HISTOGRAM_MAX_MS = 100.0 # Frames above this land in the last bin
+PERCENTILES = (50, 95, 99)
+FRAME_PHASE = "frame" # Work time per frame reported by tick() (excludes the tick sleep)
+HEADROOM_PHASE = "headroom" # Budget minus frame work time; negative means the frame missed FPS (histogram bin 0)
+
+_NO_OP = nullcontext()
+
+
+class _PhaseTimer:
+    """ Reusable context manager for one phase; adds its elapsed time to the profiler's running frame totals. """
+    __slots__ = ("totals", "name", "start")
+
+    def __init__(self, totals, name):
+        self.totals = totals; self.name = name; self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.totals[self.name] += time.perf_counter() - self.start
+
+
+class PhaseStats:
+    """ Rolling window and whole-run histogram of one phase's per-frame milliseconds. """
+    def __init__(self, window=PROFILE_WINDOW):
+        self.samples = np.zeros(window)
+        self.count = 0 # Frames recorded since creation (never wraps)
+        self.histogram = np.zeros(int(HISTOGRAM_MAX_MS / HISTOGRAM_BIN_MS) + 1, dtype=np.int64)
+        self.total_ms = 0.0; self.max_ms = 0.0
+
+    def add(self, ms):
+        self.samples[self.count % len(self.samples)] = ms
+        self.count += 1
+        self.histogram[min(int(max(ms, 0.0) / HISTOGRAM_BIN_MS), len(self.histogram) - 1)] += 1
+        self.total_ms += ms
+        if ms > self.max_ms: self.max_ms = ms
+
+    def recent(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def percentiles(self):
+        """ {50: ms, 95: ms, 99: ms} over the rolling window. """
+        recent = self.recent()
+        if not len(recent):
+            return {p: 0.0 for p in PERCENTILES}
+        return dict(zip(PERCENTILES, np.percentile(recent, PERCENTILES).tolist()))
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.hud_visible = False
+        self.window = window
+        self.timers = {} # name -> _PhaseTimer (created on first use, then reused every frame)
+        self.totals = {} # name -> seconds accumulated in the current frame
+        self.stats = {} # name -> PhaseStats
+        self.budget_ms = None
+        self.frame_start = None # perf_counter() when the current frame's work began (end of the last tick)
+        self.work_ms = None # Work time of the last ticked frame, measured whether or not the profiler is enabled
+
+    def phase(self, name):
+        """ Context manager timing one phase (accumulated into the current frame). """
+        if not self.enabled:
+            return _NO_OP
+        timer = self.timers.get(name)
+        if timer is None:
+            self.totals[name] = 0.0
+            timer = self.timers[name] = _PhaseTimer(self.totals, name)
+        return timer
+
+    def end_frame(self):
+        """ Records the current frame's phase totals and starts a new frame. """
+        if not self.enabled:
+            return
+        totals = self.totals
+        for name, seconds in totals.items():
+            self._record(name, seconds * 1000.0)
+            totals[name] = 0.0
+
+    def tick(self, clock, fps):
+        """ clock.tick(fps) that also records frame work time and headroom. Returns the tick's milliseconds. """
+        now = time.perf_counter()
+        self.work_ms = None if self.frame_start is None else (now - self.frame_start) * 1000.0
+        ms = clock.tick(fps)
+        self.frame_start = time.perf_counter()
+        if self.enabled and self.work_ms is not None:
+            self.budget_ms = 1000.0 / fps if fps else None # tick(0) does not throttle, so there is no budget
+            self._record(FRAME_PHASE, self.work_ms)
+            if self.budget_ms is not None: self._record(HEADROOM_PHASE, self.budget_ms - self.work_ms)
+        return ms
+
+    def restart_frame(self):
+        """ Starts timing a frame now without recording one (after waiting outside tick, e.g. for events). """
+        self.frame_start = time.perf_counter(); self.work_ms = None
+
+    def _record(self, name, ms):
+        stats = self.stats.get(name)
+        if stats is None: stats = self.stats[name] = PhaseStats(self.window)
+        stats.add(ms)
+
+    def reset(self):
+        """ Drops every recorded frame (timers stay attached). """
+        for name in self.totals: self.totals[name] = 0.0
+        self.stats.clear(); self.budget_ms = None
+
+    def toggle_hud(self):
+        """ Shows/hides the on-screen HUD; showing it turns the timers on. """
+        self.hud_visible = not self.hud_visible
+        if self.hud_visible: self.enabled = True
+
+    def summary(self):
+        """ {phase: {"p50", "p95", "p99", "mean", "max", "frames"}} over the rolling window (mean/max over the run). """
+        return {name: dict({f"p{p}": ms for p, ms in stats.percentiles().items()},
+                           mean=stats.total_ms / max(1, stats.count), max=stats.max_ms, frames=stats.count)
+                for name, stats in self.stats.items()}
+
+    def hud_lines(self):
+        """ One text line per phase for the HUD, frame time and headroom first. """
+        summary = self.summary()
+        order = [name for name in (FRAME_PHASE, HEADROOM_PHASE) if name in summary]
+        order += sorted(name for name in summary if name not in order)
+        return [f"{name:<12}{s['p50']:6.2f}{s['p95']:6.2f}{s['p99']:6.2f}" for name, s in
+                ((name, summary[name]) for name in order)]
+
+    def dump(self, path):
+        """ Writes the summary and the whole-run histogram of every phase to a JSON file. """
+        summary = self.summary()
+        data = {
+            "budget_ms": self.budget_ms, "window_frames": self.window,
+            "histogram_bin_ms": HISTOGRAM_BIN_MS, "histogram_max_ms": HISTOGRAM_MAX_MS,
+            "phases": {name: dict(summary[name], histogram=stats.histogram.tolist())
+                       for name, stats in self.stats.items()},
+        }
+        with open(path, "w") as file:
+            json.dump(data, file, indent=1)
@@ -0,0 +1,221 @@
+"""
+Fixed-capacity PV sample history with per-cycle statistics (no pygame).
+
+A NumPy ring buffer of (volume, pressure, cycle angle) samples with a running sample count and
+a cycle counter, so renderers can tell exactly which samples are new since they last looked.
+With channels=N every sample holds N (volume, pressure, angle) triples, one per cylinder.
+
+Memory is bounded however long the run: the ring keeps the newest `capacity` samples at full
+resolution (the last few hundred cycles at high RPM, a dozen at MIN_RPM). Each cycle is
+summarised when the next one starts (CycleStats: loop work, peak pressure and its angle, volume
+range) into a float32 ring of the newest `cycle_capacity` cycles. Running sums over every
+cycle since creation keep the lifetime statistics.
+
+The sample positions of the last CYCLE_STARTS cycle starts are kept too (recent_cycles), and
+lttb_indices() thins a trace to a fixed number of vertices for drawing, whatever its length.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+CYCLE_CAPACITY = 8192 # Cycle summaries kept (~0.2 MB for one channel)
+ROLLING_CYCLES = 100 # Cycles the rolling statistics cover
+MIN_CYCLE_SAMPLES = 3 # A cycle with fewer samples (e.g. cut short by clear()) is counted but not summarised
+CYCLE_STARTS = 16 # Recent cycle starts remembered (recent_cycles)
+
+CycleSummary = namedtuple("CycleSummary", [
+    "cycles", # Cycles summarised since creation
+    "window", # Cycles the rolling fields cover (<= ROLLING_CYCLES)
+    "last_work", "mean_work", "cov_work", # Loop work (closed integral of p dV) of the last cycle; rolling mean and CoV in %
+    "mean_peak_pressure", "cov_peak_pressure", # Rolling mean and CoV (%) of the peak pressure
+    "peak_angle", # Cycle angle of the last cycle's peak pressure
+    "min_volume", "max_volume", # Over the rolling window
+    "lifetime_mean_work", "lifetime_cov_work", # Over every cycle since creation
+]) # Every field but cycles and window is an array with one entry per channel
+
+
+def loop_work(volume, pressure):
+    """ Closed-loop integral of p dV per channel (trapezoids, the last sample joined back to the first). """
+    work = ((pressure[1:] + pressure[:-1]) * (volume[1:] - volume[:-1])).sum(axis=0)
+    work += (pressure[0] + pressure[-1]) * (volume[0] - volume[-1]) # Closing segment (np.roll would copy both arrays)
+    return 0.5 * work
+
+
+def coefficient_of_variation(std, mean):
+    """ std / |mean| in percent (0 where the mean is 0). """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mean != 0, 100.0 * std / np.abs(mean), 0.0)
+
+
+def lttb_indices(x, y, points):
+    """
+    Indices of at most points vertices that keep the shape of the polyline (x, y): largest-triangle-three-buckets.
+    The first and last vertex are kept, and every bucket of the rest gives the vertex spanning the largest
+    triangle with its neighbouring buckets. Each triangle uses the means of both neighbouring buckets
+    (classic LTTB uses the vertex picked in the previous one), so all buckets are chosen in one vectorised pass.
+    """
+    count = len(x)
+    if count <= points or points < 3:
+        return np.arange(count)
+    inner_x = x[1:-1]; inner_y = y[1:-1]; inner = count - 2
+    buckets = points - 2
+    starts = np.arange(buckets) * inner // buckets; ends = np.append(starts[1:], inner)
+    sizes = ends - starts
+    mean_x = np.add.reduceat(inner_x, starts) / sizes; mean_y = np.add.reduceat(inner_y, starts) / sizes
+    previous_x = np.concatenate(([x[0]], mean_x[:-1])); previous_y = np.concatenate(([y[0]], mean_y[:-1]))
+    next_x = np.append(mean_x[1:], x[-1]); next_y = np.append(mean_y[1:], y[-1])
+    candidates = np.minimum(starts[:, None] + np.arange(sizes.max()), (ends - 1)[:, None]) # (buckets, largest size); short buckets repeat their last vertex
+    dx = (next_x - previous_x)[:, None]; dy = (next_y - previous_y)[:, None]
+    area = inner_x[candidates] * dy # Twice the triangle area, |cx dy - cy dx + py dx - px dy|, linear in the candidate (cx, cy)
+    area -= inner_y[candidates] * dx; area += previous_y[:, None] * dx - previous_x[:, None] * dy
+    np.abs(area, out=area)
+    chosen = candidates[np.arange(buckets), area.argmax(axis=1)] + 1
+    return np.concatenate(([0], chosen, [count - 1]))
+
+
+class CycleStats:
+    """ Ring of per-cycle summaries plus running lifetime sums (see module docstring). """
+    def __init__(self, capacity=CYCLE_CAPACITY, channels=None):
+        self.capacity = capacity
+        width = channels or 1
+        self.summaries = np.zeros(capacity, dtype=[("work", np.float32, width), ("peak_pressure", np.float32, width),
+                                                   ("peak_angle", np.float32, width), ("min_volume", np.float32, width),
+                                                   ("max_volume", np.float32, width), ("samples", np.int32)])
+        self.columns = [self.summaries[name] for name in self.summaries.dtype.names] # Field views, so add() writes without new ones
+        self.channel_index = np.arange(width)
+        self.work_mean = np.zeros(width); self.work_m2 = np.zeros(width) # Welford accumulators over every cycle
+        self.total = 0 # Cycles summarised since creation (never wraps)
+        self.cached = None # CycleSummary of the current total
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def add(self, volume, pressure, angle):
+        """ Summarises one cycle's samples (arrays with one row per sample, columns = channels). """
+        work = loop_work(volume, pressure)
+        peak = pressure.argmax(axis=0)
+        i = self.total % self.capacity
+        works, peak_pressures, peak_angles, min_volumes, max_volumes, samples = self.columns
+        works[i] = work; peak_pressures[i] = pressure[peak, self.channel_index]; peak_angles[i] = angle[peak, self.channel_index]
+        min_volumes[i] = volume.min(axis=0); max_volumes[i] = volume.max(axis=0); samples[i] = len(volume)
+        self.total += 1
+        delta = work - self.work_mean
+        self.work_mean += delta / self.total; self.work_m2 += delta * (work - self.work_mean)
+        self.cached = None
+
+    def latest(self, count):
+        """ The last count summaries, oldest first. count must be <= len(self). """
+        end = self.total % self.capacity; start = end - count
+        return self.summaries[start:end] if start >= 0 else np.concatenate((self.summaries[start:], self.summaries[:end]))
+
+    def summary(self):
+        """ CycleSummary of the last ROLLING_CYCLES and of all cycles, or None before the first. Computed once per cycle. """
+        if self.total == 0:
+            return None
+        if self.cached is None:
+            window = self.latest(min(len(self), ROLLING_CYCLES))
+            work = window["work"].astype(np.float64); peak_pressure = window["peak_pressure"].astype(np.float64)
+            mean_work = work.mean(axis=0); mean_peak = peak_pressure.mean(axis=0)
+            lifetime_std = np.sqrt(self.work_m2 / self.total)
+            self.cached = CycleSummary(self.total, len(window), work[-1], mean_work, coefficient_of_variation(work.std(axis=0), mean_work),
+                                       mean_peak, coefficient_of_variation(peak_pressure.std(axis=0), mean_peak),
+                                       window["peak_angle"][-1].astype(np.float64),
+                                       window["min_volume"].min(axis=0).astype(np.float64), window["max_volume"].max(axis=0).astype(np.float64),
+                                       self.work_mean.copy(), coefficient_of_variation(lifetime_std, self.work_mean))
+        return self.cached
+
+    def clear(self):
+        self.total = 0; self.work_mean[:] = 0.0; self.work_m2[:] = 0.0; self.cached = None
+
+
+class PVHistory:
+    def __init__(self, capacity, channels=None, cycle_capacity=CYCLE_CAPACITY):
+        self.capacity = capacity
+        self.channels = channels
+        shape = capacity if channels is None else (capacity, channels)
+        self.volume = np.zeros(shape)
+        self.pressure = np.zeros(shape)
+        self.angle = np.zeros(shape, dtype=np.float32) # Cycle angle of each sample (NaN where not known, see extend)
+        self.cycles = CycleStats(cycle_capacity, channels)
+        self.total = 0 # Samples appended since creation (never wraps)
+        self.cycle_count = 0 # Cycle starts seen since creation
+        self.cycle_start = 0 # total at the start of the current cycle
+        self.starts = np.zeros(CYCLE_STARTS, dtype=np.int64); self.starts_recorded = 0 # Ring of recent cycle-start totals
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def __iter__(self):
+        """ Yields (volume, pressure) tuples, oldest first. """
+        volume, pressure = self.latest(len(self))
+        return zip(volume.tolist(), pressure.tolist())
+
+    @property
+    def nbytes(self):
+        """ Memory held by the samples and cycle summaries (fixed at creation). """
+        return self.volume.nbytes + self.pressure.nbytes + self.angle.nbytes + self.cycles.summaries.nbytes
+
+    def append(self, volume, pressure, angle=0.0):
+        i = self.total % self.capacity
+        self.volume[i] = volume; self.pressure[i] = pressure; self.angle[i] = angle
+        self.total += 1
+
+    def extend(self, volume, pressure, angle=None):
+        """ Appends several samples at once (arrays with one row per sample; angle None: unknown). """
+        count = len(volume)
+        if angle is None: angle = np.full(np.shape(volume), np.nan, dtype=np.float32)
+        if count > self.capacity:
+            volume = volume[-self.capacity:]; pressure = pressure[-self.capacity:]; angle = angle[-self.capacity:]
+            self.total += count - self.capacity; count = self.capacity
+        start = self.total % self.capacity
+        first = min(count, self.capacity - start) # Up to the end of the ring, the rest wraps to the front
+        for ring, values in ((self.volume, volume), (self.pressure, pressure), (self.angle, angle)):
+            ring[start:start + first] = values[:first]; ring[:count - first] = values[first:]
+        self.total += count
+
+    def start_cycle(self):
+        """ Called before the first sample of a new cycle: summarises the samples of the one that ended. """
+        count = min(self.total - self.cycle_start, len(self))
+        if count >= MIN_CYCLE_SAMPLES:
+            volume, pressure = self.latest(count)
+            angle = self.latest_angles(count)
+            if self.channels is None: volume, pressure, angle = volume[:, None], pressure[:, None], angle[:, None]
+            self.cycles.add(volume, pressure, angle)
+        self.mark_cycle_start(self.total)
+
+    def mark_cycle_start(self, total):
+        """ Counts a cycle starting at sample total without summarising the previous one (histories filled by extend()). """
+        self.starts[self.starts_recorded % CYCLE_STARTS] = total; self.starts_recorded += 1
+        self.cycle_start = total
+        self.cycle_count += 1
+
+    def recent_cycles(self, cycles):
+        """
+        (count, splits): the last count samples hold the current cycle and the cycles - 1 before it (everything
+        still held when fewer cycle starts are known), and splits are the offsets into them where each later cycle starts.
+        cycles must be <= CYCLE_STARTS.
+        """
+        first = self.total - len(self) # Oldest sample still held
+        known = min(self.starts_recorded, cycles)
+        starts = self.starts[np.arange(self.starts_recorded - known, self.starts_recorded) % CYCLE_STARTS]
+        window_start = first if self.starts_recorded < cycles else max(first, int(starts[0]))
+        return self.total - window_start, starts[starts > window_start] - window_start
+
+    def latest(self, count):
+        """ The last count samples (oldest first) as (volume, pressure) arrays (rows = samples). count must be <= len(self). """
+        end = self.total % self.capacity
+        start = end - count
+        if start >= 0:
+            return self.volume[start:end], self.pressure[start:end]
+        return (np.concatenate((self.volume[start:], self.volume[:end])),
+                np.concatenate((self.pressure[start:], self.pressure[:end])))
+
+    def latest_angles(self, count):
+        """ Cycle angles of the last count samples, like latest(). """
+        end = self.total % self.capacity
+        start = end - count
+        return self.angle[start:end] if start >= 0 else np.concatenate((self.angle[start:], self.angle[:end]))
+
+    def clear(self):
+        self.total = 0; self.cycle_count = 0; self.cycle_start = 0; self.starts_recorded = 0
+        self.cycles.clear()
@@ -0,0 +1,110 @@
+"""
+Adaptive render quality (no pygame).
+
+QualityGovernor watches the work time of every frame (FrameProfiler.work_ms, i.e. perf_counter
+without the tick's sleep) and moves between QUALITY_LEVELS to hold a frame-time budget:
+
+  - every EVALUATION_FRAMES frames it takes the DECISION_PERCENTILE of that window,
+  - above budget * DOWNGRADE_AT it drops one level at once,
+  - only after upgrade_windows consecutive windows below budget * UPGRADE_AT does it go back up.
+
+The gap between the two thresholds and the run of calm windows are the hysteresis. A drop
+within OSCILLATION_WINDOWS of a raise doubles the calm windows needed next time (up to
+MAX_UPGRADE_WINDOWS), so a machine sitting right at the edge of a level only probes the level
+above now and then; once a raise has held for MAX_UPGRADE_WINDOWS the backoff is forgotten.
+The first window after a change is discarded: it still holds frames of the previous level.
+"""
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+QualityLevel = namedtuple("QualityLevel", [
+    "name",
+    "particle_fraction", # Share of the gas that is stepped and drawn
+    "pv_stride", # PV trace drawn through every n-th sample (also batches the incremental draws)
+    "annotation_interval", # Frames between annotation redraws (1 = drawn on top every frame)
+    "spark_points", # Rays of the spark star
+])
+
+QUALITY_LEVELS = ( # Lowest first
+    QualityLevel("low", 0.25, 8, 30, 3),
+    QualityLevel("medium", 0.5, 4, 10, 4),
+    QualityLevel("high", 0.75, 2, 3, 5),
+    QualityLevel("full", 1.0, 1, 1, 7),
+)
+FULL_QUALITY = QUALITY_LEVELS[-1]
+QUALITY_NAMES = [level.name for level in QUALITY_LEVELS]
+
+EVALUATION_FRAMES = 30 # Frames per decision window (0.5 s at 60 FPS)
+DECISION_PERCENTILE = 90
+DOWNGRADE_AT = 1.0 # Fraction of the budget the window's percentile must exceed to drop a level
+UPGRADE_AT = 0.6 # ... and stay below, window after window, to raise one
+UPGRADE_WINDOWS = 4 # Calm windows before a raise
+MAX_UPGRADE_WINDOWS = 240 # 2 minutes at 60 FPS; also how long a raise must hold before past oscillation is forgotten
+OSCILLATION_WINDOWS = 8 # A drop this soon after a raise counts as oscillation
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms, level=len(QUALITY_LEVELS) - 1, enabled=True, log=sys.stderr):
+        self.budget_ms = budget_ms
+        self.index = level
+        self.enabled = enabled # False: level stays fixed, observe() only measures
+        self.log = log # Text stream for level changes (None: silent)
+        self.samples = np.zeros(EVALUATION_FRAMES)
+        self.count = 0 # Samples in the current window
+        self.settling = False # Discard the window after a change
+        self.calm_windows = 0
+        self.upgrade_windows = UPGRADE_WINDOWS
+        self.windows = 0 # Windows evaluated so far
+        self.last_upgrade = None; self.last_downgrade = None # Windows of the last raise and drop
+        self.last_ms = 0.0 # Decision percentile of the last window
+        self.changes = [] # (window, old name, new name, percentile ms)
+
+    @property
+    def level(self):
+        return QUALITY_LEVELS[self.index]
+
+    def label(self):
+        """ Short text for the UI, e.g. "Quality: high (auto)". """
+        return f"Quality: {self.level.name} ({'auto' if self.enabled else 'fixed'})"
+
+    def observe(self, frame_ms):
+        """ Adds one frame's work time. Returns the new QualityLevel when the level changed, else None. """
+        self.samples[self.count] = frame_ms
+        self.count += 1
+        if self.count < EVALUATION_FRAMES:
+            return None
+        self.count = 0
+        self.windows += 1
+        self.last_ms = float(np.percentile(self.samples, DECISION_PERCENTILE))
+        if self.settling or not self.enabled:
+            self.settling = False
+            return None
+        if self.last_ms > self.budget_ms * DOWNGRADE_AT:
+            self.calm_windows = 0
+            if self.index == 0: return None
+            if self.last_upgrade is not None and self.windows - self.last_upgrade <= OSCILLATION_WINDOWS:
+                self.upgrade_windows = min(2 * self.upgrade_windows, MAX_UPGRADE_WINDOWS)
+            self.last_downgrade = self.windows
+            return self.change(self.index - 1)
+        if self.last_ms < self.budget_ms * UPGRADE_AT:
+            self.calm_windows += 1
+            if self.calm_windows >= self.upgrade_windows and self.index < len(QUALITY_LEVELS) - 1:
+                self.last_upgrade = self.windows
+                return self.change(self.index + 1)
+        else:
+            self.calm_windows = 0
+        held = self.last_upgrade is not None and (self.last_downgrade is None or self.last_downgrade < self.last_upgrade)
+        if held and self.windows - self.last_upgrade > MAX_UPGRADE_WINDOWS:
+            self.upgrade_windows = UPGRADE_WINDOWS; self.last_upgrade = None # The raise held: forget past oscillation
+        return None
+
+    def change(self, index):
+        """ Switches to QUALITY_LEVELS[index] and logs it. Returns the new level. """
+        old = self.level
+        self.index = index; self.calm_windows = 0; self.settling = True
+        self.changes.append((self.windows, old.name, self.level.name, self.last_ms))
+        if self.log is not None:
+            print(f"quality: {old.name} -> {self.level.name} (p{DECISION_PERCENTILE} {self.last_ms:.1f} ms, budget {self.budget_ms:.1f} ms)", file=self.log)
+        return self.level
@@ -0,0 +1,203 @@
+"""
+Binary record/replay of engine runs (no pygame).
+
+A recording is one file of fixed-width records (one per simulation step that added a PV
+sample) after a small header, plus a side index "<file>.cycles" of the record numbers at
+which each cycle starts. A record holds every Engine.SNAPSHOT_ATTRIBUTES value and the
+snapshot arrays (per-cylinder state for multi-cylinder engines, and the particle arrays if
+requested), so replay reuses Engine.read_snapshot. Floats are stored as float32 (sim_time
+as float64, particle positions as float16); the stroke is stored as its index in STROKE_NAMES.
+
+File layout:
+    MAGIC (8 bytes) | header length (uint32 LE) | JSON header, padded to HEADER_ALIGN | records
+
+The recorder keeps a batch of WRITE_BATCH records and writes it out when full. Replay
+memory-maps the file, so seeking to any cycle or crank angle only touches the pages it reads.
+Both stay at flat memory however long the recording runs.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+from engine_model import LAYOUTS, STROKE_NAMES
+from sim_thread import EngineSnapshot
+
+MAGIC = b"ENGREC\x00\x01"
+FORMAT_VERSION = 1
+HEADER_ALIGN = 64 # Records start at a multiple of this offset
+WRITE_BATCH = 256 # Records buffered before each write
+INDEX_SUFFIX = ".cycles"
+INDEX_DTYPE = np.dtype("<u8")
+ARRAY_PREFIX = "arrays." # Field name prefix of snapshot arrays (keeps them apart from same-named values)
+EXCLUDED_ARRAYS = ("pv_volume", "pv_pressure") # The PV history is rebuilt from the records themselves
+PARTICLE_ARRAYS = ("particle_x", "particle_y", "particle_color", "particle_top", "particle_bottom")
+FLOAT64_VALUES = ("sim_time",)
+FLOAT16_ARRAYS = ("particle_x", "particle_y") # Half precision is within a pixel on screen and halves the gas's share of a record
+
+
+def _value_format(name, value):
+    if isinstance(value, (bool, np.bool_)): return "?"
+    if isinstance(value, str): return "u1" # Stroke name -> index in STROKE_NAMES
+    return "<f8" if name in FLOAT64_VALUES else "<f4"
+
+
+def _array_format(name, array):
+    array = np.asarray(array)
+    if array.dtype.kind != "f":
+        return array.dtype.str, array.shape
+    return ("<f2" if name in FLOAT16_ARRAYS else "<f4"), array.shape
+
+
+def record_dtype(engine, particles=False):
+    """ Structured dtype of one record for this engine (shapes are fixed by its layout and particle count). """
+    fields = [(name, _value_format(name, getattr(engine, name))) for name in engine.SNAPSHOT_ATTRIBUTES]
+    for name, array in engine.snapshot_arrays().items():
+        if name in EXCLUDED_ARRAYS or (name in PARTICLE_ARRAYS and not particles):
+            continue
+        format, shape = _array_format(name, array)
+        fields.append((ARRAY_PREFIX + name, format, shape) if shape else (ARRAY_PREFIX + name, format))
+    return np.dtype(fields)
+
+
+def _descr_to_dtype(descr):
+    """ dtype from the JSON round trip of dtype.descr (lists back to tuples). """
+    return np.dtype([tuple(field[:2]) + ((tuple(field[2]),) if len(field) > 2 else ()) for field in descr])
+
+
+class Recorder:
+    """ Appends one record per simulation step of engine to path (set engine.recorder to it). """
+    def __init__(self, path, engine, particles=False):
+        self.path = path
+        self.dtype = record_dtype(engine, particles)
+        self.value_names = list(engine.SNAPSHOT_ATTRIBUTES)
+        self.array_names = [name[len(ARRAY_PREFIX):] for name in self.dtype.names if name.startswith(ARRAY_PREFIX)]
+        self.batch = np.zeros(WRITE_BATCH, self.dtype)
+        self.pending = 0 # Records in batch not written yet
+        self.count = 0 # Records recorded so far
+        self.last_angle = None
+        layout = getattr(engine, "layout", None)
+        layout_name = next((name for name, value in LAYOUTS.items() if value == layout), "single") # Key for create_engine
+        header = json.dumps({
+            'version': FORMAT_VERSION, 'layout': layout_name, 'particles': particles,
+            'step_seconds': engine.sim_clock.step_seconds, 'strokes': list(STROKE_NAMES), 'dtype': self.dtype.descr,
+        }).encode()
+        padding = -(len(MAGIC) + 4 + len(header)) % HEADER_ALIGN
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + struct.pack("<I", len(header) + padding) + header + b" " * padding)
+        self.index_file = open(path + INDEX_SUFFIX, "wb")
+
+    def record(self, engine):
+        row = self.batch[self.pending]
+        for name in self.value_names:
+            value = getattr(engine, name)
+            row[name] = STROKE_NAMES.index(value) if isinstance(value, str) else value
+        arrays = engine.snapshot_arrays()
+        for name in self.array_names:
+            row[ARRAY_PREFIX + name] = arrays[name]
+        # A cycle starts when the crank angle wraps past 720 (or jumps back on reset)
+        angle = engine.crank_angle
+        if self.last_angle is None or angle < self.last_angle:
+            self.index_file.write(INDEX_DTYPE.type(self.count).tobytes())
+        self.last_angle = angle
+        self.count += 1; self.pending += 1
+        if self.pending == WRITE_BATCH: self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.batch[:self.pending].tobytes())
+            self.pending = 0
+        self.file.flush(); self.index_file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close(); self.index_file.close()
+
+
+class Recording:
+    """ Memory-mapped read access to a recording, with seeking by record, cycle or crank angle. """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an engine recording")
+            header_length, = struct.unpack("<I", file.read(4))
+            self.header = json.loads(file.read(header_length))
+        if self.header['version'] != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {self.header['version']}")
+        self.dtype = _descr_to_dtype(self.header['dtype'])
+        self.layout = self.header['layout']; self.has_particles = self.header['particles']
+        self.step_seconds = self.header['step_seconds']; self.strokes = self.header['strokes']
+        offset = len(MAGIC) + 4 + header_length
+        count = (os.path.getsize(path) - offset) // self.dtype.itemsize # A partial last record (interrupted run) is ignored
+        self.records = np.memmap(path, self.dtype, "r", offset, (count,)) if count else np.zeros(0, self.dtype)
+        self.value_names = [name for name in self.dtype.names if not name.startswith(ARRAY_PREFIX)]
+        self.array_names = [name[len(ARRAY_PREFIX):] for name in self.dtype.names if name.startswith(ARRAY_PREFIX)]
+        self.cycle_starts = self.load_index()
+
+    def load_index(self):
+        """ Cycle start record numbers from the side index, rebuilt from the crank angles if it is missing or stale. """
+        count = len(self.records)
+        index_path = self.path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            starts = np.fromfile(index_path, INDEX_DTYPE)
+            if len(starts) and starts[0] == 0 and np.all(starts < max(count, 1)):
+                return starts.astype(np.int64)
+        if not count:
+            return np.zeros(1, np.int64)
+        angles = self.records['crank_angle']
+        return np.concatenate(([0], np.flatnonzero(angles[1:] < angles[:-1]) + 1)).astype(np.int64)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def cycle_count(self):
+        return len(self.cycle_starts)
+
+    def cycle_of(self, index):
+        """ Cycle (0-based) containing record index. """
+        return int(np.searchsorted(self.cycle_starts, index, side="right")) - 1
+
+    def cycle_range(self, cycle):
+        """ (first, end) record numbers of a cycle. """
+        end = self.cycle_starts[cycle + 1] if cycle + 1 < len(self.cycle_starts) else len(self.records)
+        return int(self.cycle_starts[cycle]), int(end)
+
+    def seek(self, cycle, crank_angle=0.0):
+        """ Record number of the first sample at or after crank_angle in cycle (the cycle's last one if there is none). """
+        first, end = self.cycle_range(max(0, min(cycle, self.cycle_count - 1)))
+        # Angles rise monotonically within a cycle, so only the pages this binary search reads are touched
+        offset = int(np.searchsorted(self.records['crank_angle'][first:end], crank_angle))
+        return min(first + offset, max(first, end - 1))
+
+    def load_into(self, engine, index, previous=None):
+        """
+        Shows record index on engine (same layout) through Engine.read_snapshot. The PV history is
+        refilled with the current and previous cycle, or, when previous is an earlier record still
+        shown on engine, only the records since then are appended (forward playback).
+        """
+        snapshot = EngineSnapshot()
+        record = self.records[index]
+        for name in self.value_names:
+            value = record[name].item()
+            snapshot.values[name] = self.strokes[value] if name == "stroke" else value
+        for name in self.array_names:
+            snapshot.arrays[name] = np.array(record[ARRAY_PREFIX + name]) # Copies: the engine may keep them
+        history = engine.pv_data
+        if previous is not None and previous < index and index - previous <= history.capacity:
+            start = previous + 1
+        else:
+            history.clear(); engine.pv_source_total = 0
+            if engine.pv_plot is not None: engine.pv_plot.invalidate()
+            start = max(int(self.cycle_starts[max(0, self.cycle_of(index) - 1)]), index + 1 - history.capacity)
+        samples = self.records[start:index + 1]
+        if history.channels is None:
+            volume, pressure = samples['cylinder_volume'], samples['pressure']
+        else:
+            volume, pressure = samples[ARRAY_PREFIX + 'cylinder_volume'], samples[ARRAY_PREFIX + 'cylinder_pressure']
+        snapshot.arrays['pv_volume'] = np.asarray(volume, np.float64); snapshot.arrays['pv_pressure'] = np.asarray(pressure, np.float64)
+        snapshot.values['pv_total'] = engine.pv_source_total + len(samples)
+        snapshot.values['pv_cycles'] = self.cycle_of(index)
+        engine.read_snapshot(snapshot)
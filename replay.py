@@ -0,0 +1,110 @@
+"""
+Replay of a recording (see recording.py) with a scrub slider.
+
+The recorded engine's layout is rebuilt and every frame shows one record through
+Recording.load_into and the usual LayeredRenderer/Engine.draw_dynamic path, so a replay
+looks exactly like the live run. Playback advances at the recorded simulation step rate
+times --speed; dragging the slider (or the keys below) seeks through the memory-mapped file.
+
+    python engine_sim.py --record run.rec          # record a session
+    python replay.py run.rec [--speed 0.25]
+
+Keys: Space play/pause, Left/Right previous/next cycle, Home/End first/last record, Esc quit.
+Recordings without the gas (no --record-particles) animate live particles over the recorded state.
+"""
+import argparse
+import sys
+
+import pygame
+
+from engine_sim import (LayeredRenderer, create_engine, draw_text, WIDTH, HEIGHT, FPS, PV_RECT,
+                        SLIDER_BG_COLOR, SLIDER_KNOB_COLOR, SLIDER_KNOB_W, SLIDER_KNOB_H, LIGHT_GRAY, BLACK)
+from recording import Recording
+
+SCRUB_RECT = pygame.Rect(20, HEIGHT - 30, PV_RECT.left - 60, 10) # Scrub slider bar
+SCRUB_AREA = pygame.Rect(0, SCRUB_RECT.top - 30, PV_RECT.left - 20, 60) # Cleared and redrawn every frame (bar, knob, label)
+REPLAY_UI_STATE = {'mouse_pos': (-1, -1), 'is_dragging_slider': False} # The panel buttons do nothing in a replay
+
+
+def scrub_fraction(x):
+    return max(0.0, min(1.0, (x - SCRUB_RECT.left) / SCRUB_RECT.width))
+
+
+def draw_scrubber(screen, recording, index, playing):
+    """ Slider, knob and position label over SCRUB_AREA. Returns the covered Rect. """
+    pygame.draw.rect(screen, LIGHT_GRAY, SCRUB_AREA)
+    pygame.draw.rect(screen, SLIDER_BG_COLOR, SCRUB_RECT, border_radius=3)
+    fraction = index / max(1, len(recording) - 1)
+    knob = pygame.Rect(0, 0, SLIDER_KNOB_W, SLIDER_KNOB_H)
+    knob.center = (SCRUB_RECT.left + fraction * SCRUB_RECT.width, SCRUB_RECT.centery)
+    pygame.draw.rect(screen, SLIDER_KNOB_COLOR, knob, border_radius=3)
+    record = recording.records[index]
+    label = (f"{'Playing' if playing else 'Paused'}  cycle {recording.cycle_of(index) + 1}/{recording.cycle_count}"
+             f"  t = {float(record['sim_time']):.2f} s  record {index + 1}/{len(recording)}")
+    draw_text(screen, label, 18, SCRUB_RECT.left, SCRUB_AREA.top + 4, BLACK, align="topleft")
+    return SCRUB_AREA
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an engine recording with a scrub slider")
+    parser.add_argument("recording", help="file written by engine_sim.py --record")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed relative to the recorded simulation (default 1)")
+    args = parser.parse_args()
+    recording = Recording(args.recording)
+    if not len(recording):
+        sys.exit(f"{args.recording} holds no records")
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"4-Stroke Engine Simulation - Replay of {args.recording}")
+    clock = pygame.time.Clock()
+    engine = create_engine(recording.layout)
+    if recording.has_particles: engine.particle_stepping = "none"
+    renderer = LayeredRenderer()
+    position = 0.0; shown = None; playing = True; dragging = False
+    records_per_second = args.speed / recording.step_seconds
+    last = len(recording) - 1
+
+    running = True
+    while running:
+        dt = clock.tick(FPS) / 1000.0
+        seek_to = None
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                renderer.invalidate()
+            if event.type == pygame.KEYDOWN:
+                current = int(position)
+                if event.key == pygame.K_ESCAPE: running = False
+                elif event.key == pygame.K_SPACE: playing = not playing
+                elif event.key == pygame.K_LEFT: seek_to = recording.seek(recording.cycle_of(current) - 1)
+                elif event.key == pygame.K_RIGHT: seek_to = recording.seek(recording.cycle_of(current) + 1)
+                elif event.key == pygame.K_HOME: seek_to = 0
+                elif event.key == pygame.K_END: seek_to = last
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and SCRUB_RECT.inflate(0, SLIDER_KNOB_H).collidepoint(event.pos):
+                dragging = True; seek_to = round(scrub_fraction(event.pos[0]) * last)
+            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                dragging = False
+            if event.type == pygame.MOUSEMOTION and dragging:
+                seek_to = round(scrub_fraction(event.pos[0]) * last)
+
+        if seek_to is not None:
+            position = float(seek_to)
+        elif playing and not dragging:
+            position = min(position + dt * records_per_second, last)
+            if position == last: playing = False
+        index = int(position)
+        if index != shown:
+            recording.load_into(engine, index, shown if seek_to is None else None)
+            shown = index
+
+        update_rects = renderer.render(screen, engine, REPLAY_UI_STATE)
+        update_rects.append(draw_scrubber(screen, recording, index, playing))
+        pygame.display.update(update_rects)
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
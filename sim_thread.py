@@ -0,0 +1,144 @@
+"""
+Simulation on its own thread, decoupled from rendering and event handling.
+
+A worker thread owns one Engine and advances it at SIM_THREAD_HZ against the wall clock.
+Fixed simulation steps come from the engine's own SimulationClock, and the gas is stepped at
+the nominal frame rate of simulated time. After every tick the worker writes a snapshot of
+everything the renderer needs into a triple buffer. The render loop owns a second Engine of
+the same layout, which never simulates: each frame it reads the newest snapshot into that
+engine and draws it as usual. A slow frame therefore never slows the physics, and a heavy
+simulation tick never holds up a frame.
+
+Controls (play/pause, reset, step, RPM) are posted as commands. The worker wakes as soon as
+one arrives, applies it and publishes a fresh snapshot, so input takes effect at once rather
+than on the next tick. While the engine is paused the worker does not tick at all: it blocks
+until the next command, and `notify` (if set) tells an idle render loop that a new snapshot is ready.
+"""
+import queue
+import threading
+import time
+
+import numpy as np
+
+SIM_THREAD_HZ = 240 # Worker ticks (and snapshots) per second of wall time
+MAX_TICK_SECONDS = 0.25 # Wall time credited to one tick at most (after a stall the simulation drops time instead of racing)
+
+
+class EngineSnapshot:
+    """
+    One buffer slot: plain values plus preallocated arrays that store() copies into.
+    Arrays are reallocated only when a shape or dtype changes (e.g. the PV tail while the history fills).
+    """
+    def __init__(self):
+        self.values = {}
+        self.arrays = {}
+        self.sequence = 0
+
+    def store(self, name, array):
+        target = self.arrays.get(name)
+        if target is None or target.shape != np.shape(array) or target.dtype != array.dtype:
+            target = self.arrays[name] = np.empty_like(array)
+        np.copyto(target, array)
+
+
+class TripleBuffer:
+    """
+    Lock-protected triple buffer. The writer fills back() and publish()es it as the newest slot.
+    The reader's acquire() takes the newest slot if there is one. The writer never touches the
+    slot the reader holds, and neither side ever waits for the other.
+    """
+    def __init__(self, make_slot):
+        self.slots = [make_slot() for _ in range(3)]
+        self.back_index, self.middle_index, self.front_index = 0, 1, 2
+        self.fresh = False # The middle slot holds a snapshot the reader has not seen
+        self.lock = threading.Lock()
+
+    def back(self):
+        return self.slots[self.back_index]
+
+    def publish(self):
+        with self.lock:
+            self.back_index, self.middle_index = self.middle_index, self.back_index
+            self.fresh = True
+
+    def acquire(self):
+        """ (slot, is_new): the newest published slot, held until the next acquire(). """
+        with self.lock:
+            is_new = self.fresh
+            if is_new:
+                self.front_index, self.middle_index = self.middle_index, self.front_index
+                self.fresh = False
+            return self.slots[self.front_index], is_new
+
+
+class SimulationThread:
+    """ Runs engine (owned by the worker from now on) and publishes its state at rate ticks per second. """
+    def __init__(self, engine, rate=SIM_THREAD_HZ):
+        self.engine = engine
+        engine.particle_stepping = "update"
+        self.period = 1.0 / rate
+        self.buffer = TripleBuffer(EngineSnapshot)
+        self.commands = queue.SimpleQueue()
+        self.ticks = 0
+        self.notify = None # Called on the worker after the snapshot that follows a command
+        self.running = False
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.publish() # A first snapshot is available before the worker's first tick
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.commands.put(None) # Wakes the worker
+        self.thread.join()
+
+    def post(self, method_name, *args):
+        """ Calls engine.method_name(*args) on the worker as soon as possible. """
+        self.commands.put((method_name, args))
+
+    def latest(self):
+        """ (EngineSnapshot, is_new) for the render loop. """
+        return self.buffer.acquire()
+
+    def publish(self):
+        snapshot = self.buffer.back()
+        self.engine.write_snapshot(snapshot)
+        snapshot.sequence = self.ticks
+        self.buffer.publish()
+
+    def _apply(self, command):
+        """ Runs a posted command; returns whether there was one. """
+        if command is None:
+            return False
+        method_name, args = command
+        getattr(self.engine, method_name)(*args)
+        return True
+
+    def _run(self):
+        last = time.perf_counter()
+        next_tick = last + self.period
+        while self.running:
+            # Sleep until the next tick (paused: until the next command), but wake for commands
+            paused = self.engine.paused
+            applied = False
+            try:
+                timeout = None if paused else max(0.0, next_tick - time.perf_counter())
+                applied = self._apply(self.commands.get(timeout=timeout))
+                while True: applied = self._apply(self.commands.get_nowait()) or applied
+            except queue.Empty:
+                pass
+            if not self.running:
+                break
+            now = time.perf_counter()
+            if paused: last = now # The time spent blocked is not simulated
+            self.engine.update(min(now - last, MAX_TICK_SECONDS))
+            last = now
+            self.ticks += 1
+            self.publish()
+            if applied and self.notify: self.notify()
+            if now >= next_tick:
+                next_tick += self.period
+                if next_tick < now: next_tick = now + self.period # Behind schedule: skip ahead instead of bursting
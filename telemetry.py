@@ -0,0 +1,233 @@
+"""
+Live engine state for external dashboards and loggers, over a local socket (no pygame).
+
+TelemetryServer runs an asyncio server on its own thread, on TCP ("host:port") or a Unix
+socket ("unix:/path"). The simulating engine hands it every simulation step (engine.telemetry,
+like engine.recorder). publish() only appends a tuple of the panel values to a bounded deque,
+so the simulation never waits for the network. The loop drains that deque at most every
+FLUSH_SECONDS, encodes each step once per wire format and queues it for every subscriber.
+
+Protocol: a client may send one subscription line within HANDSHAKE_SECONDS, e.g.
+    {"format": "binary", "every": 4}
+(an empty line or silence means JSON Lines at the server's default decimation). The server
+answers with one JSON line describing the stream (fields, and for binary the struct format
+of the FRAME records that follow), then sends every `every`-th step:
+    json:   one JSON object per line
+    binary: FRAME.size bytes per step, little endian; flags bit 0 intake open, 1 exhaust
+            open, 2 spark, 3 paused; stroke is the index into the header's "strokes"
+
+Backpressure: every subscriber has a queue of at most queue_frames frames, and appending to
+a full queue drops the oldest. Its socket and transport buffers are kept small, so a slow
+reader soon fills them, its writer task waits in drain(), and its own queue overflows, which
+only costs it frames (counted in `dropped`).
+The simulation, the render loop and the other subscribers carry on as before.
+"""
+import asyncio
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+from collections import deque
+
+from engine_model import STROKE_NAMES
+
+FORMAT_VERSION = 1
+DEFAULT_ADDRESS = "127.0.0.1:7878"
+DEFAULT_EVERY = 8 # Steps per frame sent unless the subscriber asks otherwise (~225 frames/s at 600 RPM)
+QUEUE_FRAMES = 256 # Frames queued per subscriber before the oldest are dropped
+PENDING_STEPS = 4096 # Steps published but not yet distributed (the loop thread starved) before the oldest are dropped
+FLUSH_SECONDS = 1.0 / 120 # Distribution runs at most this often, so a burst of steps costs one pass over the clients
+HANDSHAKE_SECONDS = 0.5 # Wait for a subscription line before streaming with the defaults
+WRITE_BUFFER_BYTES = 16384 # Transport buffer above which a client's writer waits (the queue then drops instead)
+SOCKET_BUFFER_BYTES = 16384 # Kernel send buffer per subscriber (loopback autotuning would otherwise hold megabytes of stale frames)
+FORMATS = ("json", "binary")
+FIELDS = ("sequence", "sim_time", "crank_angle", "rpm", "stroke", "intake_valve_open", "exhaust_valve_open",
+          "spark_firing", "paused", "volume", "pressure")
+FRAME = struct.Struct("<QdffBBff") # sequence, sim_time, crank_angle, rpm, stroke, flags, volume, pressure
+
+
+def _encode_json(step):
+    return (json.dumps(dict(zip(FIELDS, step)), separators=(",", ":")) + "\n").encode()
+
+def _encode_binary(step):
+    sequence, sim_time, crank_angle, rpm, stroke, intake, exhaust, spark, paused, volume, pressure = step
+    return FRAME.pack(sequence, sim_time, crank_angle, rpm, STROKE_NAMES.index(stroke),
+                      intake | exhaust << 1 | spark << 2 | paused << 3, volume, pressure)
+
+ENCODERS = {"json": _encode_json, "binary": _encode_binary}
+
+
+def stream_header(format, every):
+    """ The JSON line a subscriber receives before its frames. """
+    header = {'version': FORMAT_VERSION, 'format': format, 'every': every, 'fields': FIELDS, 'strokes': STROKE_NAMES}
+    if format == "binary": header.update(struct=FRAME.format, frame_size=FRAME.size)
+    return (json.dumps(header) + "\n").encode()
+
+
+def parse_subscription(line, default_every):
+    """ (format, every) from a subscription line; ValueError for a malformed one. """
+    options = json.loads(line) if line.strip() else {}
+    if not isinstance(options, dict): raise ValueError("subscription must be a JSON object")
+    format = options.get('format', "json"); every = options.get('every', default_every)
+    if format not in FORMATS: raise ValueError(f"format must be one of {FORMATS}")
+    if not isinstance(every, int) or every < 1: raise ValueError("every must be a positive integer")
+    return format, every
+
+
+class Subscriber:
+    def __init__(self, writer, format, every, queue_frames):
+        self.writer = writer
+        self.format = format; self.every = every
+        self.queue = deque(maxlen=queue_frames)
+        self.ready = asyncio.Event()
+        self.sent = 0; self.dropped = 0
+
+
+class TelemetryServer:
+    """ Streams engine state to any number of local subscribers (see module docstring). """
+    def __init__(self, address=DEFAULT_ADDRESS, every=DEFAULT_EVERY, queue_frames=QUEUE_FRAMES, log=sys.stderr):
+        self.address = address # Resolved to the bound address (e.g. the actual port for port 0) by start()
+        self.every = every
+        self.queue_frames = queue_frames
+        self.log = log
+        self.pending = deque(maxlen=PENDING_STEPS)
+        self.sequence = 0 # Steps published
+        self.subscribers = []
+        self.connections = set() # Writers of all open connections, subscribed or still in the handshake (loop thread only)
+        self.loop = None; self.server = None; self.wake = None
+        self.waiting = False # The loop is idle and needs a call_soon_threadsafe to notice new steps
+        self.running = False
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self.started = threading.Event(); self.error = None
+
+    def start(self):
+        """ Binds and starts serving; raises OSError if the address cannot be bound. """
+        self.running = True
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            raise self.error
+        if self.log is not None: print(f"telemetry: listening on {self.address}", file=self.log)
+        return self
+
+    def stop(self):
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self._shutdown)
+            self.thread.join()
+
+    def publish(self, engine):
+        """ Called by the engine after every simulation step (any thread). Never blocks. """
+        self.sequence += 1
+        if not self.subscribers:
+            return
+        self.pending.append((self.sequence, engine.sim_time, engine.panel_angle(), engine.rpm, engine.stroke,
+                             engine.intake_valve_open, engine.exhaust_valve_open, engine.spark_firing, engine.paused,
+                             engine.cylinder_volume, engine.pressure))
+        if self.waiting:
+            self.waiting = False
+            self.loop.call_soon_threadsafe(self.wake.set)
+
+    def stats(self):
+        """ (subscribers, frames sent, frames dropped) summed over the current subscribers. """
+        subscribers = list(self.subscribers)
+        return len(subscribers), sum(s.sent for s in subscribers), sum(s.dropped for s in subscribers)
+
+    # --- loop thread ---
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self.wake = asyncio.Event()
+        try:
+            if self.address.startswith("unix:"):
+                path = self.address[len("unix:"):]
+                if os.path.exists(path): os.unlink(path) # Left behind by a run that did not shut down
+                self.server = await asyncio.start_unix_server(self._accept, path)
+            else:
+                host, _, port = self.address.rpartition(":")
+                self.server = await asyncio.start_server(self._accept, host or "127.0.0.1", int(port))
+                host, port = self.server.sockets[0].getsockname()[:2]
+                self.address = f"{host}:{port}"
+        except (OSError, ValueError) as error:
+            self.error = OSError(f"telemetry: cannot listen on {self.address}: {error}")
+            self.started.set()
+            return
+        self.started.set()
+        await self._distribute()
+        clients = asyncio.all_tasks() - {asyncio.current_task()}
+        if clients: await asyncio.wait(clients, timeout=1.0) # Aborted by _shutdown(), they end on their own
+        if self.address.startswith("unix:") and os.path.exists(self.address[len("unix:"):]):
+            os.unlink(self.address[len("unix:"):])
+
+    async def _distribute(self):
+        pending = self.pending
+        while self.running:
+            self.wake.clear(); self.waiting = True
+            if not pending: await self.wake.wait() # publish() or _shutdown() sets it
+            self.waiting = False
+            steps = [pending.popleft() for _ in range(len(pending))]
+            encoded = {} # format -> frames, each step encoded once per format in use
+            for subscriber in self.subscribers:
+                frames = encoded.get(subscriber.format)
+                if frames is None: frames = encoded[subscriber.format] = [ENCODERS[subscriber.format](step) for step in steps]
+                every = subscriber.every
+                if every > 1: frames = [frame for step, frame in zip(steps, frames) if step[0] % every == 0]
+                if not frames: continue
+                queue = subscriber.queue
+                subscriber.dropped += max(0, len(queue) + len(frames) - queue.maxlen) # Appending to a full deque drops the oldest
+                queue.extend(frames)
+                subscriber.ready.set()
+            await asyncio.sleep(FLUSH_SECONDS)
+
+    async def _accept(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            try:
+                line = await asyncio.wait_for(reader.readline(), HANDSHAKE_SECONDS)
+            except asyncio.TimeoutError:
+                line = b""
+            if not self.running:
+                return
+            try:
+                format, every = parse_subscription(line.decode(errors="replace"), self.every)
+            except ValueError as error:
+                writer.write((json.dumps({'error': str(error)}) + "\n").encode())
+                return
+            writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_BYTES)
+            writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_BYTES)
+            writer.write(stream_header(format, every))
+            subscriber = Subscriber(writer, format, every, self.queue_frames)
+            self.subscribers = self.subscribers + [subscriber] # Replaced, not mutated: publish() reads it from another thread
+            try:
+                await self._send(subscriber)
+            finally:
+                self.subscribers = [s for s in self.subscribers if s is not subscriber]
+        except (ConnectionError, OSError):
+            pass # The client went away
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _send(self, subscriber):
+        writer = subscriber.writer; queue = subscriber.queue
+        while self.running:
+            await subscriber.ready.wait(); subscriber.ready.clear()
+            while queue:
+                subscriber.sent += len(queue)
+                writer.write(b"".join(queue)); queue.clear()
+                await writer.drain() # Waits while the client is slow; meanwhile its queue drops the oldest frames
+            if writer.is_closing():
+                return
+
+    def _shutdown(self):
+        self.running = False
+        self.wake.set()
+        if self.server is not None: self.server.close()
+        for writer in self.connections: writer.transport.abort() # Pending frames are discarded, a waiting drain() fails
+        for subscriber in self.subscribers: subscriber.ready.set()
@@ -0,0 +1,9 @@
+"""
+Shared test set-up: headless pygame, and no on-disk cache (every run solves and builds from scratch).
+
+Run from the project root:  python -m pytest
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("ENGINE_SIM_CACHE", "off")
@@ -0,0 +1,28 @@
+"""
+Steady-state allocation limits of the frame loop (benchmarks.check_allocations measures them):
+retained bytes per frame near zero, a bounded transient peak, and no full garbage collection.
+"""
+import pygame
+import pytest
+
+from benchmarks.check_allocations import SCENARIOS, run
+from engine_sim import WIDTH, HEIGHT
+
+FRAMES = 300
+MAX_RETAINED_BYTES_PER_FRAME = 16
+MAX_TRANSIENT_KB = 256
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.init()
+    yield pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.quit()
+
+
+@pytest.mark.parametrize("name", list(SCENARIOS))
+def test_steady_state_allocations(screen, name):
+    retained, transient_kb, collections = run(screen, *SCENARIOS[name], FRAMES)
+    assert retained <= MAX_RETAINED_BYTES_PER_FRAME
+    assert transient_kb <= MAX_TRANSIENT_KB
+    assert collections[2] == 0 # A full pass is the multi-millisecond hitch
@@ -0,0 +1,23 @@
+"""
+Cycle lookup tables against the analytic model: maximum interpolation error of every tabulated
+quantity at several resolutions.
+"""
+import numpy as np
+import pytest
+
+import engine_model
+from cycle_tables import CycleTable
+
+FIELDS = ("crank_pin_x", "crank_pin_y", "piston_pin_y", "piston_y", "volume", "pressure")
+MAX_ERROR = {("linear", 4): 1e-3, ("cubic", 4): 1e-5, ("linear", 16): 1e-4, ("cubic", 16): 1e-7}
+NUM_ANGLES = 200_000
+
+
+@pytest.mark.parametrize("interpolation, samples_per_degree", list(MAX_ERROR))
+def test_interpolation_error(interpolation, samples_per_degree):
+    angles = np.random.default_rng(0).uniform(0, 720, NUM_ANGLES)
+    reference = engine_model.sweep(angles)
+    state = CycleTable(samples_per_degree=samples_per_degree, interpolation=interpolation).lookup(angles)
+    errors = {field: float(np.abs(getattr(state, field) - getattr(reference, field)).max()) for field in FIELDS}
+    assert max(errors.values()) <= MAX_ERROR[interpolation, samples_per_degree], errors
+
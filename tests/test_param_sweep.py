@@ -0,0 +1,13 @@
+""" Pooled parameter sweeps match the in-process run point for point. """
+import numpy as np
+
+import param_sweep
+
+
+def test_pool_matches_in_process():
+    points = lambda: param_sweep.grid_points([1200.0], {"power_exponent": np.linspace(1.2, 1.4, 5).tolist(),
+                                                        "max_pressure_power": np.linspace(30, 70, 4).tolist()})
+    serial = []; pooled = []
+    param_sweep.run_sweep(points(), serial.extend, 1)
+    param_sweep.run_sweep(points(), pooled.extend, 2)
+    assert len(serial) == 20 and sorted(pooled) == sorted(serial)
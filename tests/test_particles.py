@@ -0,0 +1,79 @@
+"""
+ParticleSystem against the per-object Particle it replaced (per-stroke speed and height
+statistics), and the collision grid against a brute-force pair search.
+"""
+import random
+
+import numpy as np
+import pygame
+import pytest
+
+from engine_model import CYLINDER_CENTER_X, CYLINDER_TOP_Y, CYLINDER_WIDTH, TDC_Y, BDC_Y
+from engine_sim import Engine, Particle, WIDTH, HEIGHT
+from particles import ParticleSystem, COLLISION_CELL_SIZE
+
+COMPARE_PARTICLES = 2000
+COMPARE_FRAMES = 720 # Two full 720 degree cycles at 120 RPM and 60 FPS
+TOLERANCE = 0.05 # Maximum relative difference of the per-stroke averages
+STROKES = ("Compression", "Power", "Exhaust", "Intake")
+LEFT = CYLINDER_CENTER_X - CYLINDER_WIDTH // 2; RIGHT = LEFT + CYLINDER_WIDTH
+CHAMBERS = {"BDC": BDC_Y, "mid": (TDC_Y + BDC_Y) / 2, "TDC": TDC_Y} # Piston top -> chamber bottom
+BRUTE_FORCE_PARTICLES = 600
+
+
+def engine_frames(num_frames, rpm=120, fps=60):
+    """ Yields (bounds, stroke, combustion_timer) for consecutive frames of a running engine. """
+    engine = Engine(); engine.set_rpm(rpm); engine.toggle_pause()
+    for _ in range(num_frames):
+        engine.update(1.0 / fps)
+        bounds = (CYLINDER_CENTER_X - CYLINDER_WIDTH // 2, CYLINDER_TOP_Y,
+                  CYLINDER_CENTER_X + CYLINDER_WIDTH // 2, CYLINDER_TOP_Y + max(1, int(engine.piston_y - CYLINDER_TOP_Y)))
+        yield bounds, engine.stroke, engine.combustion_timer
+
+
+def stroke_stats(samples):
+    """ Averages (speed, relative height) per stroke from a list of (stroke, speed, rel_y) samples. """
+    return {stroke: np.array([(speed, rel_y) for s, speed, rel_y in samples if s == stroke]).mean(axis=0) for stroke in STROKES}
+
+
+@pytest.fixture(scope="module")
+def stroke_averages():
+    """ (Particle, ParticleSystem) per-stroke averages over the same engine frames. """
+    random.seed(1)
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    frames = list(engine_frames(COMPARE_FRAMES))
+    bounds = frames[0][0]
+    legacy = [Particle(pygame.Rect(bounds[0], bounds[1], bounds[2] - bounds[0], bounds[3] - bounds[1])) for _ in range(COMPARE_PARTICLES)]
+    system = ParticleSystem(COMPARE_PARTICLES, bounds, seed=1)
+    legacy_samples = []; system_samples = []
+    for bounds, stroke, combustion_timer in frames:
+        rect = pygame.Rect(bounds[0], bounds[1], bounds[2] - bounds[0], bounds[3] - bounds[1])
+        engine_state = {'stroke': stroke, 'combustion_timer': combustion_timer}
+        for particle in legacy: particle.move_and_draw(surface, rect, engine_state)
+        system.step(bounds, stroke, combustion_timer)
+        height = max(1, bounds[3] - bounds[1])
+        legacy_samples.append((stroke, np.mean([np.hypot(p.vx, p.vy) for p in legacy]),
+                               np.mean([(p.y - bounds[1]) / height for p in legacy])))
+        system_samples.append((stroke, np.hypot(system.vx, system.vy).mean(), ((system.y - bounds[1]) / height).mean()))
+    return stroke_stats(legacy_samples), stroke_stats(system_samples)
+
+
+@pytest.mark.parametrize("stroke", STROKES)
+def test_stroke_statistics_match_particle(stroke_averages, stroke):
+    legacy, system = stroke_averages
+    (legacy_speed, legacy_y), (system_speed, system_y) = legacy[stroke], system[stroke]
+    assert abs(system_speed - legacy_speed) <= TOLERANCE * legacy_speed
+    assert abs(system_y - legacy_y) <= TOLERANCE * legacy_y
+
+
+@pytest.mark.parametrize("chamber", ["mid", "TDC"])
+def test_collision_pairs_match_brute_force(chamber):
+    """ The grid finds exactly the overlapping pairs, however densely the chamber packs the gas. """
+    bounds = (LEFT, CYLINDER_TOP_Y, RIGHT, max(CYLINDER_TOP_Y + 1, CHAMBERS[chamber]))
+    system = ParticleSystem(BRUTE_FORCE_PARTICLES, (LEFT, CYLINDER_TOP_Y, RIGHT, CHAMBERS["BDC"]), seed=3, collisions=True)
+    for _ in range(20): system.step(bounds, "Compression", 0)
+    i, j = system.collision_pairs(LEFT, CYLINDER_TOP_Y)
+    distance = np.hypot(system.x[:, None] - system.x[None, :], system.y[:, None] - system.y[None, :])
+    expected_i, expected_j = np.nonzero(np.triu(distance < COLLISION_CELL_SIZE, 1))
+    assert set(zip(i.tolist(), j.tolist())) == set(zip(expected_i.tolist(), expected_j.tolist()))
+
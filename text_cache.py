@@ -0,0 +1,106 @@
+"""
+Text-rendering cache used by draw_text.
+
+Three layers, each with hit/miss counters:
+  * fonts    - one pygame Font per size (loading a font from disk is the expensive part)
+  * surfaces - rendered text surfaces keyed by (text, size, color), LRU-bounded because
+               numeric readouts ("Cycle Angle: 123.4°") produce a new string most frames
+  * layouts  - word-wrapped line lists keyed by (text, size, wrap_width), e.g. STROKE_DESCRIPTIONS
+"""
+from collections import OrderedDict
+
+import pygame
+
+MAX_CACHED_SURFACES = 512
+MAX_CACHED_LAYOUTS = 64
+
+
+class LRUCache:
+    """ Small OrderedDict-based LRU map with hit/miss counters. """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0; self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False) # Evict least recently used
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0; self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TextCache:
+    def __init__(self, max_surfaces=MAX_CACHED_SURFACES, max_layouts=MAX_CACHED_LAYOUTS):
+        self.fonts = {}
+        self.font_hits = 0; self.font_misses = 0
+        self.surfaces = LRUCache(max_surfaces)
+        self.layouts = LRUCache(max_layouts)
+
+    def font(self, size):
+        """ Shared Font object for a size (default pygame font). """
+        font = self.fonts.get(size)
+        if font is None:
+            self.font_misses += 1
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        else:
+            self.font_hits += 1
+        return font
+
+    def render(self, text, size, color):
+        """ Rendered (antialiased) surface for text; the returned surface is shared and must not be modified. """
+        key = (text, size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(size).render(text, True, color)
+            self.surfaces.put(key, surface)
+        return surface
+
+    def wrap(self, text, size, wrap_width):
+        """ Word-wraps text to wrap_width pixels. Returns a tuple of lines (same rules as the original draw_text). """
+        key = (text, size, wrap_width)
+        lines = self.layouts.get(key)
+        if lines is None:
+            font = self.font(size)
+            lines = []
+            current_line = ""
+            for word in text.split(' '):
+                test_line = current_line + word + " "
+                if font.size(test_line)[0] < wrap_width:
+                    current_line = test_line
+                else:
+                    lines.append(current_line)
+                    current_line = word + " "
+            lines.append(current_line)
+            lines = tuple(lines)
+            self.layouts.put(key, lines)
+        return lines
+
+    def stats(self):
+        """ Hit/miss counters and sizes of every layer. """
+        return {
+            'fonts': {'hits': self.font_hits, 'misses': self.font_misses, 'size': len(self.fonts)},
+            'surfaces': {'hits': self.surfaces.hits, 'misses': self.surfaces.misses, 'size': len(self.surfaces)},
+            'layouts': {'hits': self.layouts.hits, 'misses': self.layouts.misses, 'size': len(self.layouts)},
+        }
+
+    def clear(self):
+        """ Drops everything (required after pygame.quit(), which invalidates Font objects). """
+        self.fonts.clear()
+        self.font_hits = 0; self.font_misses = 0
+        self.surfaces.clear(); self.layouts.clear()
@@ -0,0 +1,317 @@
+"""
+Crank-angle-resolved single-zone cylinder model (no pygame).
+
+Integrates the cylinder energy balance over the 720 deg cycle instead of the stepwise
+conceptual curve of engine_model.cylinder_pressure:
+
+    dp/dc = [(gamma - 1) dQ/dc + gamma (T_in dm_in/dc - T dm_out/dc) - gamma p dV/dc] / V
+
+with the gas treated as ideal (R = 1, conceptual units), gamma blending from
+compression_exponent (fresh charge) to power_exponent (burned gas) with the burned fraction,
+Wiebe heat release from the spark (spark_advance deg before the firing TDC) over
+burn_duration deg, and gas exchange through the intake/exhaust valves (sin^2 lift between
+their opening and closing angles, quasi-steady orifice flow driven by the pressure
+difference to the intake or exhaust manifold). Flow per degree depends on engine speed, so
+an operating point is (EngineParams, ThermoParams, RPM bucket).
+
+The ODE is solved with an adaptive Bogacki-Shampine 3(2) integrator, cycle after cycle until
+it repeats. The periodic solution is tabulated at TABLE_SAMPLES_PER_DEGREE and cached per
+operating point, in memory and in the on-disk cache (disk_cache), so the engine only
+interpolates at run time and a later run does not solve the same point again.
+
+A cold point still takes 50-200 ms, too long for a frame. solve_ahead() starts a worker thread
+that solves every RPM bucket of a parameter set, nearest the current RPM first; while it runs,
+current_thermo_table() never solves on the caller's thread but queues the point at the front of
+the worker's stack and hands out the nearest solved bucket until it is ready.
+"""
+import math
+import queue
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from disk_cache import cached_arrays, content_key, source_digest
+from engine_model import DEFAULT_PARAMS, MIN_PRESSURE, engine_geometry
+
+# --- Thermodynamic Parameters ---
+# Cycle angles as in engine_model: 0 = BDC before compression, 180 = firing TDC, 360 = BDC, 540 = exhaust TDC.
+ThermoParams = namedtuple("ThermoParams", [
+    "spark_advance", "burn_duration", "wiebe_a", "wiebe_m", "heating_value",
+    "intake_pressure", "intake_temperature", "exhaust_pressure",
+    "intake_open", "intake_close", "exhaust_open", "exhaust_close", "valve_flow",
+])
+DEFAULT_THERMO = ThermoParams(
+    spark_advance=10.0, # deg before firing TDC (the conceptual model's spark window starts at 170)
+    burn_duration=50.0, # deg from spark to (practically) complete combustion
+    wiebe_a=5.0, wiebe_m=2.0, # Wiebe efficiency and shape factors
+    heating_value=48.0, # Heat released per unit of trapped mass (sets the peak pressure, ~50 with the defaults)
+    intake_pressure=MIN_PRESSURE, intake_temperature=1.0, exhaust_pressure=MIN_PRESSURE * 1.05, # Manifold state as in the conceptual curve; temperatures in units of T_intake
+    intake_open=530.0, intake_close=30.0, # 10 deg before exhaust TDC, 30 deg after BDC
+    exhaust_open=320.0, exhaust_close=550.0, # 40 deg before BDC, 10 deg after exhaust TDC
+    valve_flow=6000.0, # Peak valve flow coefficient (conceptual area * discharge coefficient)
+)
+
+TABLE_SAMPLES_PER_DEGREE = 2
+RPM_BUCKET = 25 # Operating points closer than this in RPM share a cached solution
+FLOW_RPM_FLOOR = 250 # Below this the charge settles to manifold pressure anyway; slower flow per degree only makes the ODE stiff
+MAX_CACHED_CYCLES = 64 # Every bucket up to MAX_RPM (31) of two parameter sets
+MAX_CYCLES = 12 # Cycles integrated at most while looking for the periodic solution
+PERIODIC_TOLERANCE = 1e-4 # Relative change of the end-of-cycle state that counts as converged
+RELATIVE_TOLERANCE = 1e-5; ABSOLUTE_TOLERANCE = 1e-7
+CRITICAL_PRESSURE_RATIO = 0.528 # Flow chokes below this downstream/upstream ratio
+
+ThermoCycle = namedtuple("ThermoCycle", ["crank_angle", "pressure", "temperature", "mass", "burned_fraction", "volume", "cycles"])
+
+
+def _window_phase(angle, start, end):
+    """ Fraction 0..1 of the way through the (possibly 720-wrapping) window [start, end), or None outside it. """
+    length = (end - start) % 720.0
+    offset = (angle - start) % 720.0
+    return offset / length if offset < length else None
+
+
+class _CylinderODE:
+    """ Right-hand side d(p, m)/d(angle) for one operating point; scalar math only (called ~10^4 times per cycle). """
+    def __init__(self, params, thermo, rpm):
+        geometry = engine_geometry(params)
+        self.params = params; self.thermo = thermo
+        self.r = params.crank_radius; self.l2 = params.conrod_length ** 2
+        self.center_y = geometry.crankshaft_center_y
+        self.pin_offset = params.piston_height / 2
+        self.tdc_y = geometry.tdc_y; self.stroke = geometry.stroke_pixels
+        self.scale = params.swept_volume_scale
+        self.seconds_per_degree = 1.0 / (6.0 * max(rpm, FLOW_RPM_FLOOR))
+        self.spark = 180.0 - thermo.spark_advance
+
+    def volume(self, angle):
+        """ (V, dV/d angle) from the slider-crank geometry, like engine_model.cylinder_volume (without the clip). """
+        a = math.radians(angle % 360.0)
+        sin_a = math.sin(a); cos_a = math.cos(a)
+        root = math.sqrt(max(1e-12, self.l2 - (self.r * sin_a) ** 2))
+        piston_y = self.center_y + self.r * cos_a - root - self.pin_offset
+        dy = -self.r * sin_a + self.r * self.r * sin_a * cos_a / root
+        return self.params.clearance_volume + (piston_y - self.tdc_y) * self.scale, dy * self.scale * math.pi / 180.0
+
+    def burned(self, angle):
+        """ (burned fraction, its derivative per degree) of the Wiebe function. """
+        thermo = self.thermo
+        since = (angle - self.spark) % 720.0
+        if since >= 360.0: # Before the spark of this cycle
+            return 0.0, 0.0
+        u = since / thermo.burn_duration
+        e = math.exp(-thermo.wiebe_a * u ** (thermo.wiebe_m + 1))
+        return 1.0 - e, thermo.wiebe_a * (thermo.wiebe_m + 1) / thermo.burn_duration * u ** thermo.wiebe_m * e
+
+    def valve_area(self, angle, open_angle, close_angle):
+        phase = _window_phase(angle, open_angle, close_angle)
+        return 0.0 if phase is None else self.thermo.valve_flow * math.sin(math.pi * phase) ** 2
+
+    def flow(self, area, p_up, t_up, p_down):
+        """ Quasi-steady orifice mass flow per degree from the upstream to the downstream side. """
+        ratio = max(p_down / p_up, CRITICAL_PRESSURE_RATIO)
+        return area * p_up / math.sqrt(t_up) * math.sqrt(2.0 * (1.0 - ratio)) * self.seconds_per_degree
+
+    def __call__(self, angle, p, m, mass_at_spark):
+        thermo = self.thermo
+        volume, dvolume = self.volume(angle)
+        temperature = p * volume / m
+        burned, dburned = self.burned(angle)
+        gamma = self.params.compression_exponent + (self.params.power_exponent - self.params.compression_exponent) * burned
+        heat = thermo.heating_value * mass_at_spark * dburned
+        enthalpy_in = 0.0; mass_in = 0.0; mass_out = 0.0
+        # Gas exchange: inflow carries the upstream temperature, outflow the cylinder's
+        area = self.valve_area(angle, thermo.intake_open, thermo.intake_close)
+        if area:
+            if thermo.intake_pressure > p:
+                dm = self.flow(area, thermo.intake_pressure, thermo.intake_temperature, p)
+                mass_in += dm; enthalpy_in += thermo.intake_temperature * dm
+            else:
+                mass_out += self.flow(area, p, temperature, thermo.intake_pressure) # Backflow into the intake
+        area = self.valve_area(angle, thermo.exhaust_open, thermo.exhaust_close)
+        if area:
+            if p > thermo.exhaust_pressure:
+                mass_out += self.flow(area, p, temperature, thermo.exhaust_pressure)
+            else:
+                dm = self.flow(area, thermo.exhaust_pressure, temperature, p) # Reverse flow of exhaust at about cylinder temperature
+                mass_in += dm; enthalpy_in += temperature * dm
+        dp = ((gamma - 1.0) * heat + gamma * (enthalpy_in - temperature * mass_out) - gamma * p * dvolume) / volume
+        return dp, mass_in - mass_out
+
+
+def _integrate_cycle(ode, p, m, samples_per_degree):
+    """
+    One 720 deg cycle from angle 0 with adaptive Bogacki-Shampine 3(2) steps, recording (p, m)
+    at every table angle. Returns (pressures, masses) lists with 720 * spd + 1 entries.
+    """
+    cells = int(round(720 * samples_per_degree))
+    interval = 1.0 / samples_per_degree
+    pressures = [p]; masses = [m]
+    angle = 0.0; h = interval
+    mass_at_spark = m
+    spark_angle = ode.spark % 720.0
+    k1 = ode(angle, p, m, mass_at_spark)
+    for cell in range(1, cells + 1):
+        target = cell * interval
+        if angle < spark_angle <= target: mass_at_spark = m # Trapped charge (the valves are closed around the spark)
+        while angle < target - 1e-12:
+            h = min(h, target - angle)
+            k2 = ode(angle + 0.5 * h, p + 0.5 * h * k1[0], m + 0.5 * h * k1[1], mass_at_spark)
+            k3 = ode(angle + 0.75 * h, p + 0.75 * h * k2[0], m + 0.75 * h * k2[1], mass_at_spark)
+            p_new = p + h * (2 * k1[0] + 3 * k2[0] + 4 * k3[0]) / 9
+            m_new = m + h * (2 * k1[1] + 3 * k2[1] + 4 * k3[1]) / 9
+            k4 = ode(angle + h, p_new, m_new, mass_at_spark)
+            error_p = h * (-5 * k1[0] / 72 + k2[0] / 12 + k3[0] / 9 - k4[0] / 8)
+            error_m = h * (-5 * k1[1] / 72 + k2[1] / 12 + k3[1] / 9 - k4[1] / 8)
+            error = max(abs(error_p) / (ABSOLUTE_TOLERANCE + RELATIVE_TOLERANCE * abs(p_new)),
+                        abs(error_m) / (ABSOLUTE_TOLERANCE + RELATIVE_TOLERANCE * abs(m_new)))
+            if error <= 1.0 and p_new > 0 and m_new > 0:
+                angle += h; p = p_new; m = m_new; k1 = k4 # First-same-as-last
+            h *= min(4.0, max(0.2, 0.9 * (error + 1e-12) ** (-1.0 / 3.0)))
+            if error > 1.0 and h < 1e-6:
+                raise ArithmeticError(f"step size underflow at cycle angle {angle:.3f}")
+        pressures.append(p); masses.append(m)
+    return pressures, masses
+
+
+def solve_cycle(params=DEFAULT_PARAMS, thermo=DEFAULT_THERMO, rpm=60.0, samples_per_degree=TABLE_SAMPLES_PER_DEGREE):
+    """ Periodic solution of the cylinder model for one operating point, tabulated over 0-720 deg. """
+    ode = _CylinderODE(params, thermo, rpm)
+    p = thermo.intake_pressure; m = p * ode.volume(0.0)[0] / thermo.intake_temperature # Start at BDC full of fresh charge
+    for cycle in range(1, MAX_CYCLES + 1):
+        pressures, masses = _integrate_cycle(ode, p, m, samples_per_degree)
+        converged = (abs(pressures[-1] - p) <= PERIODIC_TOLERANCE * p and abs(masses[-1] - m) <= PERIODIC_TOLERANCE * m)
+        p = pressures[-1]; m = masses[-1]
+        if converged:
+            break
+    crank_angle = np.linspace(0.0, 720.0, len(pressures))
+    volume = np.array([ode.volume(angle)[0] for angle in crank_angle.tolist()])
+    pressure = np.array(pressures); mass = np.array(masses)
+    burned = np.array([ode.burned(angle)[0] for angle in crank_angle.tolist()])
+    return ThermoCycle(crank_angle=crank_angle, pressure=pressure, temperature=pressure * volume / mass, mass=mass,
+                       burned_fraction=burned, volume=volume, cycles=cycle)
+
+
+class ThermoTable:
+    """ Interpolation over a solved cycle (scalar for the per-step engine update, arrays for multi-cylinder lookups). """
+    def __init__(self, cycle):
+        self.cycle = cycle
+        self.samples_per_degree = (len(cycle.pressure) - 1) / 720.0
+        self.pressure_list = cycle.pressure.tolist()
+        self.cells = len(self.pressure_list) - 1
+        self.peak_pressure = float(cycle.pressure.max())
+
+    def pressure_at(self, crank_angle):
+        u = (crank_angle % 720.0) * self.samples_per_degree
+        index = int(u)
+        if index >= self.cells: index = self.cells - 1
+        p0 = self.pressure_list[index]
+        return p0 + (self.pressure_list[index + 1] - p0) * (u - index)
+
+    def pressure(self, crank_angles):
+        return np.interp(np.mod(crank_angles, 720.0), self.cycle.crank_angle, self.cycle.pressure)
+
+
+# --- Cached solutions per operating point ---
+_CYCLE_CACHE = OrderedDict()
+
+def operating_point(params, thermo, rpm):
+    return (params, thermo, int(round(max(rpm, FLOW_RPM_FLOOR) / RPM_BUCKET)) * RPM_BUCKET)
+
+def cached_cycle(params, thermo, rpm):
+    """ solve_cycle(params, thermo, rpm) through the disk cache, keyed by everything the solution depends on. """
+    disk_key = content_key("thermo-cycle", params, thermo, float(rpm), TABLE_SAMPLES_PER_DEGREE, MAX_CYCLES, PERIODIC_TOLERANCE,
+                           RELATIVE_TOLERANCE, ABSOLUTE_TOLERANCE, CRITICAL_PRESSURE_RATIO, source_digest("engine_model", "thermo_model"))
+    def solve():
+        cycle = solve_cycle(params, thermo, rpm)
+        return dict(cycle._asdict(), cycles=np.array(cycle.cycles))
+    arrays = cached_arrays("thermo-cycle", disk_key, solve)
+    return ThermoCycle(**dict(arrays, cycles=int(arrays['cycles'])))
+
+_CACHE_LOCK = threading.Lock() # _CYCLE_CACHE is shared with the solve_ahead worker
+
+def _store_table(key, table):
+    with _CACHE_LOCK:
+        _CYCLE_CACHE[key] = table
+        if len(_CYCLE_CACHE) > MAX_CACHED_CYCLES:
+            _CYCLE_CACHE.popitem(last=False)
+
+def _cached_table(key):
+    with _CACHE_LOCK:
+        table = _CYCLE_CACHE.get(key)
+        if table is not None: _CYCLE_CACHE.move_to_end(key)
+        return table
+
+def get_thermo_table(params=DEFAULT_PARAMS, thermo=DEFAULT_THERMO, rpm=60.0):
+    """ Shared ThermoTable for an operating point (RPM floored and rounded to RPM_BUCKET), solved or loaded on first use, LRU-bounded. """
+    key = operating_point(params, thermo, rpm)
+    table = _cached_table(key)
+    if table is None:
+        table = ThermoTable(cached_cycle(params, thermo, key[2]))
+        _store_table(key, table)
+    return table
+
+def nearest_thermo_table(params, thermo, rpm):
+    """ The solved table of params and thermo whose RPM bucket is nearest to rpm, or None. """
+    target = operating_point(params, thermo, rpm)[2]
+    with _CACHE_LOCK:
+        buckets = [key[2] for key in _CYCLE_CACHE if key[0] == params and key[1] == thermo]
+    if not buckets:
+        return None
+    return _cached_table((params, thermo, min(buckets, key=lambda bucket: abs(bucket - target))))
+
+def clear_thermo_tables():
+    with _CACHE_LOCK:
+        _CYCLE_CACHE.clear()
+
+
+# --- Solving ahead on a worker thread ---
+class _SolverThread:
+    """ Daemon thread solving queued operating points, the most recently queued first. """
+    def __init__(self):
+        self.requests = queue.LifoQueue() # The point the slider last reached goes ahead of the precomputation
+        self.last_request = None
+        self.thread = threading.Thread(target=self.run, name="thermo-solver", daemon=True)
+        self.thread.start()
+
+    def request(self, key):
+        if key != self.last_request: # The engine asks again every frame until the point is ready
+            self.last_request = key; self.requests.put(key)
+
+    def run(self):
+        while True:
+            key = self.requests.get()
+            if _cached_table(key) is not None:
+                continue
+            try:
+                _store_table(key, ThermoTable(cached_cycle(*key)))
+            except ArithmeticError as error: # The nearest solved bucket keeps standing in
+                print(f"thermo: no solution at {key[2]} RPM ({error})", file=sys.stderr)
+
+_SOLVER = None
+
+def solve_ahead(params, thermo, max_rpm, rpm=0.0):
+    """ Queues every RPM bucket up to max_rpm on the worker thread (started on first use), nearest to rpm first. """
+    global _SOLVER
+    if _SOLVER is None: _SOLVER = _SolverThread()
+    buckets = range(FLOW_RPM_FLOOR, int(max_rpm) + RPM_BUCKET, RPM_BUCKET)
+    for bucket in sorted(buckets, key=lambda bucket: -abs(bucket - rpm)): # Last pushed is solved first
+        _SOLVER.requests.put(operating_point(params, thermo, bucket))
+
+def current_thermo_table(params, thermo, rpm):
+    """
+    (table, ready) for an operating point. Without solve_ahead this is get_thermo_table (ready is True). With it, a point
+    not solved yet is queued on the worker and the nearest solved bucket is returned with ready False; only when
+    nothing of params and thermo is solved yet is the point solved here.
+    """
+    if _SOLVER is not None:
+        key = operating_point(params, thermo, rpm)
+        table = _cached_table(key)
+        if table is not None:
+            return table, True
+        nearest = nearest_thermo_table(params, thermo, rpm)
+        if nearest is not None:
+            _SOLVER.request(key)
+            return nearest, False
+    return get_thermo_table(params, thermo, rpm), True